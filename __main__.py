@@ -2,7 +2,24 @@
 The primary application script for Alien Invaders
 """
 from consts import *
+from config import *
 from app import *
+import argparse
+import sys
 
 if __name__ == '__main__':
-    Invaders(width=GAME_WIDTH,height=GAME_HEIGHT).run()
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--spectate', type=int, nargs='?', const=SPECTATE_PORT,
+                        help='stream the game to viewers on this port')
+    parser.add_argument('--watch', type=int, nargs='?', const=SPECTATE_PORT,
+                        help='watch the game streamed on this port instead of playing')
+    args, rest = parser.parse_known_args(sys.argv[1:])
+    config = loadConfig(rest)
+    if (args.watch != None):
+        game = Spectator(width=config.width, height=config.height)
+        game.port = args.watch
+    else:
+        game = Invaders(width=config.width, height=config.height)
+        game.spectate = args.spectate
+    game.config = config
+    game.run()
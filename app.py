@@ -2,11 +2,26 @@
 Primary module for Alien Invaderss
 """
 from consts import *
+from config import *
 from game2d import *
 from wave import *
+from renderer import *
+from replay import *
+from hud import *
+from assets import *
+from audio import *
+from levels import *
+from events import *
+from spectate import *
+from inputs import *
+import atexit
+import profiler
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
 # Invaders is NOT allowed to access anything in models.py
+# Invaders is only a thin shell over Wave: all game rules live in Wave, and the
+# sprites for a wave are handled by a WaveRenderer, and its sounds by the
+# Mixer installed in audio.py
 
 class Invaders(GameApp):
     """
@@ -14,18 +29,55 @@ class Invaders(GameApp):
     INSTANCE ATTRIBUTES:
         view:    the game view, used in drawing (see examples from class)
                  [instance of GView; it is inherited from GameApp]
-        input:   the user input, used to control the ship and change state
+        input:   the keyboard, read once per frame by _sampler
                  [instance of GInput; it is inherited from GameApp]
+        config:  the settings of the first level [GameConfig]
+        spectate: the port to stream the game to viewers on [int, or None for no stream]
         _state:  the current state of the game represented as a value from consts.py
                  [one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE, STATE_PAUSED, STATE_CONTINUE, STATE_COMPLETE]
         _wave:   the subcontroller for a single wave, which manages the ships and aliens
                  [Wave, or None if there is no wave currently active]
+        _level:  the level of _wave, or of the next wave if there is none [int >= 1]
+        _builder: builds the wave of the next level while this one is played
+                 [WavePrebuilder, or None until prepare first runs]
+        _events: the gameplay events of the session, from every wave
+                 [EventBus, or None until prepare first runs]
+        _log:    writes _events to EVENT_FILE in the background
+                 [EventWriter, or None until prepare first runs]
+        _server: streams every wave to the viewers on spectate
+                 [SpectatorServer, or None if there is no stream or prepare has not run]
+        _renderer: the sprites for _wave
+                 [WaveRenderer, or None if there is no wave currently active]
+        _replay: the recording of the game in progress, every level so far, saved to
+                 REPLAY_FILE whenever a wave is complete [Replay, or None if it is saved]
+        _checkpoint: the snapshot of _wave taken when it started or when the ship
+                 last respawned, for retry [bytes, or None if there is no wave]
         _text:   the currently active message
                  [GLabel, or None if there is no message to display]
-        lastkeys: number of keys pressed in the previous frame [int >= 0]
-        soundOn: GLabel displaying sound text box if sound on
-        soundOff: GLabel displaying sound text box if sound off
+        _sampler: takes a snapshot of the game keys every frame and measures
+                 how soon the wave reacts to them [InputSampler, or None until start]
+        _keys:   the game keys of this frame, which the wave and every check of
+                 the states read [InputSnapshot]
+        _hud:    supplies every label, rebuilding one only when its text changes [Hud]
+        _drawn:  True once the current start screen has been drawn [boolean]
+        _ready:  True once prepare has loaded the assets and started the mixer [boolean]
+
+    The application is not given its settings through __init__, which GameApp
+    owns; assign config and spectate on the application before calling run.
+    The prebuilder, the event bus, the event writer and the spectator server
+    last for the whole session, so they are made the first time prepare runs
+    and kept when start sets up a new game.
     """
+    # the settings of the first level, unless set before run
+    config = DEFAULT_CONFIG
+    # the port to stream the game to viewers on, unless set before run
+    spectate = None
+    # the objects of the session, until prepare first runs
+    _builder = None
+    _events = None
+    _log = None
+    _server = None
+    _sampler = None
 
     def start(self):
         """
@@ -38,14 +90,28 @@ class Invaders(GameApp):
         This method should make sure that all of the attributes satisfy the given
         invariants. When done, it sets the _state to STATE_INACTIVE and create a message
         (in attribute _text) saying that the user should press to play a game.
+
+        Loading the sprites and sounds and starting the mixer are left to
+        prepare, which update calls once the message has been drawn, so that
+        the first frame is not held up by them. When the game is played again,
+        the waves built ahead for the last game are dropped.
         """
+        if (self._builder != None):
+            self._builder.clear()
         self._state = STATE_INACTIVE
         self._wave = None
-        self.lastkeys = 0
-        self._soundOn = GLabel(text ="S to change sound\nSound is on",font_size=25,bold=True,x=GAME_WIDTH/2,y=.92*GAME_HEIGHT)
-        self._soundOff = GLabel(text ="S to change sound\nSound is off",font_size=25,bold=True,x=GAME_WIDTH/2,y=.92*GAME_HEIGHT)
+        self._level = 1
+        self._renderer = None
+        self._replay = None
+        self._checkpoint = None
+        if (self._sampler == None):
+            self._sampler = InputSampler()
+        self._keys = self._sampler.getSnapshot()
+        self._drawn = False
+        self._ready = False
+        self._hud = Hud(self.config.width, self.config.height)
         if (self._state == STATE_INACTIVE):
-            self._text = GLabel(text = "Press 'Q' to Play", font_size = 100, bold = True, x = GAME_WIDTH/2, y = GAME_HEIGHT/2)
+            self._text = self._hud.message("Press 'Q' to Play", 100)
         else:
             self._text = None
 
@@ -87,33 +153,82 @@ class Invaders(GameApp):
         previous frame, and the player pressed a key. This state only lasts one animation
         frame before switching to STATE_ACTIVE.
 
-        STATE_COMPLETE: The wave is over, and is either won or lost.
+        STATE_COMPLETE: The wave is over, and is either won or lost. If it was
+        won, pressing 'Q' moves on to the next level, keeping the lives and
+        score. If it was lost, pressing 'R' plays on from the last checkpoint
+        (see retry).
 
         You are allowed to add more states if you wish. Should you do so, you should
         describe them here.
 
+        The keyboard is read once at the start of every frame (see
+        InputSampler), and every command acts once when its key is pressed,
+        however long it is held.
+
+        In any state, pressing 'O' turns the profiler and its overlay on or off
+        (see toggleProfiler). If the game is streamed to spectators, the wave
+        is published once every frame, whatever the state.
+
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
-        current = self.input.key_count
-        if (current > 0 and self.lastkeys == 0):
-            if (self.input.is_key_down('q') == True and self._state == STATE_INACTIVE):
-                self._state = STATE_NEWWAVE
-                self._text = None
-        self.lastkeys = current
+        if (self._drawn and not self._ready):
+            self.prepare()
+        self._keys = self._sampler.sample(self.input)
+        if (self._keys.isPressed('q') and self._state == STATE_INACTIVE):
+            self._state = STATE_NEWWAVE
+            self._text = None
+        elif (self._keys.isPressed('q') and self._state == STATE_COMPLETE
+              and self._wave.noAliensAlive()):
+            self._renderer.release()
+            self._level = self._level + 1
+            self._state = STATE_NEWWAVE
+            self._text = None
+        if (self._keys.isPressed('o')):
+            self.toggleProfiler()
         if (self._state == STATE_NEWWAVE):
-            self._wave = Wave()
+            self.prepare()
+            previous = self._wave
+            self._wave = self._builder.take(self._level)
+            if (previous != None):
+                self._wave.carryOver(previous)
+            self._wave.setEventBus(self._events)
+            self._events.emit(EVENT_WAVE, self._wave.getTicks(), self._wave.getSeed(),
+                              self._level, self._wave.getLives())
+            self._builder.request(self._level + 1)
+            self._renderer = WaveRenderer(self._wave)
+            if (previous == None):
+                self._replay = Replay(self._wave.getSeed(), config=self._wave.getConfig())
+            else:
+                self._replay = previous.getRecorder()
+                self._replay.addLevel(self._wave.getSeed(), self._wave.getConfig())
+            self._wave.setRecorder(self._replay)
+            self._checkpoint = self._wave.snapshot()
             self._state = STATE_ACTIVE
         self.active(dt)
-        if (self._state == STATE_PAUSED and self.input.is_key_down('f') == True):
+        if (self._server != None and self._wave != None):
+            self._server.publish(self._wave)
+        if (self._state == STATE_PAUSED and self._keys.isPressed('f')):
             if (self._wave.getLives() > 0):
                 self._state = STATE_ACTIVE
                 self._wave.setShip(self._wave.createShip())
+                self._events.emit(EVENT_RESPAWN, self._wave.getTicks(), self._wave.getLives())
+                self._checkpoint = self._wave.snapshot()
             else:
-                self._text=GLabel(text="Sorry you're bad\nNo lives left\nPress P to Play Again\nYour score was "+str(self._wave.getScore()),font_size=70,bold=True,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
+                self._text=self._hud.message("Sorry you're bad\nNo lives left\nPress P to Play Again\nPress R to Retry\nYour score was "+str(self._wave.getScore()),70)
                 self._state = STATE_COMPLETE
 
-        if (self._state == STATE_COMPLETE and self.input.is_key_down('p')):
+        if (self._state == STATE_COMPLETE and self._replay != None):
+            self._replay.save(REPLAY_FILE)
+            self._log.flush()
+            self._replay = None
+
+        if (self._state == STATE_COMPLETE and self._keys.isPressed('r')
+            and not self._wave.noAliensAlive()):
+            self.retry()
+
+        if (self._state == STATE_COMPLETE and self._keys.isPressed('p')):
+            self._renderer.release()
             self.start()
 
     def draw(self):
@@ -128,53 +243,186 @@ class Invaders(GameApp):
         or you need to add a draw method to class Wave.  We suggest the latter.  See
         the example subcontroller.py from class.
         """
+        prof = profiler.current
+        if (prof != None):
+            start = prof.clock()
         if (self._state == STATE_INACTIVE):
             self._text.draw(self.view)
+            self._drawn = True
 
         if (self._state == STATE_NEWWAVE):
-            self._wave.draw(self.view)
+            self._renderer.draw(self.view)
 
         if (self._state == STATE_ACTIVE):
-            self._wave.draw(self.view)
+            self._renderer.draw(self.view)
             self._text.draw(self.view)
-            if (self._wave.getSound()):
-                self._soundOn.draw(self.view)
-            else:
-                self._soundOff.draw(self.view)
+            self._hud.sound(self._wave.getSound()).draw(self.view)
 
         if (self._state == STATE_PAUSED):
-            self._wave.draw(self.view)
+            self._renderer.draw(self.view)
             self._text.draw(self.view)
 
         if (self._state == STATE_COMPLETE):
             self._text.draw(self.view)
+
+        if (prof != None):
+            self._hud.profile(prof).draw(self.view)
+            prof.lap('Invaders.draw', start)
     # HELPER METHODS FOR THE STATES GO HERE
+    def prepare(self):
+        """
+        Loads the sprites and sounds for a wave, starts the mixer, and starts
+        building the first level, unless that has been done since start. The
+        first time, it also makes the prebuilder, the event bus, the event
+        writer and the spectator server of the session.
+        """
+        if (not self._ready):
+            preload(Wave(config=self.config).getAliens())
+            if (getMixer() == None):
+                setMixer(Mixer(SoundBankBackend()))
+            if (self._builder == None):
+                self._builder = WavePrebuilder(self.config)
+                atexit.register(self._builder.close)
+                self._events = EventBus()
+                self._log = EventWriter(self._events)
+                atexit.register(self._log.close)
+                if (self.spectate != None):
+                    self._server = SpectatorServer(self.spectate)
+                    atexit.register(self._server.close)
+            self._builder.request(self._level)
+            self._ready = True
+
+    def retry(self):
+        """
+        Puts the wave back as it was at the last checkpoint, and the recording
+        with it, and plays on from there
+        """
+        self._wave.restore(self._checkpoint)
+        self._events.emit(EVENT_RETRY, self._wave.getTicks(), self._wave.getTicks())
+        self._replay = self._wave.getRecorder()
+        self._text = self._hud.status(self._wave.getLives(), self._wave.getScore())
+        self._state = STATE_ACTIVE
+
+    def toggleProfiler(self):
+        """
+        Turns profiling on, or turns it off and exports what was profiled to
+        PROFILE_FILE.csv and PROFILE_FILE.json
+        """
+        prof = profiler.getProfiler()
+        if (prof == None):
+            profiler.setProfiler(profiler.Profiler())
+        else:
+            profiler.setProfiler(None)
+            prof.saveCSV(profiler.PROFILE_FILE + '.csv')
+            prof.saveJSON(profiler.PROFILE_FILE + '.json')
+
     def active(self, dt):
         """
-        Method updates game when state is STATE_ACTIVE
+        Method updates game when state is STATE_ACTIVE. The wave ticks on the
+        snapshot of this frame, and once a tick has run, the input latency of
+        the keys pressed since the last tick is recorded. In any other state
+        no tick is waiting for them, so they are not measured.
 
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
+        if (self._state != STATE_ACTIVE):
+            self._sampler.forget()
         if (self._state == STATE_ACTIVE):
-            self._wave.update(self.input, dt)
-            current = self.input.key_count
-            if (self.input.is_key_down('s') and current > 0):
+            ticks = self._wave.getTicks()
+            lag = self._wave.getAlpha() * TICK
+            self._wave.update(self._keys, dt)
+            if (self._wave.getTicks() > ticks):
+                self._sampler.simulated(self._keys, lag, dt)
+            if (self._keys.isPressed('s')):
                 if (self._wave.getSound()):
                     self._wave.setSound(False)
                 else:
                     self._wave.setSound(True)
-            self.lastkeys = current
             if (self._wave.isBelowLine()):
-                self._text=GLabel(text ="Sorry you're bad\nShip crossed line\nPress F to Play Again\nYour score was " + str(self._wave.getScore()),font_size=70,bold=True,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
+                self._events.emit(EVENT_LINE, self._wave.getTicks(),
+                                  self._wave.getAliens().bottom())
+                self._text=self._hud.message("Sorry you're bad\nShip crossed line\nPress F to Play Again\nPress R to Retry\nYour score was " + str(self._wave.getScore()),70)
                 self._state = STATE_COMPLETE
             elif (self._wave.noAliensAlive()):
-                self._text=GLabel(text="Good Win",font_size=100,bold=True,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
+                self._events.emit(EVENT_CLEAR, self._wave.getTicks(), self._wave.getScore())
+                self._text=self._hud.message("Good Win\nPress 'Q' for Level "+str(self._level + 1),70)
                 self._state = STATE_COMPLETE
             elif (self._wave.getShip() == None):
-                self._text=GLabel(text="Press 'F' to Respwan\nYou have "+str(self._wave.getLives())+' lives left'
-                ,font_size=70,bold=True,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
+                self._text=self._hud.message("Press 'F' to Respwan\nYou have "+str(self._wave.getLives())+' lives left',70)
                 self._state = STATE_PAUSED
             else:
-                self._text = GLabel(text="Lives: "+str(self._wave.getLives())+'     Score: '+str(self._wave.getScore()),
-                font_size=25,bold=True,x=GAME_WIDTH/2,y=.85*GAME_HEIGHT)
+                self._text = self._hud.status(self._wave.getLives(), self._wave.getScore())
+
+
+class Spectator(GameApp):
+    """
+    An application that shows the game streamed by an Invaders on this
+    machine, without playing it. It waits for the game to start streaming,
+    and waits again if the stream ends.
+    INSTANCE ATTRIBUTES:
+        view:    the game view [instance of GView; it is inherited from GameApp]
+        config:  the settings used for the size of the window [GameConfig]
+        port:    the port the game streams on [int]
+        _client: the connection to the game [SpectatorClient, or None if not connected]
+        _renderer: the sprites for the view of the stream
+                 [WaveRenderer, or None until the first keyframe]
+        _drawing: the settings _renderer was built for [GameConfig or None]
+        _hud:    supplies every label [Hud]
+        _text:   the currently active message [GLabel]
+
+    As with Invaders, assign config and port before calling run.
+    """
+    # the settings used for the size of the window, unless set before run
+    config = DEFAULT_CONFIG
+    # the port the game streams on, unless set before run
+    port = SPECTATE_PORT
+
+    def start(self):
+        """
+        Initializes the application, waiting for the game
+        """
+        self._client = None
+        self._renderer = None
+        self._drawing = None
+        self._hud = Hud(self.config.width, self.config.height)
+        self._text = self._hud.message('Waiting for a game\non port ' + str(self.port), 70)
+
+    def update(self, dt):
+        """
+        Applies what the game has streamed since the last frame, connecting
+        to the game first if needed
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        if (self._client == None):
+            try:
+                self._client = SpectatorClient(self.port)
+            except OSError:
+                return
+        try:
+            self._client.poll()
+        except ConnectionError:
+            self._client.close()
+            if (self._renderer != None):
+                self._renderer.release()
+            self.start()
+            return
+        view = self._client.getView()
+        if (not view.isReady()):
+            return
+        if (view.getConfig() != self._drawing):
+            if (self._renderer != None):
+                self._renderer.release()
+            self._renderer = WaveRenderer(view)
+            self._drawing = view.getConfig()
+        self._text = self._hud.status(view.getLives(), view.getScore())
+
+    def draw(self):
+        """
+        Draws the streamed wave, or the message while there is none
+        """
+        if (self._renderer != None):
+            self._renderer.draw(self.view)
+        self._text.draw(self.view)
@@ -0,0 +1,140 @@
+"""
+Asset cache for Alien Invaders
+
+Constructing a GImage checks its image file and looks up its texture, and
+constructing a Sound loads the whole sound file. The game needs a sprite
+for every alien and every sound, and used to build them all again for each
+wave. This module keeps them for the life of the process instead:
+
+* the sound bank holds one Sound per file; SoundBankBackend plays the
+  sounds kept by the Mixer in audio.py from it;
+* the sprite atlas holds the image sprites that renderers have released,
+  grouped by image file, and hands them out again before building new ones.
+
+Only one renderer draws at a time, but more than one can exist (one can be
+built ahead for the next wave), so sprites are taken and released rather
+than shared by position. After preload() has run, building a renderer does
+no file I/O at all.
+"""
+from consts import *
+from game2d import *
+
+
+# the loaded sounds, keyed by file name
+_sounds = {}
+# the released image sprites, as lists keyed by image file name
+_atlas = {}
+
+
+def loadSound(name):
+    """
+    Returns the Sound for the file name, loading it only the first time
+
+    Parameter name: the sound file
+    Precondition: name is a string naming a sound file
+    """
+    sound = _sounds.get(name)
+    if (sound == None):
+        sound = Sound(name)
+        _sounds[name] = sound
+    return sound
+
+
+class SoundBankBackend(object):
+    """
+    A Mixer backend that plays sounds from the sound bank through game2d.
+
+    The handle of a sound is its Sound in the bank. A game2d Sound has no
+    way to stop part way through, so stop mutes it instead, and play turns
+    the volume back up when the sound starts again.
+
+    The Mixer calls the backend from its own thread. A Sound only drives the
+    audio player it was loaded into, and none of the window or drawing
+    state, so it can be played from there while the frame thread draws.
+    """
+
+    def play(self, name):
+        """
+        Plays the sound file name and returns its Sound [Sound]
+
+        Parameter name: the sound to play
+        Precondition: name is a string naming a sound file
+        """
+        sound = loadSound(name)
+        sound.volume = 1.0
+        sound.play()
+        return sound
+
+    def stop(self, handle):
+        """
+        Silences the sound handle until it is played again
+
+        Parameter handle: the sound to stop
+        Precondition: handle is a Sound returned by play
+        """
+        handle.volume = 0.0
+
+
+def takeImage(source, x, y, width, height):
+    """
+    Returns a GImage of the file source with the given position and size,
+    reusing a released sprite of that file if there is one
+
+    Parameter source: the image file
+    Precondition: source is a string naming an image file
+
+    Parameter x: the x coordinate of the center of the sprite
+    Precondition: x is an int or float
+
+    Parameter y: the y coordinate of the center of the sprite
+    Precondition: y is an int or float
+
+    Parameter width: the width of the sprite
+    Precondition: width is an int or float > 0
+
+    Parameter height: the height of the sprite
+    Precondition: height is an int or float > 0
+    """
+    free = _atlas.get(source)
+    if (free == None or len(free) == 0):
+        return GImage(x = x, y = y, width = width, height = height, source = source)
+    sprite = free.pop()
+    sprite.x = x
+    sprite.y = y
+    sprite.width = width
+    sprite.height = height
+    return sprite
+
+
+def releaseImages(sprites):
+    """
+    Gives the sprites back to the atlas to be reused by takeImage
+
+    The caller must not draw the sprites again after releasing them.
+
+    Parameter sprites: the sprites
+    Precondition: sprites is an iterable of GImage made by takeImage
+    """
+    for sprite in sprites:
+        _atlas.setdefault(sprite.source, []).append(sprite)
+
+
+def preload(aliens):
+    """
+    Loads every sound, and enough sprites of every image for the ship and
+    the formation aliens, so that the first wave built does no file I/O
+    either
+
+    Parameter aliens: a formation of the size and images to prepare for
+    Precondition: aliens is a Formation object
+    """
+    for name in GAME_SOUNDS:
+        loadSound(name)
+    need = {SHIP_IMAGE: 1}
+    for r in range(aliens.getRows()):
+        source = aliens.getSource(r)
+        need[source] = need.get(source, 0) + aliens.getCols()
+    for source in need:
+        have = len(_atlas.get(source, ()))
+        releaseImages([GImage(x = 0, y = 0, width = 1, height = 1, source = source)
+                       for i in range(max(0, need[source] - have))])
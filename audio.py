@@ -0,0 +1,299 @@
+"""
+Audio module for Alien Invaders
+
+Wave asks for sounds with play(name) in the middle of collisions and firing.
+That call only puts the request on a queue and returns; a Mixer drains the
+queue on its own thread and decides what is actually heard:
+
+* at most AUDIO_VOICES sounds play at once, each holding its voice for
+  AUDIO_VOICE_TIME seconds;
+* the same sound does not start twice within SOUND_MIN_GAP seconds;
+* when every voice is busy, a sound takes the voice of the least important
+  sound playing, if it has a higher SOUND_PRIORITY, and is dropped otherwise;
+  the sound that loses its voice is stopped.
+
+The mixing thread also starts and stops the sounds through a backend, so a
+stall of the audio device holds up that thread and never the frame.
+
+This module has no dependency on game2d: the backend that plays through
+game2d is in assets.py, and NullBackend plays nothing, optionally recording
+what it was asked to play. Until a mixer is installed with setMixer, play
+does nothing, so headless runs never touch an audio device.
+
+Sound is switched on and off for the whole process with setEnabled.
+"""
+from consts import *
+import queue
+import threading
+import time
+
+
+class NullBackend(object):
+    """
+    A backend that plays nothing, for headless runs and tests.
+
+    A backend has two methods: play(name) starts a sound and returns a handle
+    to it, and stop(handle) stops a sound it started.
+    INSTANCE ATTRIBUTES:
+        _record:  True if the sounds are recorded [boolean]
+        _played:  the sounds the mixer started, in order [list of str]
+        _stopped: the sounds the mixer stopped, in order [list of str]
+    """
+
+    def __init__(self, record=False):
+        """
+        Initializes a backend, recording sounds only if record is True
+
+        Parameter record: whether to record the sounds started
+        Precondition: record is a boolean
+        """
+        self._record = record
+        self._played = []
+        self._stopped = []
+
+    def getPlayed(self):
+        """
+        Returns the sounds started so far, in order, if recording [list of str]
+        """
+        return list(self._played)
+
+    def getStopped(self):
+        """
+        Returns the sounds stopped so far, in order, if recording [list of str]
+        """
+        return list(self._stopped)
+
+    def play(self, name):
+        """
+        Records that the sound file name was started, if recording, and
+        returns name as its handle
+
+        Parameter name: the sound to play
+        Precondition: name is a string
+        """
+        if (self._record):
+            self._played.append(name)
+        return name
+
+    def stop(self, handle):
+        """
+        Records that the sound with the given handle was stopped, if recording
+
+        Parameter handle: the sound to stop
+        Precondition: handle was returned by play
+        """
+        if (self._record):
+            self._stopped.append(handle)
+
+
+class Mixer(object):
+    """
+    A class to mix the sounds requested by the game on a background thread.
+
+    Each voice is a slot that plays one sound at a time. The mixing thread
+    fills the slots and plays their sounds, keeping the backend handle of the
+    sound in each slot so that a sound whose voice is stolen can be stopped.
+    INSTANCE ATTRIBUTES:
+        _backend:  plays the sounds the mixer keeps [object with methods
+                   play(name) and stop(handle)]
+        _requests: the sounds requested and not yet mixed, as pairs
+                   (name, time requested), with None to stop [queue.Queue]
+        _slots:    the sound holding each voice, as a tuple (end time,
+                   priority, name), or None [list of tuple or None]
+        _handles:  the backend handle of the sound playing in each voice, or
+                   None [list]
+        _last:     the time each sound was last started [dict of str to float]
+        _stats:    the number of sounds 'requested', 'played', dropped by
+                   rate 'limited', dropped for lack of a voice ('noVoice')
+                   and that 'stole' a voice [dict of str to int]
+        _lock:     guards _stats [threading.Lock]
+        _thread:   the mixing thread [threading.Thread]
+    """
+
+    def __init__(self, backend, voices=AUDIO_VOICES):
+        """
+        Initializes a mixer that plays through backend, and starts its thread
+
+        Parameter backend: the backend to play sounds with
+        Precondition: backend has methods play(name) and stop(handle)
+
+        Parameter voices: the number of sounds that can play at once
+        Precondition: voices is an int > 0
+        """
+        self._backend = backend
+        self._requests = queue.Queue()
+        self._slots = [None] * voices
+        self._handles = [None] * voices
+        self._last = {}
+        self._stats = {'requested': 0, 'played': 0, 'limited': 0, 'noVoice': 0, 'stole': 0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='mixer', daemon=True)
+        self._thread.start()
+
+    def getBackend(self):
+        """
+        Returns the backend the mixer plays through
+        """
+        return self._backend
+
+    def getStats(self):
+        """
+        Returns a copy of the mixer statistics [dict of str to int]
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def play(self, name):
+        """
+        Requests that the sound file name be played. This never blocks.
+
+        Parameter name: the sound to play
+        Precondition: name is a string naming a sound file
+        """
+        self._requests.put_nowait((name, time.perf_counter()))
+
+    def _stop(self, slot):
+        """
+        Stops the sound playing in the voice slot and frees its handle
+
+        Parameter slot: the voice
+        Precondition: slot is an int in 0..len(_slots)-1
+        """
+        handle = self._handles[slot]
+        self._handles[slot] = None
+        # a backend may hand out the same handle for a sound still playing in
+        # another voice; that one must keep playing
+        if (handle != None and handle not in self._handles):
+            self._backend.stop(handle)
+
+    def flush(self):
+        """
+        Waits until every sound requested so far has been mixed
+        """
+        done = threading.Event()
+        self._requests.put_nowait(done)
+        done.wait()
+
+    def close(self):
+        """
+        Stops the mixing thread once the sounds already requested are mixed
+        """
+        self._requests.put_nowait(None)
+        self._thread.join()
+
+    def _run(self):
+        """
+        Mixes requests until close is called
+        """
+        while (True):
+            batch = [self._requests.get()]
+            while (not self._requests.empty()):
+                batch.append(self._requests.get_nowait())
+            requests = []
+            for item in batch:
+                if (item == None or isinstance(item, threading.Event)):
+                    self._mix(requests)
+                    requests = []
+                    if (item == None):
+                        return
+                    item.set()
+                else:
+                    requests.append(item)
+            self._mix(requests)
+
+    def _mix(self, requests):
+        """
+        Starts the most important of requests that are not rate limited and
+        can get a voice, stopping the sounds whose voice they take
+
+        Parameter requests: the requests to mix
+        Precondition: requests is a list of pairs (name, time requested)
+        """
+        if (len(requests) == 0):
+            return
+        now = time.perf_counter()
+        for slot in range(len(self._slots)):
+            if (self._slots[slot] != None and self._slots[slot][0] <= now):
+                self._slots[slot] = None
+                self._handles[slot] = None
+        requests.sort(key=lambda request: -SOUND_PRIORITY.get(request[0], 0))
+        counts = {'requested': len(requests), 'played': 0, 'limited': 0, 'noVoice': 0, 'stole': 0}
+        for name, when in requests:
+            if (when - self._last.get(name, -SOUND_MIN_GAP) < SOUND_MIN_GAP):
+                counts['limited'] += 1
+                continue
+            priority = SOUND_PRIORITY.get(name, 0)
+            if (None in self._slots):
+                slot = self._slots.index(None)
+            else:
+                slot = min(range(len(self._slots)), key=lambda slot: self._slots[slot][1])
+                if (self._slots[slot][1] >= priority):
+                    counts['noVoice'] += 1
+                    continue
+                self._stop(slot)
+                counts['stole'] += 1
+            self._slots[slot] = (now + AUDIO_VOICE_TIME, priority, name)
+            self._last[name] = when
+            self._handles[slot] = self._backend.play(name)
+            counts['played'] += 1
+        with self._lock:
+            for key in counts:
+                self._stats[key] += counts[key]
+
+
+# the mixer play sends sounds to, or None for no sound at all
+_mixer = None
+# whether sound is on for the whole process
+_enabled = True
+
+
+def getMixer():
+    """
+    Returns the mixer that play sends sounds to, or None if there is none
+    """
+    return _mixer
+
+
+def setMixer(mixer):
+    """
+    Makes mixer the one that play sends sounds to, closing the previous one
+
+    Parameter mixer: the new mixer
+    Precondition: mixer is a Mixer object or None
+    """
+    global _mixer
+    old = _mixer
+    _mixer = mixer
+    if (old != None and old is not mixer):
+        old.close()
+
+
+def isEnabled():
+    """
+    Returns: True if sound is on
+    """
+    return _enabled
+
+
+def setEnabled(on):
+    """
+    Switches sound on or off for the whole process
+
+    Parameter on: whether sound is on
+    Precondition: on is a boolean
+    """
+    global _enabled
+    _enabled = on
+
+
+def play(name):
+    """
+    Requests that the sound file name be played, if sound is on and a mixer
+    is installed. This never blocks.
+
+    Parameter name: the sound to play
+    Precondition: name is a string naming a sound file
+    """
+    if (_enabled and _mixer != None):
+        _mixer.play(name)
+
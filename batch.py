@@ -0,0 +1,289 @@
+"""
+Batch simulator for Alien Invaders
+
+Plays many seeded waves headless across a pool of worker processes and
+aggregates the results, for balancing the settings of a GameConfig such as
+speed, boltRate, rows and cols. Every game is independent, so the work is split into chunks
+of seeds and runs on all cores with no shared state; results stream back as
+each chunk finishes.
+
+Run this module to print a summary, for example
+
+    python batch.py --games=2000 --policy=hunter --speed=0.4 --boltRate=2
+
+Every setting of GameConfig is an option, as in loadConfig. A policy is
+either one of the names in headless.POLICIES or a path of the form
+module:function naming a policy(tick, wave) function.
+"""
+from consts import *
+from config import *
+from headless import *
+import argparse
+import importlib
+import math
+import multiprocessing
+import sys
+import time
+
+
+def loadPolicy(name):
+    """
+    Returns the policy function called name
+
+    Raises ValueError if there is no such policy.
+
+    Parameter name: a key of POLICIES, or a path module:function
+    Precondition: name is a string
+    """
+    if (name in POLICIES):
+        return POLICIES[name]
+    if (':' not in name):
+        raise ValueError('unknown policy ' + repr(name))
+    module, function = name.split(':', 1)
+    return getattr(importlib.import_module(module), function)
+
+
+# the policy played by this process, set by _startWorker
+_policy = None
+# the settings of each game played by this process, set by _startWorker
+_config = DEFAULT_CONFIG
+# the tick limit of each game played by this process, set by _startWorker
+_ticks = 100000
+
+
+def _startWorker(policy, config, ticks):
+    """
+    Prepares a worker process to play games
+
+    Parameter policy: the name of the policy to play
+    Precondition: policy is a string accepted by loadPolicy
+
+    Parameter config: the settings of each game
+    Precondition: config is a GameConfig
+
+    Parameter ticks: the tick limit of each game
+    Precondition: ticks is an int > 0
+    """
+    global _policy, _config, _ticks
+    _policy = loadPolicy(policy)
+    _config = config
+    _ticks = ticks
+
+
+def _playChunk(seeds):
+    """
+    Returns the results of one game per seed in seeds, as a list of tuples
+    (outcome, score, lives, ticks)
+
+    Parameter seeds: the seeds of the waves to play
+    Precondition: seeds is a range of ints
+    """
+    results = []
+    for seed in seeds:
+        wave = Wave(seed, _config)
+        result = runWave(wave, ScriptedInput(_policy, wave), _ticks)
+        results.append((result['outcome'], result['score'], result['lives'], result['ticks']))
+    return results
+
+
+def _percentile(values, fraction):
+    """
+    Returns the value at fraction of the way through the sorted list values,
+    or None if it is empty
+
+    Parameter values: the values
+    Precondition: values is a sorted list of numbers
+
+    Parameter fraction: how far through the list
+    Precondition: fraction is a float in 0..1
+    """
+    if (len(values) == 0):
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class BatchStats(object):
+    """
+    A class to accumulate the results of many games.
+    INSTANCE ATTRIBUTES:
+        _outcomes: the number of games per outcome [dict of str to int]
+        _scores:   the score of every game [list of int]
+        _clears:   the ticks taken by every won game [list of int]
+        _lost:     the number of games per number of lives lost [dict of int to int]
+        _ticks:    the total number of ticks played [int >= 0]
+        _lives:    the number of lives each game started with [int > 0]
+    """
+
+    def __init__(self, lives=SHIP_LIVES):
+        """
+        Initializes empty statistics
+
+        Parameter lives: the number of lives each game starts with
+        Precondition: lives is an int > 0
+        """
+        self._lives = lives
+        self._outcomes = {}
+        self._scores = []
+        self._clears = []
+        self._lost = {}
+        self._ticks = 0
+
+    def add(self, result):
+        """
+        Adds the result of one game
+
+        Parameter result: the result of the game
+        Precondition: result is a tuple (outcome, score, lives, ticks)
+        """
+        outcome, score, lives, ticks = result
+        self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+        self._scores.append(score)
+        if (outcome == OUTCOME_WIN):
+            self._clears.append(ticks)
+        lost = self._lives - lives
+        self._lost[lost] = self._lost.get(lost, 0) + 1
+        self._ticks = self._ticks + ticks
+
+    def getGames(self):
+        """
+        Returns the number of games added
+        """
+        return len(self._scores)
+
+    def getTicks(self):
+        """
+        Returns the total number of ticks played
+        """
+        return self._ticks
+
+    def summary(self):
+        """
+        Returns the statistics as a dict: the number of games, the count and
+        rate of every outcome (the 'line' rate is how often isBelowLine ended
+        the game), the score distribution, the time to clear won waves in
+        seconds, and the distribution of lives lost
+        """
+        games = self.getGames()
+        scores = sorted(self._scores)
+        clears = sorted(self._clears)
+        result = {'games': games, 'outcomes': dict(self._outcomes), 'rates': {}}
+        for outcome in self._outcomes:
+            result['rates'][outcome] = self._outcomes[outcome] / games
+        if (games > 0):
+            mean = sum(scores) / games
+            var = sum((x - mean) ** 2 for x in scores) / games
+            result['score'] = {'mean': mean, 'stdev': math.sqrt(var),
+                'min': scores[0], 'p10': _percentile(scores, 0.1),
+                'p50': _percentile(scores, 0.5), 'p90': _percentile(scores, 0.9),
+                'max': scores[-1]}
+        if (len(clears) > 0):
+            result['clear'] = {'mean': sum(clears) / len(clears) * TICK,
+                'p50': _percentile(clears, 0.5) * TICK,
+                'p90': _percentile(clears, 0.9) * TICK}
+        result['livesLost'] = dict(sorted(self._lost.items()))
+        return result
+
+
+def runBatch(games, seed=0, processes=None, policy='sweep', config=DEFAULT_CONFIG,
+             ticks=100000, chunk=None, onChunk=None):
+    """
+    Plays games waves with seeds seed, seed+1, ... and returns their BatchStats
+
+    Parameter games: the number of games to play
+    Precondition: games is an int >= 0
+
+    Parameter seed: the seed of the first game
+    Precondition: seed is an int >= 0
+
+    Parameter processes: the number of worker processes, None for one per
+    core, or 1 to play in this process
+    Precondition: processes is an int > 0 or None
+
+    Parameter policy: the policy the player follows
+    Precondition: policy is a string accepted by loadPolicy
+
+    Parameter config: the settings of each game
+    Precondition: config is a GameConfig
+
+    Parameter ticks: the tick limit of each game
+    Precondition: ticks is an int > 0
+
+    Parameter chunk: the number of games sent to a worker at a time, or None
+    to pick one
+    Precondition: chunk is an int > 0 or None
+
+    Parameter onChunk: called as onChunk(stats) each time a chunk of results
+    arrives, or None
+    Precondition: onChunk is a callable or None
+    """
+    if (processes == None):
+        processes = multiprocessing.cpu_count()
+    if (chunk == None):
+        chunk = max(1, min(50, games // (4 * processes)))
+    chunks = [range(s, min(s + chunk, seed + games)) for s in range(seed, seed + games, chunk)]
+    settings = (policy, config, ticks)
+    stats = BatchStats(config.shipLives)
+
+    if (processes == 1):
+        _startWorker(*settings)
+        for seeds in chunks:
+            for result in _playChunk(seeds):
+                stats.add(result)
+            if (onChunk != None):
+                onChunk(stats)
+        return stats
+
+    with multiprocessing.Pool(processes, _startWorker, settings) as pool:
+        for results in pool.imap_unordered(_playChunk, chunks):
+            for result in results:
+                stats.add(result)
+            if (onChunk != None):
+                onChunk(stats)
+    return stats
+
+
+def main(argv):
+    """
+    Runs a batch from the command line arguments argv and prints its summary
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    parser = argparse.ArgumentParser(prog='batch.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--policy', default='sweep')
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--quiet', action='store_true', help='do not report progress')
+    args, rest = parser.parse_known_args(argv)
+    config = loadConfig(rest)
+    loadPolicy(args.policy)
+
+    start = time.perf_counter()
+    def progress(stats):
+        if (not args.quiet):
+            sys.stderr.write('\r%d/%d games' % (stats.getGames(), args.games))
+    stats = runBatch(args.games, args.seed, args.processes, args.policy, config,
+                     args.ticks, onChunk=progress)
+    elapsed = time.perf_counter() - start
+    if (not args.quiet):
+        sys.stderr.write('\n')
+
+    summary = stats.summary()
+    print('games      ', summary['games'])
+    for outcome in sorted(summary['outcomes']):
+        print('%-11s %d (%.1f%%)' % (outcome, summary['outcomes'][outcome],
+                                      100 * summary['rates'][outcome]))
+    if ('score' in summary):
+        print('score       mean %(mean).1f  stdev %(stdev).1f  min %(min)d  p10 %(p10)d  '
+              'p50 %(p50)d  p90 %(p90)d  max %(max)d' % summary['score'])
+    if ('clear' in summary):
+        print('clear (s)   mean %(mean).1f  p50 %(p50).1f  p90 %(p90).1f' % summary['clear'])
+    print('lives lost ', summary['livesLost'])
+    print('%.2f s, %.0f games/s, %.0f ticks/s' % (elapsed, summary['games'] / elapsed,
+                                                  stats.getTicks() / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
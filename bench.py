@@ -0,0 +1,377 @@
+"""
+Benchmark suite for Alien Invaders
+
+Drives Wave headless through named scenarios, with the hunter policy at the
+controls, and measures for each one:
+
+* ticks per second of Wave.tick, the median ('ticksPerSec') and the best
+  ('bestTicksPerSec') of BENCH_REPEATS runs;
+* the mean cost of every phase of a tick, from a Profiler;
+* the memory allocated per tick, from tracemalloc: 'allocBytesPerTick' is
+  the mean peak above the memory in use at the start of the tick, and
+  'retainedBytesPerTick' the mean growth that outlives the tick.
+
+Whenever a game ends it is replaced by the next seed, set up the same way,
+so every scenario runs for as many ticks as asked. Only the ticks are timed.
+
+The results are compared with BENCH_BASELINE, and the run fails if a
+scenario is slower, or allocates more, than the baseline by more than the
+tolerance. Baselines depend on the machine; refresh them with --save.
+
+    python bench.py
+    python bench.py --scenario=endgame --ticks=50000
+    python bench.py --save
+"""
+from consts import *
+from config import *
+from headless import *
+import argparse
+import json
+import platform
+import profiler
+import sys
+import time
+import tracemalloc
+
+
+# the file holding the baseline results
+BENCH_BASELINE = 'bench_baseline.json'
+# the number of ticks timed per scenario run
+BENCH_TICKS = 10000
+# the number of timed runs per scenario
+BENCH_REPEATS = 7
+# the number of ticks profiled, and traced for allocations, per scenario
+BENCH_SAMPLE_TICKS = 2000
+# the fraction by which a result may be worse than the baseline
+BENCH_TOLERANCE = 0.3
+# the bytes per tick an allocation result may exceed the baseline by anyway,
+# so that results near zero do not fail on noise
+BENCH_ALLOC_SLACK = 64
+# the number of aliens left alive in the endgame scenario
+BENCH_SURVIVORS = 4
+
+
+def _nearLine(wave):
+    """
+    Lowers the formation of wave to four vertical steps above the defense line
+
+    Parameter wave: the wave to set up
+    Precondition: wave is a new Wave
+    """
+    config = wave.getConfig()
+    aliens = wave.getAliens()
+    aliens.march(0, config.defenseLine + 4 * config.alienVWalk - aliens.bottom())
+
+
+def _endgame(wave):
+    """
+    Destroys every alien of wave but BENCH_SURVIVORS in the middle of the
+    top row
+
+    Parameter wave: the wave to set up
+    Precondition: wave is a new Wave
+    """
+    aliens = wave.getAliens()
+    first = (aliens.getCols() - BENCH_SURVIVORS) // 2
+    for r in range(aliens.getRows()):
+        for c in range(aliens.getCols()):
+            if (r != 0 or c < first or c >= first + BENCH_SURVIVORS):
+                aliens.kill(r, c)
+
+
+# the scenarios, as name: (config, function to set up each new wave or
+# None). 'max' has 9 rows, not 10: a tenth row does not fit above the
+# defense line.
+SCENARIOS = {
+    'default':    (DEFAULT_CONFIG, None),
+    'max':        (GameConfig(rows=9, cols=15), None),
+    'nearLine':   (DEFAULT_CONFIG, _nearLine),
+    'heavyFire':  (GameConfig(boltRate=1), None),
+    'endgame':    (DEFAULT_CONFIG, _endgame),
+}
+
+
+class _Driver(object):
+    """
+    A class to keep a scenario playing for as many ticks as asked.
+    INSTANCE ATTRIBUTES:
+        _setup:  sets up each new wave [function or None]
+        _config: the settings of each new wave [GameConfig]
+        _seed:  the seed of the current wave [int >= 0]
+        _wave:  the wave being played [Wave]
+        _input: the hunter policy playing _wave [ScriptedInput]
+    """
+
+    def __init__(self, setup, config):
+        """
+        Initializes a driver playing the first wave of a scenario
+
+        Parameter setup: sets up each new wave, or None
+        Precondition: setup is a function of one Wave, or None
+
+        Parameter config: the settings of each new wave
+        Precondition: config is a GameConfig
+        """
+        self._setup = setup
+        self._config = config
+        self._seed = -1
+        self._next()
+
+    def _next(self):
+        """
+        Starts the wave with the next seed
+
+        Raises ValueError if the wave is over before it starts.
+        """
+        self._seed = self._seed + 1
+        self._wave = Wave(self._seed, self._config)
+        if (self._setup != None):
+            self._setup(self._wave)
+        if (self._wave.isBelowLine() or self._wave.noAliensAlive()):
+            raise ValueError('the scenario is over before its first tick')
+        self._input = ScriptedInput(hunterPolicy, self._wave)
+
+    def run(self, ticks, prepare=None, finish=None):
+        """
+        Plays ticks ticks and returns the seconds spent in Wave.tick
+
+        Parameter ticks: the number of ticks to play
+        Precondition: ticks is an int >= 0
+
+        Parameter prepare, finish: called with no arguments right before and
+        right after every tick, or None
+        Precondition: prepare and finish are functions or None
+        """
+        elapsed = 0.0
+        done = 0
+        while (done < ticks):
+            wave = self._wave
+            input = self._input
+            start = time.perf_counter()
+            while (done < ticks and wave.getShip() != None and not wave.isBelowLine()
+                   and not wave.noAliensAlive()):
+                if (prepare != None):
+                    prepare()
+                wave.tick(input)
+                if (finish != None):
+                    finish()
+                input.advance()
+                done = done + 1
+            elapsed = elapsed + time.perf_counter() - start
+            if (wave.isBelowLine() or wave.noAliensAlive() or wave.getLives() == 0):
+                self._next()
+            elif (wave.getShip() == None):
+                wave.setShip(wave.createShip())
+        return elapsed
+
+
+class _AllocMeter(object):
+    """
+    A class to measure the memory allocated by each tick with tracemalloc.
+    INSTANCE ATTRIBUTES:
+        _start:    the memory traced at the start of the current tick [int]
+        _peak:     the sum of the peaks above _start [int]
+        _retained: the sum of the memory growth of every tick [int]
+    """
+
+    def __init__(self):
+        """
+        Initializes a meter with nothing measured
+        """
+        self._start = 0
+        self._peak = 0
+        self._retained = 0
+
+    def prepare(self):
+        """
+        Starts measuring a tick
+        """
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def finish(self):
+        """
+        Stops measuring a tick
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = self._peak + peak - self._start
+        self._retained = self._retained + current - self._start
+
+    def getPeak(self):
+        """
+        Returns the sum of the peaks of every tick, in bytes
+        """
+        return self._peak
+
+    def getRetained(self):
+        """
+        Returns the sum of the memory growth of every tick, in bytes
+        """
+        return self._retained
+
+
+def runScenario(name, ticks=BENCH_TICKS, repeats=BENCH_REPEATS, samples=BENCH_SAMPLE_TICKS):
+    """
+    Runs the scenario name and returns its results as a dict with the keys
+    'ticksPerSec' (the median run), 'bestTicksPerSec', 'phases' (mean
+    milliseconds per phase),
+    'allocBytesPerTick' and 'retainedBytesPerTick'
+
+    Parameter name: the scenario
+    Precondition: name is a key of SCENARIOS
+
+    Parameter ticks: the number of ticks timed per run
+    Precondition: ticks is an int > 0
+
+    Parameter repeats: the number of timed runs
+    Precondition: repeats is an int > 0
+
+    Parameter samples: the number of ticks profiled and traced
+    Precondition: samples is an int > 0
+    """
+    config, setup = SCENARIOS[name]
+    runs = []
+    for i in range(repeats):
+        runs.append(_Driver(setup, config).run(ticks))
+    runs.sort()
+
+    prof = profiler.Profiler(samples)
+    profiler.setProfiler(prof)
+    try:
+        _Driver(setup, config).run(samples)
+    finally:
+        profiler.setProfiler(None)
+
+    meter = _AllocMeter()
+    driver = _Driver(setup, config)
+    tracemalloc.start()
+    try:
+        driver.run(samples, meter.prepare, meter.finish)
+    finally:
+        tracemalloc.stop()
+
+    phases = {}
+    for phase in prof.getPhases():
+        phases[phase] = prof.stats(phase)['mean']
+    return {'ticksPerSec': ticks / runs[len(runs) // 2],
+            'bestTicksPerSec': ticks / runs[0], 'phases': phases,
+            'allocBytesPerTick': meter.getPeak() / samples,
+            'retainedBytesPerTick': meter.getRetained() / samples}
+
+
+def compare(results, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Returns the regressions of results against baseline, as a list of
+    messages (empty if there are none). Scenarios missing from the baseline
+    are not checked.
+
+    Parameter results: the results of each scenario
+    Precondition: results is a dict of scenario name to a dict from runScenario
+
+    Parameter baseline: the baseline results of each scenario
+    Precondition: baseline is a dict like results
+
+    Parameter tolerance: the fraction a result may be worse than the baseline
+    Precondition: tolerance is a float >= 0
+    """
+    problems = []
+    for name in results:
+        if (name not in baseline):
+            continue
+        new = results[name]
+        old = baseline[name]
+        # the best run is compared with the median of the baseline, so that
+        # a burst of load on the machine does not fail the run
+        if (new['bestTicksPerSec'] < old['ticksPerSec'] * (1 - tolerance)):
+            problems.append('%s: %.0f ticks/s at best, baseline %.0f' %
+                            (name, new['bestTicksPerSec'], old['ticksPerSec']))
+        limit = old['allocBytesPerTick'] * (1 + tolerance) + BENCH_ALLOC_SLACK
+        if (new['allocBytesPerTick'] > limit):
+            problems.append('%s: %.0f bytes allocated per tick, baseline %.0f' %
+                            (name, new['allocBytesPerTick'], old['allocBytesPerTick']))
+    return problems
+
+
+def loadBaseline(path):
+    """
+    Returns the baseline results stored in the file path, or an empty dict
+    if there is no such file
+
+    Parameter path: the file to read
+    Precondition: path is a string
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)['scenarios']
+    except FileNotFoundError:
+        return {}
+
+
+def saveBaseline(path, results):
+    """
+    Writes results to the file path as the new baseline, with a note of the
+    machine they were measured on
+
+    Parameter path: the file to write
+    Precondition: path is a string
+
+    Parameter results: the results of each scenario
+    Precondition: results is a dict of scenario name to a dict from runScenario
+    """
+    data = {'machine': platform.machine(), 'python': platform.python_version(),
+            'scenarios': results}
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=1, sort_keys=True)
+        file.write('\n')
+
+
+def main(argv):
+    """
+    Runs the benchmarks from the command line arguments argv, prints the
+    results, and returns the exit status: 1 if anything regressed, else 0
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    parser = argparse.ArgumentParser(prog='bench.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only this scenario (may be repeated)')
+    parser.add_argument('--ticks', type=int, default=BENCH_TICKS)
+    parser.add_argument('--repeats', type=int, default=BENCH_REPEATS)
+    parser.add_argument('--baseline', default=BENCH_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE)
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline')
+    args = parser.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    baseline = loadBaseline(args.baseline)
+    results = {}
+    print('%-10s %11s %9s %12s %14s' % ('scenario', 'ticks/s', 'baseline',
+                                          'alloc B/tick', 'retained B/tick'))
+    for name in names:
+        results[name] = runScenario(name, args.ticks, args.repeats)
+        old = baseline.get(name, {}).get('ticksPerSec')
+        print('%-10s %11.0f %9s %12.0f %14.1f' % (name, results[name]['ticksPerSec'],
+              '-' if old == None else '%.0f' % old, results[name]['allocBytesPerTick'],
+              results[name]['retainedBytesPerTick']))
+    print()
+    print('%-10s' % 'phase (us)' + ''.join('%15s' % phase for phase in profiler.PROFILE_PHASES[:7]))
+    for name in names:
+        phases = results[name]['phases']
+        print('%-10s' % name + ''.join('%15.2f' % (1000 * phases.get(phase, 0))
+                                        for phase in profiler.PROFILE_PHASES[:7]))
+
+    if (args.save):
+        merged = dict(baseline)
+        merged.update(results)
+        saveBaseline(args.baseline, merged)
+        print('\nsaved', args.baseline)
+        return 0
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print('REGRESSION', problem)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,306 @@
+"""
+Game configuration for Alien Invaders
+
+A GameConfig holds every setting that can differ between two games in the
+same process: the size of the world, the formation, the speeds and the fire
+rules. It is frozen and validated when it is made, and it computes the
+values derived from the settings (the alien step interval, where each row
+and column of the formation starts, the ship start) once, so a Wave never
+recomputes them. Wave, VecWave and Invaders each take a config, so waves
+with different settings can run side by side in one process or worker.
+
+The sizes of the sprites, the images, the sounds and the tick rate are not
+settings; they stay in consts. The defaults of the settings are in consts
+too, under the same names in capitals (rows is ALIEN_ROWS, cols is
+ALIENS_IN_ROW, and so on).
+
+loadConfig builds a config from, in increasing order of precedence: the
+defaults, a TOML file of settings, environment variables named
+CONFIG_ENV_PREFIX plus the setting in capitals (INVADERS_ROWS=8,
+INVADERS_SHIP_BOLT_LIMIT=3), and the command line, which takes --name=value
+options (--rows=8 --shipBoltLimit=3) as well as the classic positional
+rows, aliens per row and speed:
+
+    python . 3 4 0.5
+
+A bad setting in the file, the environment or an option is an error. The
+classic arguments keep their old leniency and bounds: one that is not a
+number, is outside rows 1..10, aliens per row 1..15 or a speed in (0, 3],
+or gives a formation that does not fit, is ignored with a warning, as are
+any after the third.
+"""
+from consts import *
+import dataclasses
+import os
+import re
+import warnings
+
+
+# the TOML file of settings read by loadConfig, if it exists
+CONFIG_FILE = 'invaders.toml'
+# the prefix of the environment variables read by loadConfig
+CONFIG_ENV_PREFIX = 'INVADERS_'
+
+
+@dataclasses.dataclass(frozen=True)
+class GameConfig(object):
+    """
+    A class to hold the settings of a game, and the values derived from them.
+
+    The settings are the dataclass fields that can be passed to the
+    initializer; make a changed copy with replace.
+    DERIVED ATTRIBUTES:
+        stepTicks: the number of ticks between alien steps: the first tick at
+                   which more than speed seconds have passed [int > 0]
+        colx:      the x coordinate of the center of each column of a new
+                   formation [tuple of float]
+        rowy:      the y coordinate of the center of each row of a new
+                   formation, top row first [tuple of float]
+        sources:   the image file of each row, with different aliens every
+                   two rows [tuple of str]
+        shipX:     the x coordinate of the center of a new ship [float]
+        shipY:     the y coordinate of the center of a new ship [float]
+    """
+    # the width of the world
+    width: int = GAME_WIDTH
+    # the height of the world
+    height: int = GAME_HEIGHT
+    # the number of pixels to move the ship per tick
+    shipMovement: int = SHIP_MOVEMENT
+    # the number of lives a ship has
+    shipLives: int = SHIP_LIVES
+    # the y-coordinate of the defensive line the ship is protecting
+    defenseLine: int = DEFENSE_LINE
+    # the horizontal separation between aliens
+    alienHSep: int = ALIEN_H_SEP
+    # the vertical separation between aliens
+    alienVSep: int = ALIEN_V_SEP
+    # the number of horizontal pixels to move an alien
+    alienHWalk: int = ALIEN_H_WALK
+    # the number of vertical pixels to move an alien
+    alienVWalk: int = ALIEN_V_WALK
+    # the distance of the top alien from the top of the world
+    alienCeiling: int = ALIEN_CEILING
+    # the number of rows of aliens
+    rows: int = ALIEN_ROWS
+    # the number of aliens per row
+    cols: int = ALIENS_IN_ROW
+    # the number of seconds between alien steps
+    speed: float = ALIEN_SPEED
+    # the number of pixels to move a bolt per tick
+    boltSpeed: int = BOLT_SPEED
+    # the number of alien steps between alien bolts
+    boltRate: int = BOLT_RATE
+    # the number of bolts the aliens fire each time they fire
+    volley: int = ALIEN_VOLLEY
+    # the number of ship bolts allowed on screen at once
+    shipBoltLimit: int = SHIP_BOLT_LIMIT
+    # the number of bolts fired side by side in one shot
+    spread: int = SHIP_SPREAD
+    # the horizontal distance between the bolts of a spread shot
+    spreadGap: int = SHIP_SPREAD_GAP
+
+    stepTicks: int = dataclasses.field(init=False, repr=False, compare=False)
+    colx: tuple = dataclasses.field(init=False, repr=False, compare=False)
+    rowy: tuple = dataclasses.field(init=False, repr=False, compare=False)
+    sources: tuple = dataclasses.field(init=False, repr=False, compare=False)
+    shipX: float = dataclasses.field(init=False, repr=False, compare=False)
+    shipY: float = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """
+        Checks the settings and computes the derived attributes
+
+        Raises ValueError if a setting is out of range, or if the formation
+        does not fit in the world above the defense line.
+        """
+        for name, low in _MINIMUMS.items():
+            if (not getattr(self, name) >= low):
+                raise ValueError('%s must be at least %s, not %r' % (name, low, getattr(self, name)))
+        if (self.defenseLine >= self.height):
+            raise ValueError('defenseLine must be below the height of the world')
+        derived = self._derive()
+        if (derived['colx'][-1] + ALIEN_WIDTH/2 + self.alienHSep > self.width):
+            raise ValueError('%d aliens per row do not fit in a world %d wide'
+                             % (self.cols, self.width))
+        if (derived['rowy'][-1] - ALIEN_HEIGHT/2 <= self.defenseLine):
+            raise ValueError('%d rows of aliens reach the defense line before the wave starts'
+                             % self.rows)
+        for name in derived:
+            object.__setattr__(self, name, derived[name])
+
+    def _derive(self):
+        """
+        Returns the derived attributes of the settings, as a dict
+        """
+        colx = tuple(self.alienHSep + ALIEN_WIDTH/2 + b * (ALIEN_WIDTH + self.alienHSep)
+                     for b in range(self.cols))
+        rowy = tuple(self.height - self.alienCeiling - ALIEN_HEIGHT/2
+                     - (1+a) * (ALIEN_HEIGHT + self.alienVSep) for a in range(self.rows))
+        sources = []
+        pos = len(ALIEN_IMAGES)-1
+        image = ALIEN_IMAGES[pos]
+        for a in range(self.rows):
+            if ((self.rows - a)%2 == 0):
+                pos = pos - 1
+                if (pos == -1):
+                    pos = len(ALIEN_IMAGES) - 1
+                image = ALIEN_IMAGES[pos]
+            sources.append(image)
+        return {'stepTicks': int(self.speed * TICK_RATE) + 1, 'colx': colx, 'rowy': rowy,
+                'sources': tuple(sources), 'shipX': self.width/2,
+                'shipY': SHIP_BOTTOM + SHIP_HEIGHT/2}
+
+    def replace(self, **changes):
+        """
+        Returns a copy of this config with the settings in changes replaced
+
+        Raises ValueError if the new settings are not valid.
+
+        Parameter changes: the new value of each setting to change
+        Precondition: every key is the name of a setting
+        """
+        return dataclasses.replace(self, **changes)
+
+    def overrides(self):
+        """
+        Returns the settings that differ from the defaults [dict of str to
+        int or float]. GameConfig(**overrides()) is equal to this config.
+        """
+        result = {}
+        for field in settingFields():
+            value = getattr(self, field.name)
+            if (value != field.default):
+                result[field.name] = value
+        return result
+
+
+# the least value of every setting that has one
+_MINIMUMS = {'width': 1, 'height': 1, 'shipMovement': 1, 'shipLives': 1, 'defenseLine': 0,
+             'alienHSep': 0, 'alienVSep': 0, 'alienHWalk': 1, 'alienVWalk': 1,
+             'alienCeiling': 0, 'rows': 1, 'cols': 1, 'speed': 1e-9, 'boltSpeed': 1,
+             'boltRate': 1, 'volley': 1, 'shipBoltLimit': 1, 'spread': 1, 'spreadGap': 0}
+
+# the (least, greatest, description) of each classic argument, as the game always took them
+_CLASSIC_BOUNDS = {'rows': (1, 10, 'in 1..10'), 'cols': (1, 15, 'in 1..15'),
+                   'speed': (1e-9, 3, 'more than 0 and at most 3')}
+
+
+def settingFields():
+    """
+    Returns the dataclass fields of the settings of a GameConfig, in order
+    [list of dataclasses.Field]
+    """
+    return [field for field in dataclasses.fields(GameConfig) if field.init]
+
+
+def envName(name):
+    """
+    Returns the environment variable that sets the setting name, for
+    example INVADERS_SHIP_BOLT_LIMIT for shipBoltLimit
+
+    Parameter name: the setting
+    Precondition: name is the name of a setting of GameConfig
+    """
+    return CONFIG_ENV_PREFIX + re.sub('([A-Z])', r'_\1', name).upper()
+
+
+def _convert(field, value, where):
+    """
+    Returns value converted to the type of the setting field
+
+    Raises ValueError, saying where the value came from, if it cannot be.
+
+    Parameter field: the setting
+    Precondition: field is a dataclasses.Field of a setting
+
+    Parameter value: the value
+    Precondition: value is a str, int or float
+
+    Parameter where: where the value came from, for the error message
+    Precondition: where is a str
+    """
+    kind = int if field.type in (int, 'int') else float
+    try:
+        if (kind == int and isinstance(value, float)):
+            raise ValueError()
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError('%s: %s must be %s, not %r' % (where, field.name, kind.__name__, value))
+
+
+def loadConfig(argv=(), path=None, environ=None, base=None):
+    """
+    Returns the GameConfig given by base, the TOML file path, the
+    environment environ and the command line arguments argv, each one
+    overriding the ones before
+
+    Raises ValueError if a setting in the file, the environment or an option
+    is unknown, has the wrong type, or is out of range. A classic argument
+    that is wrong in one of these ways is ignored with a warning instead.
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a sequence of str
+
+    Parameter path: the TOML file, or None for CONFIG_FILE if it exists
+    (a --config=path argument takes precedence)
+    Precondition: path is a str or None
+
+    Parameter environ: the environment, or None for os.environ
+    Precondition: environ is a mapping of str to str or None
+
+    Parameter base: the config whose settings are overridden, or None for
+    the defaults
+    Precondition: base is a GameConfig or None
+    """
+    # argparse is only needed by entry points that read a command line
+    import argparse
+    fields = {field.name: field for field in settingFields()}
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--config', default=path)
+    parser.add_argument('classic', nargs='*', help='rows, aliens per row and speed')
+    for name in fields:
+        parser.add_argument('--' + name, dest=name, default=None)
+    args = parser.parse_args(list(argv))
+
+    values = {} if base == None else {name: getattr(base, name) for name in fields}
+    file = args.config
+    if (file == None and os.path.exists(CONFIG_FILE)):
+        file = CONFIG_FILE
+    if (file != None):
+        import tomllib
+        with open(file, 'rb') as handle:
+            table = tomllib.load(handle)
+        for name in table:
+            if (name not in fields):
+                raise ValueError('%s: unknown setting %r' % (file, name))
+            values[name] = _convert(fields[name], table[name], file)
+
+    environ = os.environ if environ == None else environ
+    for name in fields:
+        if (envName(name) in environ):
+            values[name] = _convert(fields[name], environ[envName(name)], envName(name))
+
+    if (len(args.classic) > 3):
+        warnings.warn('ignoring %r after rows, aliens per row and speed' % args.classic[3:],
+                      stacklevel=2)
+    for name, value in zip(('rows', 'cols', 'speed'), args.classic):
+        try:
+            trial = dict(values)
+            trial[name] = _convert(fields[name], value, 'command line')
+            least, greatest, bounds = _CLASSIC_BOUNDS[name]
+            if (not least <= trial[name] <= greatest):
+                raise ValueError('%s must be %s, not %r' % (name, bounds, trial[name]))
+            GameConfig(**trial)
+        except ValueError as error:
+            warnings.warn('ignoring %s: %s' % (name, error), stacklevel=2)
+            continue
+        values[name] = trial[name]
+    for name in fields:
+        if (getattr(args, name) != None):
+            values[name] = _convert(fields[name], getattr(args, name), 'command line')
+    return GameConfig(**values)
+
+
+# the config of a game with every setting at its default
+DEFAULT_CONFIG = GameConfig()
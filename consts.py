@@ -1,8 +1,10 @@
 """
 Constants for Alien Invaders
+
+Many of these constants are only the defaults of the settings of a
+GameConfig (see config.py), which is what the game actually reads; change
+them per game with a config instead of here.
 """
-import introcs
-import sys
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
 
@@ -20,7 +22,9 @@ SHIP_WIDTH    = 44
 SHIP_HEIGHT   = 44
 # the distance of the (bottom of the) ship from the bottom of the screen
 SHIP_BOTTOM   = 32
-# The number of pixels to move the ship per update
+# the image file for the ship
+SHIP_IMAGE    = 'ship.png'
+# The number of pixels to move the ship per tick
 SHIP_MOVEMENT = 10
 # The number of lives a ship has
 SHIP_LIVES    = 3
@@ -45,13 +49,13 @@ ALIEN_H_WALK  = ALIEN_WIDTH // 4
 ALIEN_V_WALK  = ALIEN_HEIGHT // 2
 # The distance of the top alien from the top of the window
 ALIEN_CEILING = 100
-# the number of rows of aliens, in range 1..10
+# the number of rows of aliens
 ALIEN_ROWS     = 5
 # the number of aliens per row
 ALIENS_IN_ROW  = 12
 # the image files for the aliens (bottom to top)
 ALIEN_IMAGES   = ('alien1.png','alien2.png','alien3.png')
-# the number of seconds (0 < float <= 1) between alien steps
+# the number of seconds between alien steps
 ALIEN_SPEED = 0.5
 
 
@@ -61,10 +65,71 @@ ALIEN_SPEED = 0.5
 BOLT_WIDTH  = 4
 # the height of a laser bolt
 BOLT_HEIGHT = 16
-# the number of pixels to move the bolt per update
+# the number of pixels to move the bolt per tick
 BOLT_SPEED = 13
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE  = 4
+# the number of bolts the aliens fire each time they fire, from random columns
+ALIEN_VOLLEY = 1
+# the number of bolts each side has room for before its bolt pool must grow
+BOLT_POOL_SIZE  = 64
+# the number of ship bolts allowed on screen at once (raise for rapid fire)
+SHIP_BOLT_LIMIT = 1
+# the number of bolts fired side by side in one shot (raise for spread shot)
+SHIP_SPREAD     = 1
+# the horizontal distance between the bolts of a spread shot
+SHIP_SPREAD_GAP = 12
+
+
+### TIMING CONSTANTS ###
+
+# the number of simulation ticks per second; the game is simulated in fixed
+# ticks no matter how often the screen refreshes
+TICK_RATE = 60
+# the number of seconds in one tick
+TICK      = 1/TICK_RATE
+# the most ticks run in one frame to catch up after a slow frame; any time
+# left over beyond that is dropped so the game slows down instead of stalling
+MAX_TICKS_PER_FRAME = 5
+
+
+### SOUND CONSTANTS ###
+
+# the sound played when the ship fires a bolt
+PEW_SOUND    = 'pew2.wav'
+# the sound played when an alien is destroyed
+BLAST_SOUND  = 'blast1.wav'
+# the sound played when the ship is destroyed
+BLAST2_SOUND = 'blast3.wav'
+# every sound file the game plays
+GAME_SOUNDS  = (PEW_SOUND, BLAST_SOUND, BLAST2_SOUND)
+# how important each sound is; when every voice is busy, a sound may take
+# the voice of a less important one
+SOUND_PRIORITY = {PEW_SOUND: 0, BLAST_SOUND: 1, BLAST2_SOUND: 2}
+# the least number of seconds between two starts of the same sound
+SOUND_MIN_GAP = 0.05
+# the number of sounds that can play at once
+AUDIO_VOICES = 4
+# the number of seconds a sound holds its voice
+AUDIO_VOICE_TIME = 0.3
+
+
+### LEVEL CONSTANTS ###
+
+# the alien speed of each level is this fraction of the one before
+LEVEL_SPEEDUP   = 0.8
+# the fewest seconds between alien steps on any level
+LEVEL_MIN_SPEED = 0.1
+# the number of pixels each level starts the formation lower than the one before
+LEVEL_DROP      = ALIEN_V_WALK
+# the least distance between a new formation and the defense line on any level
+LEVEL_CLEARANCE = 4 * ALIEN_V_WALK
+
+
+### REPLAY CONSTANTS ###
+
+# the file the replay of the last game is saved to when it ends
+REPLAY_FILE = 'last_replay.air'
 
 
 ### GAME CONSTANTS ###
@@ -83,36 +148,4 @@ STATE_CONTINUE = 4
 STATE_COMPLETE = 5
 
 
-### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW"""
-"""
-sys.argv is a list of the command line arguments when you run Python. These
-arguments are everything after the word python. So if you start the game typing
-
-    python invaders 3 4 0.5
-
-Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. Below, we take
-advantage of this fact to change the constants ALIEN_ROWS, ALIENS_IN_ROW, and
-ALIEN_SPEED.
-"""
-try:
-    rows = int(sys.argv[1])
-    if rows >= 1 and rows <= 10:
-        ALIEN_ROWS = rows
-except:
-    pass # Use original value
-
-try:
-    perrow = int(sys.argv[2])
-    if perrow >= 1 and perrow <= 15:
-        ALIENS_IN_ROW = perrow
-except:
-    pass # Use original value
-
-try:
-    speed = float(sys.argv[3])
-    if speed > 0 and speed <= 3:
-        ALIEN_SPEED = speed
-except:
-    pass # Use original value
-
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
@@ -0,0 +1,325 @@
+"""
+Gameplay event stream for Alien Invaders
+
+Wave and Invaders report what happens in a game (shots, kills, deaths,
+respawns, the formation reaching the line) to an EventBus as compact
+tuples (tick, kind, a, b, c), where the meaning of a, b and c depends on the
+kind (see EVENT_FIELDS). The bus is a ring buffer of fixed size: emitting an
+event is one list store, and never blocks or allocates beyond the tuple.
+
+Readers keep their own cursor, the number of events they have consumed, and
+catch up with read, the same way the renderer follows the kills of a
+formation. A reader that falls more than the size of the ring behind loses
+the oldest events, and is told how many.
+
+EventWriter is such a reader on a background thread: every
+EVENT_FLUSH_INTERVAL seconds it writes the new events in one batch to a
+JSONL or binary file, starting a new file when it grows past a size limit,
+so the frame loop never waits on I/O.
+"""
+from consts import *
+import json
+import os
+import struct
+import threading
+
+
+# the number of events the ring buffer of a bus holds
+EVENT_BUFFER = 4096
+# the seconds between two batches written by an EventWriter
+EVENT_FLUSH_INTERVAL = 0.5
+# the file that Invaders writes the events of a session to
+EVENT_FILE = 'events.jsonl'
+# the size in bytes past which an EventWriter starts a new file
+EVENT_FILE_BYTES = 1 << 20
+# the number of old files an EventWriter keeps, as events.1.jsonl,
+# events.2.jsonl, ... for events.jsonl (the number goes before the extension,
+# so that loadEvents still knows the format)
+EVENT_BACKUPS = 3
+
+# a wave started: its seed, level and lives
+EVENT_WAVE = 0
+# the ship fired: where from, and the number of bolts
+EVENT_SHOT = 1
+# an alien fired: where from
+EVENT_ALIEN_SHOT = 2
+# an alien was destroyed: its row and column, and the points scored
+EVENT_KILL = 3
+# the ship was destroyed: where, and the lives left
+EVENT_DEATH = 4
+# the ship respawned: the lives left
+EVENT_RESPAWN = 5
+# the formation reached the defense line: the bottom of the formation
+EVENT_LINE = 6
+# every alien of the wave was destroyed: the score
+EVENT_CLEAR = 7
+# the wave was restored to a checkpoint: the tick it went back to
+EVENT_RETRY = 8
+
+# the name of each kind of event, and the names of its values a, b and c
+EVENT_FIELDS = {
+    EVENT_WAVE:       ('wave', ('seed', 'level', 'lives')),
+    EVENT_SHOT:       ('shot', ('x', 'y', 'bolts')),
+    EVENT_ALIEN_SHOT: ('alienShot', ('x', 'y', None)),
+    EVENT_KILL:       ('kill', ('row', 'col', 'points')),
+    EVENT_DEATH:      ('death', ('x', 'lives', None)),
+    EVENT_RESPAWN:    ('respawn', ('lives', None, None)),
+    EVENT_LINE:       ('line', ('bottom', None, None)),
+    EVENT_CLEAR:      ('clear', ('score', None, None)),
+    EVENT_RETRY:      ('retry', ('tick', None, None)),
+}
+
+# the layout of an event in a binary file: sequence number, tick, kind, a, b, c
+EVENT_RECORD = struct.Struct('<QIBddd')
+
+
+class EventBus(object):
+    """
+    A class to hold the most recent gameplay events in a ring buffer.
+    INSTANCE ATTRIBUTES:
+        _size:  the number of events the ring holds [int > 0]
+        _ring:  the events, event number i in slot i % _size
+                [list of (tick, kind, a, b, c) or None]
+        _count: the number of events ever emitted [int >= 0]
+    """
+
+    def __init__(self, size=EVENT_BUFFER):
+        """
+        Initializes an empty bus
+
+        Parameter size: the number of events the ring holds
+        Precondition: size is an int > 0
+        """
+        self._size = size
+        self._ring = [None] * size
+        self._count = 0
+
+    def getCount(self):
+        """
+        Returns the number of events ever emitted, which is the cursor of a
+        reader that has seen them all
+        """
+        return self._count
+
+    def emit(self, kind, tick, a=0, b=0, c=0):
+        """
+        Adds an event, overwriting the oldest once the ring is full
+
+        Parameter kind: the kind of event
+        Precondition: kind is a key of EVENT_FIELDS
+
+        Parameter tick: the tick of the wave when it happened
+        Precondition: tick is an int >= 0
+
+        Parameter a, b, c: the values of the event, as named in EVENT_FIELDS
+        Precondition: a, b and c are ints or floats
+        """
+        self._ring[self._count % self._size] = (tick, kind, a, b, c)
+        # publish the event only once it is in its slot
+        self._count = self._count + 1
+
+    def read(self, cursor):
+        """
+        Returns (events, cursor, dropped): the events emitted since cursor as
+        a list of (seq, tick, kind, a, b, c) in order, the cursor to read from
+        next, and the number of events lost because the reader fell behind.
+
+        This may be called from another thread than the one emitting.
+
+        Parameter cursor: the number of events the reader has seen
+        Precondition: cursor is an int in 0..getCount()
+        """
+        end = self._count
+        start = max(cursor, end - self._size)
+        events = [(seq,) + self._ring[seq % self._size] for seq in range(start, end)]
+        # slots copied while the emitter lapped them may hold newer events
+        safe = self._count - self._size + 1
+        if (safe > start):
+            events = events[safe - start:]
+            start = safe
+        return events, end, start - cursor
+
+
+def toJSON(event):
+    """
+    Returns event as a line of JSON, with its values named [str]
+
+    Parameter event: the event
+    Precondition: event is a tuple (seq, tick, kind, a, b, c) returned by read
+    """
+    seq, tick, kind, a, b, c = event
+    name, fields = EVENT_FIELDS[kind]
+    record = {'seq': seq, 'tick': tick, 'event': name}
+    for field, value in zip(fields, (a, b, c)):
+        if (field != None):
+            record[field] = value
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+class EventWriter(object):
+    """
+    A class to write the events of a bus to files on a background thread.
+
+    The writer appends to its file, and when the file grows past maxBytes it
+    is renamed to file.1 (file.1 to file.2, and so on, keeping backups old
+    files) and a new one is started.
+    INSTANCE ATTRIBUTES:
+        _bus:      the bus being written [EventBus]
+        _path:     the file written to [str]
+        _binary:   True for records of EVENT_RECORD, False for JSONL [boolean]
+        _maxBytes: the size past which a new file is started [int > 0]
+        _backups:  the number of old files kept [int >= 0]
+        _interval: the seconds between batches [float > 0]
+        _cursor:   the events of the bus written so far [int >= 0]
+        _written:  the number of events written [int >= 0]
+        _dropped:  the number of events lost because the bus lapped the writer [int >= 0]
+        _batches:  the number of batches written [int >= 0]
+        _wake:     set to write a batch before the interval is up [threading.Event]
+        _stop:     set when the writer is closed [threading.Event]
+        _thread:   the writing thread [threading.Thread]
+    """
+
+    def __init__(self, bus, path=EVENT_FILE, binary=False, maxBytes=EVENT_FILE_BYTES,
+                 backups=EVENT_BACKUPS, interval=EVENT_FLUSH_INTERVAL):
+        """
+        Initializes a writer of the events of bus emitted from now on, and
+        starts its thread
+
+        Parameter bus: the bus to write
+        Precondition: bus is an EventBus
+
+        Parameter path: the file to write to
+        Precondition: path is a string
+
+        Parameter binary: whether to write records of EVENT_RECORD instead of JSONL
+        Precondition: binary is a boolean
+
+        Parameter maxBytes: the size past which a new file is started
+        Precondition: maxBytes is an int > 0
+
+        Parameter backups: the number of old files kept
+        Precondition: backups is an int >= 0
+
+        Parameter interval: the seconds between batches
+        Precondition: interval is an int or float > 0
+        """
+        self._bus = bus
+        self._path = path
+        self._binary = binary
+        self._maxBytes = maxBytes
+        self._backups = backups
+        self._interval = interval
+        self._cursor = bus.getCount()
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='events', daemon=True)
+        self._thread.start()
+
+    def getStats(self):
+        """
+        Returns the number of events 'written' and 'dropped', and of 'batches'
+        written, as a dict
+        """
+        return {'written': self._written, 'dropped': self._dropped, 'batches': self._batches}
+
+    def flush(self):
+        """
+        Asks the thread to write the events so far now rather than at the end
+        of the interval. This does not wait for the write.
+        """
+        self._wake.set()
+
+    def close(self):
+        """
+        Writes the remaining events and stops the thread, waiting for it
+        """
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        """
+        Writes a batch every interval until the writer is closed
+        """
+        while (not self._stop.is_set()):
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self._write()
+        self._write()
+
+    def _write(self):
+        """
+        Writes the events emitted since the last batch, if any, in one write
+        """
+        events, self._cursor, dropped = self._bus.read(self._cursor)
+        self._dropped = self._dropped + dropped
+        if (len(events) == 0):
+            return
+        if (self._binary):
+            data = b''.join(EVENT_RECORD.pack(*event) for event in events)
+        else:
+            data = ''.join(toJSON(event) for event in events).encode('utf-8')
+        if (os.path.exists(self._path) and os.path.getsize(self._path) + len(data) > self._maxBytes):
+            self._rotate()
+        with open(self._path, 'ab') as file:
+            file.write(data)
+        self._written = self._written + len(events)
+        self._batches = self._batches + 1
+
+    def _rotate(self):
+        """
+        Renames the file to backup 1, each older backup to the next number,
+        and deletes the oldest beyond the number of backups
+        """
+        for i in range(self._backups, 0, -1):
+            old = backupName(self._path, i)
+            if (i == self._backups and os.path.exists(old)):
+                os.remove(old)
+            elif (os.path.exists(old)):
+                os.replace(old, backupName(self._path, i + 1))
+        if (self._backups > 0):
+            os.replace(self._path, backupName(self._path, 1))
+        else:
+            os.remove(self._path)
+
+
+def backupName(path, number):
+    """
+    Returns the name an EventWriter gives the backup number of the file
+    path, with the number before the extension: events.2.jsonl for
+    events.jsonl [str]
+
+    Parameter path: the file written
+    Precondition: path is a string
+
+    Parameter number: the backup, 1 for the newest
+    Precondition: number is an int >= 1
+    """
+    root, extension = os.path.splitext(path)
+    return root + '.' + str(number) + extension
+
+
+def loadEvents(path):
+    """
+    Returns the events in the file path, written by an EventWriter, as a list
+    of (seq, tick, kind, a, b, c); a JSONL file is recognized by its .jsonl
+    extension
+
+    Parameter path: the file to read
+    Precondition: path is a string
+    """
+    if (path.endswith('.jsonl')):
+        events = []
+        with open(path) as file:
+            for line in file:
+                record = json.loads(line)
+                kind = [k for k in EVENT_FIELDS if EVENT_FIELDS[k][0] == record['event']][0]
+                values = [record.get(field, 0) for field in EVENT_FIELDS[kind][1]]
+                events.append((record['seq'], record['tick'], kind) + tuple(values))
+        return events
+    with open(path, 'rb') as file:
+        data = file.read()
+    return list(EVENT_RECORD.iter_unpack(data))
@@ -0,0 +1,219 @@
+"""
+Headless driver module for Alien Invaders
+
+Runs a Wave without a window, textures or audio. Input comes from a
+ScriptedInput, which stands in for GInput, and the game flow of Invaders
+(respawning the ship, ending on the line or on victory) is reproduced in
+runWave. The wave is stepped one fixed tick at a time, as fast as possible,
+with the script advancing once per tick. Nothing here imports game2d.
+"""
+from consts import *
+from wave import *
+
+
+# outcome of a wave where every alien was destroyed
+OUTCOME_WIN = 'win'
+# outcome of a wave where an alien reached the defense line
+OUTCOME_LINE = 'line'
+# outcome of a wave where the ship ran out of lives
+OUTCOME_DEAD = 'dead'
+# outcome of a wave stopped after the tick limit
+OUTCOME_TIMEOUT = 'timeout'
+
+
+class ScriptedInput(object):
+    """
+    A class that replaces GInput with a script of held keys.
+
+    The script is either a list with one collection of key names per tick
+    (the last entry is held once the list runs out), or a function
+    script(tick, wave) that returns the collection of keys held this tick.
+    INSTANCE ATTRIBUTES:
+        _script: the key script [list of collections of str, or callable]
+        _wave:   the wave handed to a callable script [Wave or None]
+        _tick:   the number of ticks advanced so far [int >= 0]
+        _keys:   the keys held in the current tick [frozenset of str]
+    """
+
+    def __init__(self, script=(), wave=None):
+        """
+        Initializes the input at tick 0
+
+        Parameter script: the key script
+        Precondition: script is a list of collections of str, or a callable
+
+        Parameter wave: the wave passed to a callable script
+        Precondition: wave is a Wave object or None
+        """
+        self._script = script
+        self._wave = wave
+        self._tick = 0
+        self._keys = frozenset()
+        self._load()
+
+    def setWave(self, wave):
+        """
+        Sets the wave handed to a callable script
+
+        Parameter wave: the wave passed to a callable script
+        Precondition: wave is a Wave object or None
+        """
+        self._wave = wave
+        self._load()
+
+    def getTick(self):
+        """
+        Returns the number of ticks advanced so far
+        """
+        return self._tick
+
+    @property
+    def key_count(self):
+        """
+        The number of keys currently held [int >= 0]
+        """
+        return len(self._keys)
+
+    def is_key_down(self, key):
+        """
+        Returns: True if key is held in the current tick
+
+        Parameter key: the key to check
+        Precondition: key is a string
+        """
+        return key in self._keys
+
+    def advance(self):
+        """
+        Moves the script on to the next tick
+        """
+        self._tick = self._tick + 1
+        self._load()
+
+    def _load(self):
+        """
+        Reads the keys held in the current tick from the script
+        """
+        if (callable(self._script)):
+            self._keys = frozenset(self._script(self._tick, self._wave))
+        elif (len(self._script) == 0):
+            self._keys = frozenset()
+        else:
+            tick = min(self._tick, len(self._script) - 1)
+            self._keys = frozenset(self._script[tick])
+
+
+def runWave(wave, input, ticks=100000):
+    """
+    Plays wave to the end the way Invaders would, and returns the result.
+
+    The ship is respawned as soon as it is destroyed while lives remain,
+    which is what happens in the app when the player presses 'F'.
+
+    Returns a dict with keys 'outcome' (one of OUTCOME_WIN, OUTCOME_LINE,
+    OUTCOME_DEAD, OUTCOME_TIMEOUT), 'score', 'lives' and 'ticks'.
+
+    Parameter wave: the wave to play
+    Precondition: wave is a Wave object
+
+    Parameter input: the input driving the ship
+    Precondition: input is a ScriptedInput
+
+    Parameter ticks: the maximum number of ticks to play
+    Precondition: ticks is an int >= 0
+    """
+    outcome = OUTCOME_TIMEOUT
+    count = 0
+    while (count < ticks):
+        wave.tick(input)
+        input.advance()
+        count = count + 1
+        if (wave.isBelowLine()):
+            outcome = OUTCOME_LINE
+            break
+        elif (wave.noAliensAlive()):
+            outcome = OUTCOME_WIN
+            break
+        elif (wave.getShip() == None):
+            if (wave.getLives() > 0):
+                wave.setShip(wave.createShip())
+            else:
+                outcome = OUTCOME_DEAD
+                break
+    return {'outcome': outcome, 'score': wave.getScore(),
+            'lives': wave.getLives(), 'ticks': count}
+
+
+### SCRIPTED PLAYER POLICIES ###
+# A policy is a function policy(tick, wave) returning the keys held on that
+# tick; pass it as the script of a ScriptedInput. Policies used with batch.py
+# must be defined at the top level of a module so they can be sent to worker
+# processes.
+
+def idlePolicy(tick, wave):
+    """
+    Returns no keys: the ship never moves or fires
+
+    Parameter tick: the current tick
+    Precondition: tick is an int >= 0
+
+    Parameter wave: the wave being played
+    Precondition: wave is a Wave object
+    """
+    return ()
+
+
+def sweepPolicy(tick, wave):
+    """
+    Returns keys that fire constantly while sweeping left and right in
+    stretches of uneven length
+
+    Parameter tick: the current tick
+    Precondition: tick is an int >= 0
+
+    Parameter wave: the wave being played
+    Precondition: wave is a Wave object
+    """
+    if ((tick // (37 + tick % 11)) % 2):
+        return ('spacebar', 'left')
+    return ('spacebar', 'right')
+
+
+def hunterPolicy(tick, wave):
+    """
+    Returns keys that move the ship under the nearest column of live aliens
+    and fire whenever it is there, stepping aside from alien bolts that are
+    about to land on it
+
+    Parameter tick: the current tick
+    Precondition: tick is an int >= 0
+
+    Parameter wave: the wave being played
+    Precondition: wave is a Wave object
+    """
+    ship = wave.getShip()
+    aliens = wave.getAliens()
+    if (ship == None or aliens.isEmpty()):
+        return ()
+    config = wave.getConfig()
+    bolts = wave.getAlienBolts()
+    for i in range(bolts.getCount()):
+        dx = bolts.getX(i) - ship.x
+        if (abs(dx) < SHIP_WIDTH and bolts.getY(i) < config.defenseLine + 4 * SHIP_HEIGHT):
+            if (dx > 0):
+                return ('left',)
+            return ('right',)
+    target = None
+    for col in aliens.liveColumns():
+        x = aliens.getX(col)
+        if (target == None or abs(x - ship.x) < abs(target - ship.x)):
+            target = x
+    if (target < ship.x - config.shipMovement/2):
+        return ('left',)
+    if (target > ship.x + config.shipMovement/2):
+        return ('right',)
+    return ('spacebar',)
+
+
+# the built-in policies, by name
+POLICIES = {'idle': idlePolicy, 'sweep': sweepPolicy, 'hunter': hunterPolicy}
@@ -0,0 +1,149 @@
+"""
+HUD module for Alien Invaders
+
+Building a GLabel lays out and rasterizes its text, which is one of the most
+expensive things in a frame. Hud hands out labels from a cache keyed by
+their content, and only builds a new lives/score label when the lives or
+score actually change. The cache is shared by every Hud in the process, so
+labels survive Invaders.start() when the player plays again.
+"""
+from consts import *
+from game2d import *
+from collections import OrderedDict
+
+
+# the most labels kept in the shared cache; the least recently used go first
+HUD_CACHE_SIZE = 32
+# the y coordinate of the lives/score label, as a fraction of the height
+HUD_STATUS_Y = .85
+# the y coordinate of the sound label, as a fraction of the height
+HUD_SOUND_Y = .92
+# the font size of the lives/score and sound labels
+HUD_FONT_SIZE = 25
+# the font size of the profiler overlay
+HUD_PROFILE_SIZE = 12
+# the number of frames the profiler overlay is kept before it is rebuilt
+HUD_PROFILE_FRAMES = 30
+
+# the labels built so far, keyed by (text, font_size, x, y)
+_labels = OrderedDict()
+
+
+def cachedLabel(text, size, x, y):
+    """
+    Returns a bold GLabel with the given text, font size and position,
+    building it only if an identical label is not already cached
+
+    Parameter text: the text of the label
+    Precondition: text is a string
+
+    Parameter size: the font size
+    Precondition: size is an int > 0
+
+    Parameter x: the x coordinate of the center of the label
+    Precondition: x is an int or float
+
+    Parameter y: the y coordinate of the center of the label
+    Precondition: y is an int or float
+    """
+    key = (text, size, x, y)
+    label = _labels.get(key)
+    if (label == None):
+        label = GLabel(text = text, font_size = size, bold = True, x = x, y = y)
+        _labels[key] = label
+        if (len(_labels) > HUD_CACHE_SIZE):
+            _labels.popitem(last = False)
+    else:
+        _labels.move_to_end(key)
+    return label
+
+
+class Hud(object):
+    """
+    A class to supply the labels drawn by Invaders.
+    INSTANCE ATTRIBUTES:
+        _width:     the width of the view [int > 0]
+        _height:    the height of the view [int > 0]
+        _status:    the current lives/score label [GLabel or None]
+        _statusKey: the (lives, score) shown by _status [tuple or None]
+        _profile:   the current profiler overlay [GLabel or None]
+        _profileAge: the number of frames _profile has been shown [int >= 0]
+    """
+
+    def __init__(self, width, height):
+        """
+        Initializes a Hud for a view of the given size, with no lives/score
+        label yet
+
+        Parameter width: the width of the view
+        Precondition: width is an int > 0
+
+        Parameter height: the height of the view
+        Precondition: height is an int > 0
+        """
+        self._width = width
+        self._height = height
+        self._status = None
+        self._statusKey = None
+        self._profile = None
+        self._profileAge = 0
+
+    def message(self, text, size):
+        """
+        Returns a label showing text in the middle of the screen
+
+        Parameter text: the message
+        Precondition: text is a string
+
+        Parameter size: the font size
+        Precondition: size is an int > 0
+        """
+        return cachedLabel(text, size, self._width/2, self._height/2)
+
+    def status(self, lives, score):
+        """
+        Returns the lives/score label, rebuilt only if lives or score changed
+        since the last call. Scores rarely repeat, so this label is not put in
+        the shared cache.
+
+        Parameter lives: the number of lives left
+        Precondition: lives is an int >= 0
+
+        Parameter score: the score
+        Precondition: score is an int >= 0
+        """
+        if (self._statusKey != (lives, score)):
+            self._statusKey = (lives, score)
+            self._status = GLabel(text = "Lives: "+str(lives)+'     Score: '+str(score),
+            font_size = HUD_FONT_SIZE, bold = True, x = self._width/2,
+            y = HUD_STATUS_Y*self._height)
+        return self._status
+
+    def sound(self, on):
+        """
+        Returns the label saying whether sound is on
+
+        Parameter on: True if sound is on
+        Precondition: on is a boolean
+        """
+        if (on):
+            text = "S to change sound\nSound is on"
+        else:
+            text = "S to change sound\nSound is off"
+        return cachedLabel(text, HUD_FONT_SIZE, self._width/2, HUD_SOUND_Y*self._height)
+
+    def profile(self, prof):
+        """
+        Returns the profiler overlay showing the report of prof. The report
+        changes every frame, so the label is only rebuilt every
+        HUD_PROFILE_FRAMES calls.
+
+        Parameter prof: the profiler to show
+        Precondition: prof is a Profiler object
+        """
+        if (self._profile == None or self._profileAge >= HUD_PROFILE_FRAMES):
+            self._profile = GLabel(text = prof.report(), font_size = HUD_PROFILE_SIZE,
+            left = 10, top = self._height - 10)
+            self._profileAge = 0
+        self._profileAge = self._profileAge + 1
+        return self._profile
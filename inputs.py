@@ -0,0 +1,284 @@
+"""
+Input sampling for Alien Invaders
+
+An InputSampler reads the keyboard once per frame into an InputSnapshot,
+which is frozen: the keys held, and the keys pressed and released since the
+previous snapshot. Everything that reacts to keys in that frame (Invaders,
+and every tick Wave.update runs in it) reads the same snapshot, so a key
+cannot be seen held by one check and released by the next, and a command
+such as toggling the sound acts once per press however long the key is held.
+
+A frame can run no tick at all, when the frame rate is above the tick rate,
+so a key that steers the ship (INPUT_SIMULATED) could be pressed and let go
+between two ticks without any tick seeing it. The sampler therefore latches
+such a press: until a tick has read a snapshot with the key in it, later
+snapshots report the key held (in latched) even if it is up again.
+
+The sampler goes through bindings, which name the game key each key of the
+keyboard drives. A snapshot only holds game keys (the names in
+INPUT_BINDINGS), and it has the GInput methods is_key_down and key_count,
+so Wave and Replay take it in place of GInput.
+
+The sampler also measures the latency of the keys that steer the ship,
+from when a key went down to the tick boundary of the first tick that
+simulated it: the moment of game time the tick stands for, which is what
+the player sees the ship react at. It is kept in the stats of the sampler,
+and in the profiler as the phase 'inputLatency'. The first tick boundary
+after a key goes down is at most one TICK away, so a press is late if its
+latency is longer than TICK. game2d does not say when a key went down, so
+unless the caller does, the sampler takes the previous frame, the earliest
+the key can have gone down unseen.
+
+Run this module to check the latency, on a simulated clock where keys go
+down at random times between frames, at frame rates that do and do not line
+up with the tick rate. With --stale the wave ticks on old snapshots, as a
+game that reads its input late would, and the check fails:
+
+    python inputs.py --fps=144
+    python inputs.py --fps=30 --stale=1
+"""
+from consts import *
+import dataclasses
+import profiler
+import random
+import time
+
+
+# the game key driven by each key of the keyboard
+INPUT_BINDINGS = {'left': 'left', 'right': 'right', 'spacebar': 'spacebar',
+                  's': 's', 'f': 'f', 'q': 'q', 'o': 'o', 'r': 'r', 'p': 'p'}
+# the game keys read by Wave.tick, whose latency is measured
+INPUT_SIMULATED = ('left', 'right', 'spacebar')
+
+
+@dataclasses.dataclass(frozen=True)
+class InputSnapshot(object):
+    """
+    A class to hold the game keys of one frame.
+    """
+    # the frame the snapshot was taken in
+    frame: int = 0
+    # when the snapshot was taken, in the seconds of the clock of its sampler
+    time: float = 0.0
+    # the game keys held
+    held: frozenset = frozenset()
+    # the game keys held now but not in the previous snapshot
+    pressed: frozenset = frozenset()
+    # the game keys held in the previous snapshot but not now
+    released: frozenset = frozenset()
+    # the game keys pressed in an earlier snapshot and up now, that no tick
+    # has read yet; they count as held
+    latched: frozenset = frozenset()
+
+    @property
+    def key_count(self):
+        """
+        The number of game keys held or latched [int >= 0]
+        """
+        return len(self.held | self.latched)
+
+    def is_key_down(self, key):
+        """
+        Returns: True if the game key is held or latched
+
+        Parameter key: the game key
+        Precondition: key is a string
+        """
+        return key in self.held or key in self.latched
+
+    def isPressed(self, key):
+        """
+        Returns: True if the game key went down since the previous snapshot
+
+        Parameter key: the game key
+        Precondition: key is a string
+        """
+        return key in self.pressed
+
+    def isReleased(self, key):
+        """
+        Returns: True if the game key went up since the previous snapshot
+
+        Parameter key: the game key
+        Precondition: key is a string
+        """
+        return key in self.released
+
+
+class InputSampler(object):
+    """
+    A class to take an InputSnapshot every frame and measure input latency.
+    INSTANCE ATTRIBUTES:
+        _bindings: the game key driven by each key of the keyboard [dict of str to str]
+        _clock:    returns the time in seconds [callable]
+        _last:     the latest snapshot [InputSnapshot]
+        _pending:  each INPUT_SIMULATED key pressed and not yet simulated, as
+                   a tuple (frame that saw it, when it went down) [dict of str to tuple]
+        _presses:  the number of latencies measured [int >= 0]
+        _total:    the sum of the latencies [float >= 0]
+        _worst:    the largest latency [float >= 0]
+        _late:     the number of latencies longer than TICK [int >= 0]
+    """
+
+    def __init__(self, bindings=INPUT_BINDINGS, clock=time.perf_counter):
+        """
+        Initializes a sampler with no key held
+
+        Parameter bindings: the game key driven by each key of the keyboard
+        Precondition: bindings is a dict of str to str
+
+        Parameter clock: returns the time in seconds
+        Precondition: clock is a callable with no arguments
+        """
+        self._bindings = dict(bindings)
+        self._clock = clock
+        self._last = InputSnapshot()
+        self._pending = {}
+        self._presses = 0
+        self._total = 0.0
+        self._worst = 0.0
+        self._late = 0
+
+    def getSnapshot(self):
+        """
+        Returns the latest snapshot [InputSnapshot]
+        """
+        return self._last
+
+    def getStats(self):
+        """
+        Returns the number of 'presses' measured, the mean and largest latency
+        in milliseconds ('meanMs' and 'maxMs'), and the number of presses
+        whose latency was longer than TICK ('late'), as a dict
+        """
+        return {'presses': self._presses, 'meanMs': 1000 * self._total / max(self._presses, 1),
+                'maxMs': 1000 * self._worst, 'late': self._late}
+
+    def sample(self, input, arrived=None):
+        """
+        Reads the keys of input once and returns them as the snapshot of this
+        frame [InputSnapshot]
+
+        Parameter input: the keyboard
+        Precondition: input has the GInput method is_key_down
+
+        Parameter arrived: when the keys pressed since the previous snapshot
+        went down, in the seconds of the clock, or None if it is not known
+        (then it is taken to be the previous snapshot)
+        Precondition: arrived is an int or float, or None
+        """
+        held = frozenset(self._bindings[key] for key in self._bindings if input.is_key_down(key))
+        last = self._last
+        now = self._clock()
+        latched = frozenset(key for key in self._pending if key not in held)
+        self._last = InputSnapshot(last.frame + 1, now, held, held - last.held,
+                                   last.held - held, latched)
+        if (arrived == None):
+            arrived = now if last.frame == 0 else last.time
+        for key in self._last.pressed:
+            if (key in INPUT_SIMULATED and key not in self._pending):
+                self._pending[key] = (self._last.frame, arrived)
+        return self._last
+
+    def simulated(self, snapshot, lag, dt):
+        """
+        Records the latency of every key pressed up to snapshot, and lets go
+        of the ones latched, now that Wave.update has run ticks on snapshot
+        in the frame of the latest snapshot
+
+        Parameter snapshot: the snapshot the ticks read
+        Precondition: snapshot is an InputSnapshot taken by this sampler
+
+        Parameter lag: the time the wave had left over from earlier frames
+        before the update, in seconds (Wave.getAlpha() * TICK)
+        Precondition: lag is an int or float >= 0
+
+        Parameter dt: the time passed to the update, in seconds
+        Precondition: dt is an int or float >= 0
+        """
+        if (len(self._pending) == 0):
+            return
+        # the update began lag + dt after the boundary of the last tick before
+        # it, so its first tick, the one that reacted, stands for one TICK later
+        boundary = self._last.time - lag - dt + TICK
+        prof = profiler.current
+        for key in list(self._pending):
+            frame, arrived = self._pending[key]
+            if (frame > snapshot.frame):
+                continue
+            del self._pending[key]
+            latency = max(0.0, boundary - arrived)
+            self._presses = self._presses + 1
+            self._total = self._total + latency
+            self._worst = max(self._worst, latency)
+            if (latency > TICK):
+                self._late = self._late + 1
+            if (prof != None):
+                prof.add('inputLatency', latency)
+
+    def forget(self):
+        """
+        Drops the keys pressed since the last simulated tick without measuring
+        or latching them, as when the wave is paused and no tick is waiting
+        for them
+        """
+        self._pending.clear()
+
+
+def main(argv):
+    """
+    Plays a headless wave at the frame rate in argv, on a simulated clock,
+    pressing and releasing the keys that steer the ship at random times
+    between frames, and prints the input latency. Returns the exit status:
+    1 if a press was simulated more than one tick late, else 0
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    import argparse
+    from headless import ScriptedInput, hunterPolicy
+    from wave import Wave
+    parser = argparse.ArgumentParser(prog='inputs.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--fps', type=float, default=144)
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stale', type=int, default=0,
+                        help='tick on the snapshot of this many frames before')
+    args = parser.parse_args(argv)
+
+    clock = [0.0]
+    sampler = InputSampler(clock=lambda: clock[0])
+    wave = Wave(args.seed)
+    keys = ScriptedInput(hunterPolicy, wave)
+    rng = random.Random(args.seed)
+    dt = 1 / args.fps
+    snapshots = []
+    for frame in range(args.frames):
+        if (wave.getShip() == None or wave.isBelowLine() or wave.noAliensAlive()):
+            if (wave.getLives() == 0 or wave.isBelowLine() or wave.noAliensAlive()):
+                wave = Wave(args.seed + frame)
+                keys.setWave(wave)
+            else:
+                wave.setShip(wave.createShip())
+            sampler.forget()
+        # the keys changed by the last ticks went down some time since the last frame
+        snapshots.append(sampler.sample(keys, clock[0] - rng.random() * dt))
+        snapshot = snapshots.pop(0) if len(snapshots) > args.stale else snapshots[0]
+        ticks = wave.getTicks()
+        lag = wave.getAlpha() * TICK
+        wave.update(snapshot, dt)
+        if (wave.getTicks() > ticks):
+            sampler.simulated(snapshot, lag, dt)
+        for t in range(wave.getTicks() - ticks):
+            keys.advance()
+        clock[0] = clock[0] + dt
+    stats = sampler.getStats()
+    print('%.0f fps: %d presses, mean %.2f ms, max %.2f ms, %d later than one tick (%.2f ms)'
+          % (args.fps, stats['presses'], stats['meanMs'], stats['maxMs'], stats['late'],
+             1000 * TICK))
+    return 1 if stats['late'] > 0 else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv[1:]))
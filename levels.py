@@ -0,0 +1,98 @@
+"""
+Level progression for Alien Invaders
+
+A game is a series of waves, one per level, and each level is harder than
+the one before: the aliens step more often, and the formation starts lower.
+levelConfig gives the settings of a level.
+
+WavePrebuilder builds the Wave of a level on a worker thread, so that it is
+ready by the time the player reaches it; moving on to the next level then
+only takes a finished Wave. The sprites for a wave are not built there:
+they belong to the window, and come from the asset cache on the main
+thread when the wave is shown.
+"""
+from consts import *
+from config import *
+from wave import *
+import concurrent.futures
+
+
+def levelConfig(config, level):
+    """
+    Returns the settings of the wave on level level of a game played with
+    config [GameConfig]
+
+    Each level divides the time between alien steps by LEVEL_SPEEDUP, down to
+    LEVEL_MIN_SPEED, and starts the formation LEVEL_DROP pixels lower, as
+    long as it stays LEVEL_CLEARANCE above the defense line.
+
+    Parameter config: the settings of the first level
+    Precondition: config is a GameConfig
+
+    Parameter level: the level
+    Precondition: level is an int >= 1
+    """
+    speed = config.speed * LEVEL_SPEEDUP ** (level - 1)
+    speed = min(config.speed, max(LEVEL_MIN_SPEED, speed))
+    room = config.rowy[-1] - ALIEN_HEIGHT/2 - config.defenseLine - LEVEL_CLEARANCE
+    drop = min(LEVEL_DROP * (level - 1), max(0, int(room)))
+    return config.replace(speed=speed, alienCeiling=config.alienCeiling + drop)
+
+
+class WavePrebuilder(object):
+    """
+    A class to build the waves of upcoming levels on a worker thread.
+    INSTANCE ATTRIBUTES:
+        _config:   the settings of the first level [GameConfig]
+        _executor: the worker thread [concurrent.futures.ThreadPoolExecutor]
+        _pending:  the wave of each level requested and not yet taken
+                   [dict of int to concurrent.futures.Future]
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        """
+        Initializes a prebuilder for a game played with config
+
+        Parameter config: the settings of the first level
+        Precondition: config is a GameConfig
+        """
+        self._config = config
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, 'prebuild')
+        self._pending = {}
+
+    def request(self, level):
+        """
+        Starts building the wave of level, unless it is already requested
+
+        Parameter level: the level
+        Precondition: level is an int >= 1
+        """
+        if (level not in self._pending):
+            self._pending[level] = self._executor.submit(Wave, None,
+                                                         levelConfig(self._config, level))
+
+    def take(self, level):
+        """
+        Returns the wave of level, waiting for it if it is still being built,
+        or building it now if it was never requested [Wave]
+
+        Parameter level: the level
+        Precondition: level is an int >= 1
+        """
+        future = self._pending.pop(level, None)
+        if (future == None):
+            return Wave(None, levelConfig(self._config, level))
+        return future.result()
+
+    def clear(self):
+        """
+        Drops every wave requested and not yet taken
+        """
+        self._pending = {}
+
+    def close(self):
+        """
+        Stops the worker thread once it has finished the wave it is building
+        """
+        self.clear()
+        self._executor.shutdown(wait=False)
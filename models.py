@@ -1,120 +1,971 @@
 """
 Models module for Alien Invaders
+
+The models are plain state objects with no dependency on game2d, so that a
+Wave can be simulated headless. The sprites that display them on screen are
+built by the renderer module.
 """
 from consts import *
-from game2d import *
+import math
+import numpy as np
+
+# below this many boxes, testing them one at a time beats a NumPy batch
+BATCH_MIN = 24
+# below this many bolts, moving them one at a time beats a NumPy ufunc, which
+# also allocates about 1 KB of bookkeeping when it adds to a single element
+MOVE_BATCH_MIN = 4
+
+
+class Hitbox(object):
+    """
+    A class to represent the axis-aligned bounds of a ship, alien or bolt.
+
+    Two boxes collide when their interiors overlap, so boxes that only touch
+    do not. A bolt is narrower and shorter than a ship or an alien, so this is
+    the same as asking whether a corner of the bolt lies strictly inside the
+    other object, which is what the four game2d contains() probes checked.
+    The bounds are only recomputed by moveTo, when the object moves.
+
+    Bolts only move vertically, so a bolt is tested over its whole move in a
+    tick with sweep, which finds when the bolt enters the box on its way from
+    its previous to its current position. A bolt then cannot pass through a
+    box in one tick, however fast it moves. A bolt that already overlaps the
+    box where it starts was tested there in the tick before, so the box can
+    only have moved onto it since; it only counts if it still overlaps where
+    it ends, as it did before bolts were swept.
+    INSTANCE ATTRIBUTES:
+        width:  the width of the box [int or float > 0]
+        height: the height of the box [int or float > 0]
+        x:      the x coordinate of the center of the box [int or float]
+        y:      the y coordinate of the center of the box [int or float]
+        left:   the x coordinate of the left edge [int or float]
+        right:  the x coordinate of the right edge [int or float]
+        bottom: the y coordinate of the bottom edge [int or float]
+        top:    the y coordinate of the top edge [int or float]
+    """
+
+    def __init__(self, x, y, width, height):
+        """
+        Initializes a Hitbox centered at (x, y)
+
+        Parameter x: the x coordinate of the center
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center
+        Precondition: y is an int or float
+
+        Parameter width: the width of the box
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of the box
+        Precondition: height is an int or float > 0
+        """
+        self.width = width
+        self.height = height
+        self.moveTo(x, y)
+
+    def moveTo(self, x, y):
+        """
+        Moves the box so that it is centered at (x, y)
+
+        Parameter x: the x coordinate of the center
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center
+        Precondition: y is an int or float
+        """
+        self.x = x
+        self.y = y
+        self.left = x - self.width/2
+        self.right = x + self.width/2
+        self.bottom = y - self.height/2
+        self.top = y + self.height/2
+
+    def overlaps(self, x, y, width, height):
+        """
+        Returns: True if this box overlaps the box of size width x height
+        centered at (x, y)
+
+        Parameter x: the x coordinate of the center of the other box
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center of the other box
+        Precondition: y is an int or float
+
+        Parameter width: the width of the other box
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of the other box
+        Precondition: height is an int or float > 0
+        """
+        return (x - width/2 < self.right and self.left < x + width/2
+                and y - height/2 < self.top and self.bottom < y + height/2)
+
+    def overlapsAll(self, xs, ys, width, height):
+        """
+        Returns a bool array saying which of many boxes of size width x height
+        overlap this box, all tested at once
+
+        Parameter xs: the x coordinates of the centers of the other boxes
+        Precondition: xs is a float array
+
+        Parameter ys: the y coordinates of the centers of the other boxes
+        Precondition: ys is a float array with the same shape as xs
+
+        Parameter width: the width of every other box
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of every other box
+        Precondition: height is an int or float > 0
+        """
+        return ((np.abs(xs - self.x) < (self.width + width)/2)
+                & (np.abs(ys - self.y) < (self.height + height)/2))
+
+    def sweep(self, x, y0, y1, width, height):
+        """
+        Returns how far, as a fraction of its move, a box of size width x
+        height centered at x moves from y0 towards y1 before it enters this
+        box, or None if it does not enter it on the way. The fraction is 0 if
+        the box overlaps at both y0 and y1, and a box that overlaps at y0 but
+        not at y1 does not count.
+
+        Parameter x: the x coordinate of the center of the other box
+        Precondition: x is an int or float
+
+        Parameter y0: the y coordinate of the center of the other box before its move
+        Precondition: y0 is an int or float
+
+        Parameter y1: the y coordinate of the center of the other box after its move
+        Precondition: y1 is an int or float
+
+        Parameter width: the width of the other box
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of the other box
+        Precondition: height is an int or float > 0
+        """
+        low = self.bottom - height/2
+        high = self.top + height/2
+        if (not (x - width/2 < self.right and self.left < x + width/2
+                 and min(y0, y1) < high and low < max(y0, y1))):
+            return None
+        if (low < y0 and y0 < high):
+            return 0.0 if low < y1 and y1 < high else None
+        edge = low if y1 > y0 else high
+        return (edge - y0) / (y1 - y0)
+
+    def sweepAll(self, xs, y0s, y1s, width, height, out, spare, masks):
+        """
+        Returns sweep for many boxes of size width x height at once, as a
+        float array that is infinite for the boxes that do not overlap this one
+
+        The result is computed in out, with spare and masks as scratch space,
+        so a caller that keeps these arrays allocates no array per call.
+
+        Parameter xs: the x coordinates of the centers of the other boxes
+        Precondition: xs is a float array
+
+        Parameter y0s: the y coordinates of the centers of the other boxes before their move
+        Precondition: y0s is a float array with the same shape as xs
+
+        Parameter y1s: the y coordinates of the centers of the other boxes after their move
+        Precondition: y1s is a float array with the same shape as xs, and no
+        box ends where it starts
+
+        Parameter width: the width of every other box
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of every other box
+        Precondition: height is an int or float > 0
+
+        Parameter out: the array to write the result to
+        Precondition: out is a float array with the same shape as xs
+
+        Parameter spare: scratch space
+        Precondition: spare is a float array with the same shape as xs
+
+        Parameter masks: scratch space
+        Precondition: masks is a bool array of shape (3,) + xs.shape
+
+        None of out, spare and masks may share memory with xs, y0s or y1s.
+        """
+        low = self.bottom - height/2
+        high = self.top + height/2
+        hits, start, temp = masks
+        # hits: the boxes that overlap this one somewhere on their move
+        np.subtract(xs, self.x, out=out)
+        np.abs(out, out=out)
+        np.less(out, (self.width + width)/2, out=hits)
+        np.minimum(y0s, y1s, out=out)
+        np.less(out, high, out=temp)
+        np.logical_and(hits, temp, out=hits)
+        np.maximum(y0s, y1s, out=out)
+        np.less(low, out, out=temp)
+        np.logical_and(hits, temp, out=hits)
+        # a box that starts inside this one only hits if it ends inside too
+        np.less(low, y0s, out=start)
+        np.less(y0s, high, out=temp)
+        np.logical_and(start, temp, out=start)
+        np.less_equal(y1s, low, out=temp)
+        np.logical_and(temp, start, out=temp)
+        np.logical_not(temp, out=temp)
+        np.logical_and(hits, temp, out=hits)
+        np.greater_equal(y1s, high, out=temp)
+        np.logical_and(temp, start, out=temp)
+        np.logical_not(temp, out=temp)
+        np.logical_and(hits, temp, out=hits)
+        # the time each box crosses the edge it enters by, then 0 for the
+        # boxes that start inside and infinity for those that miss
+        np.subtract(low, y0s, out=out)
+        np.subtract(high, y0s, out=spare)
+        np.less_equal(y1s, y0s, out=temp)
+        np.copyto(out, spare, where=temp)
+        np.subtract(y1s, y0s, out=spare)
+        np.divide(out, spare, out=out)
+        np.logical_and(start, hits, out=start)
+        spare.fill(0.0)
+        np.copyto(out, spare, where=start)
+        np.logical_not(hits, out=temp)
+        spare.fill(np.inf)
+        np.copyto(out, spare, where=temp)
+        return out
 
 
-class Ship(GImage):
+class Ship(object):
     """
     A class to represent the game ship.
+    INSTANCE ATTRIBUTES:
+        x:      the x coordinate of the center of the ship [int or float]
+        y:      the y coordinate of the center of the ship [int or float]
+        width:  the width of the ship [int or float > 0]
+        height: the height of the ship [int or float > 0]
+        source: the image file used to draw the ship [str]
+        prevX:  the x coordinate of the center of the ship before the last tick,
+                used to interpolate its position when drawing [int or float]
+        _box:   the bounds of the ship, updated whenever x or y changes [Hitbox]
     """
     def __init__(self, x1, y1, source1):
         """
-        Initializes GImage object representing a Ship with x position x1, y position y1,
-        width of SHIP_WIDTH, height SHIP_HEIGHT, and a source of source1
+        Initializes a Ship with x position x1, y position y1, width of
+        SHIP_WIDTH, height SHIP_HEIGHT, and a source of source1
 
-        Parameter x1: x position to assign to GImage object
+        Parameter x1: x position to assign to the Ship
         Precondition: x1 is an int or float >= 0
 
-        Parameter y1: y position to assign to GImage object
+        Parameter y1: y position to assign to the Ship
         Precondition: y1 is an int or float >= 0
 
-        Parameter source1: source to assign to GImage object
+        Parameter source1: source to assign to the Ship
         Precondition: source1 is a string corresponding to a png file in file directory
         """
+        self.width = SHIP_WIDTH
+        self.height = SHIP_HEIGHT
+        self.source = source1
+        self._box = Hitbox(x1, y1, SHIP_WIDTH, SHIP_HEIGHT)
+        self.prevX = x1
+
+    @property
+    def x(self):
+        """
+        The x coordinate of the center of the ship [int or float]
+        """
+        return self._box.x
+
+    @x.setter
+    def x(self, value):
+        self._box.moveTo(value, self._box.y)
+
+    @property
+    def y(self):
+        """
+        The y coordinate of the center of the ship [int or float]
+        """
+        return self._box.y
 
-        GImage.__init__(self, x = x1, y = y1, width = SHIP_WIDTH, height = SHIP_HEIGHT, source = source1)
+    @y.setter
+    def y(self, value):
+        self._box.moveTo(self._box.x, value)
 
-    def collides(self,bolt):
+    def getHitbox(self):
+        """
+        Returns the bounds of the ship [Hitbox]
         """
-        Returns: True if the bolt was fired by alien and collides with the ship
+        return self._box
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
+    def collides(self, x, y, fromY=None):
         """
-        if (bolt != None and bolt.getVelocity() > 0):
-            return False
-        a = self.contains((bolt.x + BOLT_WIDTH/2, bolt.y - BOLT_HEIGHT/2))
-        aa = self.contains((bolt.x + BOLT_WIDTH/2, bolt.y + BOLT_HEIGHT/2))
-        aaa = self.contains((bolt.x - BOLT_WIDTH/2, bolt.y - BOLT_HEIGHT/2))
-        aaaa = self.contains((bolt.x - BOLT_WIDTH/2, bolt.y + BOLT_HEIGHT/2))
-        return a or aa or aaa or aaaa
+        Returns: True if an alien bolt centered at (x, y) enters the ship on
+        its move from (x, fromY), as with Hitbox.sweep
 
+        Parameter x: the x coordinate of the center of the bolt
+        Precondition: x is an int or float
 
-class Alien(GImage):
+        Parameter y: the y coordinate of the center of the bolt
+        Precondition: y is an int or float
+
+        Parameter fromY: the y coordinate of the center of the bolt before its
+        move, or None to only test the bolt where it is
+        Precondition: fromY is an int or float, or None
+        """
+        start = y if fromY == None else fromY
+        return self._box.sweep(x, start, y, BOLT_WIDTH, BOLT_HEIGHT) != None
+
+
+class Formation(object):
     """
-    A class to represent a single alien.
+    A class to represent the whole grid of aliens as NumPy arrays.
+
+    The aliens always march together, so the formation is stored as a
+    structure of arrays: one x coordinate per column, one y coordinate per
+    row, and a boolean alive mask with one entry per alien. The alien in row r
+    and column c is centered at (getX(c), getY(r)). Row 0 is the top row.
+
+    Live counts per row and per column, the extreme live columns, the lowest
+    live row and the lowest live alien of every column are kept up to date by
+    kill, so the bounds and end-of-wave checks never scan the grid. A search
+    only happens when a column or row empties, and each one can empty once,
+    so the total work over a whole wave is O(rows + cols).
+
+    A copy shares every array and list with the formation it was copied
+    from until one of the two marches or loses an alien, and only then
+    copies them, so copying a formation costs the same whatever its size.
+    INSTANCE ATTRIBUTES:
+        width:   the width of an alien [int or float > 0]
+        height:  the height of an alien [int or float > 0]
+        _colx:   the x coordinate of the center of each column
+                 [float array of shape (cols,)]
+        _rowy:   the y coordinate of the center of each row
+                 [float array of shape (rows,)]
+        _alive:  which aliens are still alive [bool array of shape (rows, cols)]
+        _sources: the image file for each row [list of str, one per row]
+        _hpitch:  the distance between the centers of neighboring columns
+                  [float > 0, infinite if there is only one column]
+        _vpitch:  the distance between the centers of neighboring rows
+                  [float > 0, infinite if there is only one row]
+        _live:     the number of live aliens [int >= 0]
+        _rowCount: the number of live aliens in each row [int array of shape (rows,)]
+        _colCount: the number of live aliens in each column [int array of shape (cols,)]
+        _colLow:   the row of the lowest live alien in each column, or -1 if
+                   the column is empty [int array of shape (cols,)]
+        _liveCols: the columns with at least one live alien, in order [list of int]
+        _leftCol:  the leftmost column with a live alien [int]
+        _rightCol: the rightmost column with a live alien [int]
+        _lowRow:   the lowest row with a live alien [int]
+        _kills:    every alien killed so far, in order, so that observers such
+                   as the renderer can catch up from where they left off
+                   [list of (row, col)]
+        _moves:    the number of times the formation has marched [int >= 0]
+        _shared:   True if the arrays and lists may be shared with a copy, and
+                   must be copied before they change [boolean]
     """
 
-    def __init__(self, x1, y1, source1):
+    def __init__(self, colx, rowy, sources):
         """
-        Initializes GImage object representing an Alien with x position x1, y position y1,
-        width of ALIEN_WIDTH, height ALIEN_HEIGHT, and a source of source1
+        Initializes a Formation with every alien alive
 
-        Parameter x1: x position to assign to GImage object
-        Precondition: x1 is an int or float >= 0
+        Parameter colx: the x coordinate of the center of each column
+        Precondition: colx is a non-empty sequence of ints or floats, evenly
+        spaced left to right, more than ALIEN_WIDTH apart
 
-        Parameter y1: y position to assign to GImage object
-        Precondition: y1 is an int or float >= 0
+        Parameter rowy: the y coordinate of the center of each row
+        Precondition: rowy is a non-empty sequence of ints or floats, evenly
+        spaced top to bottom, more than ALIEN_HEIGHT apart
 
-        Parameter source1: source to assign to GImage object
-        Precondition: source1 is a string corresponding to a png file in file directory
+        Parameter sources: the image file used for each row
+        Precondition: sources is a list of str with one entry per row
+        """
+        self.width = ALIEN_WIDTH
+        self.height = ALIEN_HEIGHT
+        self._colx = np.array(colx, dtype=float)
+        self._rowy = np.array(rowy, dtype=float)
+        self._alive = np.ones((len(rowy), len(colx)), dtype=bool)
+        self._sources = list(sources)
+        self._hpitch = float('inf')
+        if (len(colx) > 1):
+            self._hpitch = float(self._colx[-1] - self._colx[0]) / (len(colx) - 1)
+        self._vpitch = float('inf')
+        if (len(rowy) > 1):
+            self._vpitch = float(self._rowy[0] - self._rowy[-1]) / (len(rowy) - 1)
+        self._live = self._alive.size
+        self._rowCount = np.full(len(rowy), len(colx), dtype=int)
+        self._colCount = np.full(len(colx), len(rowy), dtype=int)
+        self._colLow = np.full(len(colx), len(rowy) - 1, dtype=int)
+        self._liveCols = list(range(len(colx)))
+        self._leftCol = 0
+        self._rightCol = len(colx) - 1
+        self._lowRow = len(rowy) - 1
+        self._kills = []
+        self._moves = 0
+        self._shared = False
+
+    def copy(self):
+        """
+        Returns a copy of this formation, sharing its state until either one
+        changes [Formation]
+        """
+        other = object.__new__(Formation)
+        other.__dict__.update(self.__dict__)
+        self._shared = True
+        other._shared = True
+        return other
+
+    def _own(self):
+        """
+        Copies every array and list this formation may share with a copy
+        """
+        self._colx = self._colx.copy()
+        self._rowy = self._rowy.copy()
+        self._alive = self._alive.copy()
+        self._rowCount = self._rowCount.copy()
+        self._colCount = self._colCount.copy()
+        self._colLow = self._colLow.copy()
+        self._liveCols = list(self._liveCols)
+        self._kills = list(self._kills)
+        self._shared = False
+
+    def packAlive(self):
+        """
+        Returns the alive mask packed eight aliens to a byte, in row-major
+        order [bytes]
+        """
+        return np.packbits(self._alive).tobytes()
+
+    def restore(self, bits, dx, dy, moves):
+        """
+        Kills every alien that is dead in the packed mask bits and marches the
+        formation by (dx, dy), as if it had marched moves times
+
+        Parameter bits: the alive mask, as returned by packAlive
+        Precondition: bits is a bytes object for a formation of this size
+
+        Parameter dx: the horizontal distance from the starting position
+        Precondition: dx is an int or float
+
+        Parameter dy: the vertical distance from the starting position
+        Precondition: dy is an int or float
+
+        Parameter moves: the number of marches
+        Precondition: moves is an int >= 0, and this formation is new
+        """
+        alive = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=self._alive.size)
+        for i in np.flatnonzero(alive == 0).tolist():
+            self.kill(*divmod(i, len(self._colx)))
+        self.march(dx, dy)
+        self._moves = moves
+
+    def getRows(self):
+        """
+        Returns the number of rows in the formation
+        """
+        return len(self._rowy)
+
+    def getCols(self):
         """
-        GImage.__init__(self, x = x1, y = y1, width = ALIEN_WIDTH, height = ALIEN_HEIGHT, source = source1)
+        Returns the number of columns in the formation
+        """
+        return len(self._colx)
+
+    def getX(self, col):
+        """
+        Returns the x coordinate of the center of the aliens in column col
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return self._colx.item(col)
+
+    def getY(self, row):
+        """
+        Returns the y coordinate of the center of the aliens in row row
 
-    def collides(self,bolt):
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
         """
-        Returns: True if the bolt was fired by the player and collides with this alien
+        return self._rowy.item(row)
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
+    def getSource(self, row):
         """
-        if (bolt != None and bolt.getVelocity() < 0):
-            return False
-        a = self.contains((bolt.x + BOLT_WIDTH/2, bolt.y - BOLT_HEIGHT/2))
-        aa = self.contains((bolt.x + BOLT_WIDTH/2, bolt.y + BOLT_HEIGHT/2))
-        aaa = self.contains((bolt.x - BOLT_WIDTH/2, bolt.y - BOLT_HEIGHT/2))
-        aaaa = self.contains((bolt.x - BOLT_WIDTH/2, bolt.y + BOLT_HEIGHT/2))
-        return a or aa or aaa or aaaa
+        Returns the image file for the aliens in row row
 
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
+        """
+        return self._sources[row]
+
+    def isAlive(self, row, col):
+        """
+        Returns: True if the alien in row row and column col is alive
+
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
 
-class Bolt(GRectangle):
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return bool(self._alive[row, col])
+
+    def getAlive(self):
+        """
+        Returns a read-only view of the alive mask [bool array of shape (rows, cols)]
+        """
+        view = self._alive.view()
+        view.flags.writeable = False
+        return view
+
+    def march(self, dx, dy):
+        """
+        Moves every alien dx pixels horizontally and dy pixels vertically
+
+        Parameter dx: the horizontal distance
+        Precondition: dx is an int or float
+
+        Parameter dy: the vertical distance
+        Precondition: dy is an int or float
+        """
+        if (self._shared):
+            self._own()
+        self._colx += dx
+        self._rowy += dy
+        self._moves = self._moves + 1
+
+    def kill(self, row, col):
+        """
+        Destroys the alien in row row and column col, if it is alive, and
+        updates the counts and bounds of the formation
+
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        if (not self._alive[row, col]):
+            return
+        if (self._shared):
+            self._own()
+        self._alive[row, col] = False
+        self._kills.append((row, col))
+        self._live = self._live - 1
+        self._rowCount[row] -= 1
+        self._colCount[col] -= 1
+        if (self._live == 0):
+            self._colLow[col] = -1
+            self._liveCols = []
+            return
+
+        if (self._colCount[col] == 0):
+            self._colLow[col] = -1
+            self._liveCols.remove(col)
+            while (self._colCount[self._leftCol] == 0):
+                self._leftCol = self._leftCol + 1
+            while (self._colCount[self._rightCol] == 0):
+                self._rightCol = self._rightCol - 1
+        elif (self._colLow[col] == row):
+            low = row - 1
+            while (not self._alive[low, col]):
+                low = low - 1
+            self._colLow[col] = low
+
+        while (self._rowCount[self._lowRow] == 0):
+            self._lowRow = self._lowRow - 1
+
+    def getKills(self):
+        """
+        Returns every alien killed so far, in order [list of (row, col)]
+
+        The list belongs to the formation and must not be modified.
+        """
+        return self._kills
+
+    def getMoves(self):
+        """
+        Returns the number of times the formation has marched
+        """
+        return self._moves
+
+    def getCount(self):
+        """
+        Returns the number of live aliens
+        """
+        return self._live
+
+    def isEmpty(self):
+        """
+        Returns: True if every alien has been destroyed
+        """
+        return self._live == 0
+
+    def liveColumns(self):
+        """
+        Returns the columns with at least one live alien, in order [list of int]
+
+        The list belongs to the formation and must not be modified.
+        """
+        return self._liveCols
+
+    def right(self):
+        """
+        Returns the x coordinate of the right edge of the rightmost live alien,
+        or None if every alien has been destroyed
+        """
+        if (self._live == 0):
+            return None
+        return float(self._colx[self._rightCol]) + self.width/2
+
+    def left(self):
+        """
+        Returns the x coordinate of the left edge of the leftmost live alien,
+        or None if every alien has been destroyed
+        """
+        if (self._live == 0):
+            return None
+        return float(self._colx[self._leftCol]) - self.width/2
+
+    def bottom(self):
+        """
+        Returns the y coordinate of the bottom edge of the lowest live alien,
+        or None if every alien has been destroyed
+        """
+        if (self._live == 0):
+            return None
+        return float(self._rowy[self._lowRow]) - self.height/2
+
+    def lowestInColumn(self, col):
+        """
+        Returns the row of the lowest live alien in column col, or None if the
+        column is empty
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        row = int(self._colLow[col])
+        if (row < 0):
+            return None
+        return row
+
+    def columnAt(self, x):
+        """
+        Returns the column whose aliens contain the x coordinate x, or None if x
+        falls in a gap or outside the formation
+
+        Since columns are evenly spaced and wider apart than an alien, only the
+        nearest column can contain x, and it is found by arithmetic.
+
+        Parameter x: the x coordinate
+        Precondition: x is an int or float
+        """
+        col = round((x - self._colx.item(0)) / self._hpitch)
+        if (col < 0 or col >= len(self._colx)):
+            return None
+        if (abs(x - self._colx.item(col)) < self.width/2):
+            return col
+        return None
+
+    def rowAt(self, y):
+        """
+        Returns the row whose aliens contain the y coordinate y, or None if y
+        falls in a gap or outside the formation
+
+        Parameter y: the y coordinate
+        Precondition: y is an int or float
+        """
+        row = round((self._rowy.item(0) - y) / self._vpitch)
+        if (row < 0 or row >= len(self._rowy)):
+            return None
+        if (abs(y - self._rowy.item(row)) < self.height/2):
+            return row
+        return None
+
+    def hit(self, x, y, fromY=None):
+        """
+        Returns the (row, col) of the first live alien that the bolt centered
+        at (x, y) enters on its move from (x, fromY), or None if it enters
+        none. The first alien is the one in the row the bolt reaches first,
+        and the left one if the bolt straddles two columns. As with
+        Hitbox.sweep, a row the bolt overlaps where it starts only counts if
+        it also overlaps it where it ends.
+
+        As with a Hitbox, a bolt that only touches an alien does not count. A
+        side of the bolt lies in at most one column of the grid, which
+        columnAt finds by arithmetic, and the rows the move crosses are found
+        the same way, so the cells checked depend on how far the bolt moves
+        and not on how large the formation is.
+
+        Parameter x: the x coordinate of the center of the bolt
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center of the bolt
+        Precondition: y is an int or float
+
+        Parameter fromY: the y coordinate of the center of the bolt before its
+        move, or None to only test the bolt where it is
+        Precondition: fromY is an int or float or None
+        """
+        if (self._live == 0):
+            return None
+        if (fromY == None):
+            fromY = y
+        low = min(y, fromY) - BOLT_HEIGHT/2
+        high = max(y, fromY) + BOLT_HEIGHT/2
+        top = self._rowy.item(0)
+        if (high <= self._rowy.item(-1) - self.height/2 or top + self.height/2 <= low):
+            return None
+        first = max(math.floor((top - self.height/2 - high) / self._vpitch), 0)
+        last = min(math.ceil((top + self.height/2 - low) / self._vpitch), len(self._rowy) - 1)
+        if (first > last):
+            return None
+        left = self.columnAt(x - BOLT_WIDTH/2)
+        right = self.columnAt(x + BOLT_WIDTH/2)
+        if (left == None and right == None):
+            return None
+        rows = range(first, last + 1)
+        if (y > fromY):
+            rows = reversed(rows)
+        for row in rows:
+            center = self._rowy.item(row)
+            bottom = center - self.height/2
+            top = center + self.height/2
+            if (bottom < high and low < top and
+                (not (bottom < fromY + BOLT_HEIGHT/2 and fromY - BOLT_HEIGHT/2 < top)
+                 or (bottom < y + BOLT_HEIGHT/2 and y - BOLT_HEIGHT/2 < top))):
+                for col in (left, right):
+                    if (col != None and self._alive[row, col]):
+                        return (row, col)
+        return None
+
+
+class BoltPool(object):
     """
-    A class representing a laser bolt.
+    A class representing the laser bolts fired by one side (the ship or the
+    aliens).
+
+    Every bolt of a side moves at the same velocity, so the pool only stores
+    the center of each bolt, in preallocated NumPy arrays. Bolts 0..getCount()-1
+    are live. Removing a bolt moves the last live bolt into its slot, so it
+    is O(1) but does not keep the order of the bolts; loops that remove bolts
+    therefore walk the pool backwards. The arrays only grow (by doubling) when
+    more bolts are live than ever before, so firing and removing bolts in
+    steady state allocates nothing. findHit and cull work in scratch arrays
+    that grow with the pool, so they allocate no array either.
     INSTANCE ATTRIBUTES:
-        _velocity: The velocity in y direction [int or float]
+        width:     the width of a bolt [int or float > 0]
+        height:    the height of a bolt [int or float > 0]
+        _velocity: the velocity in y direction of every bolt [int or float]
+        _step:     _velocity, as a 0-d float array that ufuncs take without
+                   converting it every call [float array]
+        _x:        the x coordinate of the center of each slot [float array]
+        _y:        the y coordinate of the center of each slot [float array]
+        _count:    the number of live bolts [int >= 0]
+        _floats:   scratch space for findHit [float array of shape (3, slots)]
+        _masks:    scratch space for findHit and cull [bool array of shape (3, slots)]
     """
+
+    def __init__(self, vel, capacity=BOLT_POOL_SIZE):
+        """
+        Initializes an empty BoltPool whose bolts move with velocity vel
+
+        Parameter vel: velocity to assign to every bolt
+        Precondition: vel is an int or float; positive for the ship, negative
+        for the aliens
+
+        Parameter capacity: the number of slots to preallocate
+        Precondition: capacity is an int > 0
+        """
+        self.width = BOLT_WIDTH
+        self.height = BOLT_HEIGHT
+        self._velocity = vel
+        self._step = np.array(float(vel))
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._count = 0
+        self._floats = np.zeros((3, capacity))
+        self._masks = np.zeros((3, capacity), dtype=bool)
+
+    def copy(self):
+        """
+        Returns a copy of this pool with its own arrays [BoltPool]
+        """
+        other = object.__new__(BoltPool)
+        other.__dict__.update(self.__dict__)
+        other._x = self._x.copy()
+        other._y = self._y.copy()
+        other._floats = np.zeros_like(self._floats)
+        other._masks = np.zeros_like(self._masks)
+        return other
+
+    def pack(self):
+        """
+        Returns the centers of the live bolts as bytes: the x coordinates,
+        then the y coordinates, as little-endian float64 [bytes]
+        """
+        n = self._count
+        return self._x[:n].astype('<f8').tobytes() + self._y[:n].astype('<f8').tobytes()
+
+    def unpack(self, data):
+        """
+        Replaces the bolts in the pool with the ones packed in data
+
+        Parameter data: the bolts, as returned by pack
+        Precondition: data is a bytes-like object
+        """
+        values = np.frombuffer(data, dtype='<f8')
+        n = len(values) // 2
+        while (len(self._x) < n):
+            self._grow()
+        self._x[:n] = values[:n]
+        self._y[:n] = values[n:]
+        self._count = n
+
     def getVelocity(self):
         """
-        Returns velocity of Bolt object
+        Returns the velocity in y direction of the bolts in this pool
         """
         return self._velocity
-    def __init__(self, x1, y1, vel):
+
+    def getCount(self):
+        """
+        Returns the number of live bolts
         """
-        Initializes GRectangle object representing a Bolt with x position x1, y position y1,
-        width of BOLT_WIDTH, height BOLT_HEIGHT, and a fillcolor of red
-        Overrides __init__ method in GRectangle since Bolt also needs attribute _velocity
+        return self._count
 
-        Parameter x1: x position to assign to GRectangle object
-        Precondition: x1 is an int or float >= 0
+    def getX(self, i):
+        """
+        Returns the x coordinate of the center of bolt i
 
-        Parameter y1: y position to assign to GRectangle object
-        Precondition: y1 is an int or float >= 0
+        Parameter i: the bolt
+        Precondition: i is an int in 0..getCount()-1
+        """
+        return self._x.item(i)
 
-        Parameter vel: velocity to assign to GRectangle object
-        Precondition: vel is an int or float >= 0
+    def getY(self, i):
         """
-        GRectangle.__init__(self, x = x1, y = y1, width = BOLT_WIDTH,
-        height = BOLT_HEIGHT, fillcolor = 'red')
-        self._velocity = vel
+        Returns the y coordinate of the center of bolt i
+
+        Parameter i: the bolt
+        Precondition: i is an int in 0..getCount()-1
+        """
+        return self._y.item(i)
+
+    def add(self, x, y):
+        """
+        Adds a bolt centered at (x, y) to the pool
+
+        Parameter x: the x coordinate of the center of the bolt
+        Precondition: x is an int or float
 
+        Parameter y: the y coordinate of the center of the bolt
+        Precondition: y is an int or float
+        """
+        if (self._count == len(self._x)):
+            self._grow()
+        self._x[self._count] = x
+        self._y[self._count] = y
+        self._count = self._count + 1
+
+    def remove(self, i):
+        """
+        Removes bolt i by moving the last live bolt into its slot
+
+        Parameter i: the bolt
+        Precondition: i is an int in 0..getCount()-1
+        """
+        last = self._count - 1
+        self._x[i] = self._x[last]
+        self._y[i] = self._y[last]
+        self._count = last
+
+    def findHit(self, box):
+        """
+        Returns the bolt that first overlaps box on its last move, from one
+        velocity back to where it is now, or None if no bolt does. Of bolts
+        that reach box at the same time, the highest-numbered one is
+        returned. Once there are BATCH_MIN bolts they are tested in one batch.
+
+        Parameter box: the bounds to test the bolts against
+        Precondition: box is a Hitbox
+        """
+        n = self._count
+        if (n < BATCH_MIN):
+            best = None
+            for i in range(n - 1, -1, -1):
+                y = self._y.item(i)
+                time = box.sweep(self._x.item(i), y - self._velocity, y, self.width, self.height)
+                if (time != None and (best == None or time < first)):
+                    best = i
+                    first = time
+            return best
+        y = self._y[:n]
+        start, times, spare = self._floats[:, :n]
+        masks = self._masks[:, :n]
+        np.subtract(y, self._step, out=start)
+        box.sweepAll(self._x[:n], start, y, self.width, self.height, times, spare, masks)
+        best = int(times.argmin())
+        first = times.item(best)
+        if (first == np.inf):
+            return None
+        # argmin finds the first of the bolts that tie; look from the back
+        tied = masks[0]
+        np.equal(times, first, out=tied)
+        if (np.count_nonzero(tied) > 1):
+            best = n - 1 - int(tied[::-1].argmax())
+        return best
+
+    def clear(self):
+        """
+        Removes every bolt
+        """
+        self._count = 0
+
+    def move(self):
+        """
+        Moves every live bolt by its velocity
+        """
+        n = self._count
+        if (n >= MOVE_BATCH_MIN):
+            y = self._y[:n]
+            y += self._step
+            return
+        for i in range(n):
+            self._y[i] = self._y.item(i) + self._velocity
+
+    def cull(self, low, high):
+        """
+        Removes every bolt whose center is outside low <= y < high
+
+        Parameter low: the lowest y coordinate kept
+        Precondition: low is an int or float
+
+        Parameter high: the y coordinate above the highest one kept
+        Precondition: high is an int or float > low
+        """
+        n = self._count
+        if (n == 0):
+            return
+        if (n >= BATCH_MIN):
+            y = self._y[:n]
+            gone = self._masks[0, :n]
+            above = self._masks[1, :n]
+            np.less(y, low, out=gone)
+            np.greater_equal(y, high, out=above)
+            np.logical_or(gone, above, out=gone)
+            if (np.count_nonzero(gone) > 0):
+                # removing from the back keeps the order of the plain loop below
+                for i in range(n - 1, -1, -1):
+                    if (gone.item(i)):
+                        self.remove(i)
+            return
+        # A plain loop beats NumPy masking at the few dozen bolts a wave has
+        for i in range(n - 1, -1, -1):
+            y = self._y.item(i)
+            if (y < low or y >= high):
+                self.remove(i)
 
-    def isPlayerBolt(self):
+    def _grow(self):
         """
-        Method determines if a Bolt object was fired by the ship or an alien
-        Returns True if fired by ship, Returns False if fired by alien
+        Doubles the number of slots in the pool
         """
-        if (self._velocity > 0):
-            return True
-        return False
+        size = 2 * len(self._x)
+        self._x = np.resize(self._x, size)
+        self._y = np.resize(self._y, size)
+        self._floats = np.zeros((3, size))
+        self._masks = np.zeros((3, size), dtype=bool)
@@ -0,0 +1,237 @@
+"""
+Frame profiler for Alien Invaders
+
+A Profiler keeps the most recent PROFILE_SAMPLES timings of every phase of a
+frame in a ring buffer: the parts of Wave.tick (moveShip, moveAliens,
+createShipBolt, moveBolt, shipCollision, alienCollision, cullBolts), the whole of
+Wave.update, the drawing in WaveRenderer.draw and Invaders.draw, and the
+input latency measured by InputSampler. It reports percentiles and
+histograms of them, and exports them as CSV or JSON.
+
+Profiling is off unless a Profiler is installed with setProfiler. Hot paths
+read the module attribute current directly and skip all timing when it is
+None, so a disabled profiler costs one attribute lookup per phase group.
+
+Run this module to profile 20 headless games, print the summary, and
+optionally export it to profile.csv and profile.json:
+
+    python profiler.py profile
+"""
+from consts import *
+import numpy as np
+import sys
+import time
+
+
+# the number of recent samples kept per phase
+PROFILE_SAMPLES = 600
+# the number of bins in a histogram
+PROFILE_BINS = 20
+# the file name, without extension, that Invaders exports profiles to
+PROFILE_FILE = 'last_profile'
+# the phases in the order they are reported; others follow in the order seen
+PROFILE_PHASES = ('moveShip', 'moveAliens', 'createShipBolt', 'moveBolt',
+                  'shipCollision', 'alienCollision', 'cullBolts', 'Wave.update',
+                  'WaveRenderer.draw', 'Invaders.draw', 'inputLatency')
+
+
+class Profiler(object):
+    """
+    A class to collect phase timings in fixed-size ring buffers.
+    INSTANCE ATTRIBUTES:
+        _size:    the number of samples kept per phase [int > 0]
+        _samples: the recent samples of each phase, in seconds
+                  [dict of str to np.ndarray of float]
+        _counts:  the number of samples ever taken of each phase [dict of str to int]
+    """
+
+    def __init__(self, size=PROFILE_SAMPLES):
+        """
+        Initializes a profiler with no samples
+
+        Parameter size: the number of samples kept per phase
+        Precondition: size is an int > 0
+        """
+        self._size = size
+        self._samples = {}
+        self._counts = {}
+
+    def clock(self):
+        """
+        Returns the current time in seconds, to pass to lap
+        """
+        return time.perf_counter()
+
+    def add(self, phase, seconds):
+        """
+        Adds a sample to phase, overwriting the oldest once the buffer is full
+
+        Parameter phase: the name of the phase
+        Precondition: phase is a string
+
+        Parameter seconds: the time the phase took
+        Precondition: seconds is a float >= 0
+        """
+        samples = self._samples.get(phase)
+        if (samples is None):
+            samples = np.zeros(self._size)
+            self._samples[phase] = samples
+            self._counts[phase] = 0
+        samples[self._counts[phase] % self._size] = seconds
+        self._counts[phase] += 1
+
+    def lap(self, phase, start):
+        """
+        Adds the time since start as a sample of phase, and returns the time
+        now, so that laps can be chained
+
+        Parameter phase: the name of the phase
+        Precondition: phase is a string
+
+        Parameter start: when the phase began
+        Precondition: start is a float returned by clock or lap
+        """
+        now = time.perf_counter()
+        self.add(phase, now - start)
+        return now
+
+    def getPhases(self):
+        """
+        Returns the phases with samples, known phases first [list of str]
+        """
+        phases = [phase for phase in PROFILE_PHASES if phase in self._samples]
+        return phases + [phase for phase in self._samples if phase not in PROFILE_PHASES]
+
+    def getSamples(self, phase):
+        """
+        Returns the samples of phase still in the buffer, oldest first, in
+        seconds [np.ndarray of float]
+
+        Parameter phase: the name of the phase
+        Precondition: phase is a string with samples
+        """
+        samples = self._samples[phase]
+        count = self._counts[phase]
+        if (count <= self._size):
+            return samples[:count].copy()
+        start = count % self._size
+        return np.concatenate((samples[start:], samples[:start]))
+
+    def stats(self, phase):
+        """
+        Returns the statistics of the samples of phase in the buffer as a
+        dict: the number of samples ever taken ('count'), and the 'mean',
+        'p50', 'p95', 'p99' and 'max' in milliseconds
+
+        Parameter phase: the name of the phase
+        Precondition: phase is a string with samples
+        """
+        ms = self.getSamples(phase) * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        return {'count': self._counts[phase], 'mean': float(ms.mean()), 'p50': float(p50),
+                'p95': float(p95), 'p99': float(p99), 'max': float(ms.max())}
+
+    def histogram(self, phase, bins=PROFILE_BINS):
+        """
+        Returns the histogram of the samples of phase in the buffer, as a pair
+        (counts, edges) where edges are in milliseconds
+
+        Parameter phase: the name of the phase
+        Precondition: phase is a string with samples
+
+        Parameter bins: the number of bins
+        Precondition: bins is an int > 0
+        """
+        counts, edges = np.histogram(self.getSamples(phase) * 1000, bins)
+        return counts.tolist(), edges.tolist()
+
+    def summary(self):
+        """
+        Returns the stats of every phase [dict of str to dict]
+        """
+        return {phase: self.stats(phase) for phase in self.getPhases()}
+
+    def report(self):
+        """
+        Returns the summary as text, one line per phase [str]
+        """
+        lines = ['%-18s %7s %7s %7s %7s' % ('phase (ms)', 'p50', 'p95', 'p99', 'max')]
+        for phase in self.getPhases():
+            lines.append('%-18s %7.3f %7.3f %7.3f %7.3f' % ((phase,) + tuple(
+                self.stats(phase)[key] for key in ('p50', 'p95', 'p99', 'max'))))
+        return '\n'.join(lines)
+
+    def saveCSV(self, path):
+        """
+        Writes the summary to the file path as CSV, one row per phase
+
+        Parameter path: the file to write
+        Precondition: path is a string
+        """
+        import csv
+        keys = ('count', 'mean', 'p50', 'p95', 'p99', 'max')
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('phase',) + tuple(k if k == 'count' else k + '_ms' for k in keys))
+            for phase in self.getPhases():
+                stats = self.stats(phase)
+                writer.writerow((phase,) + tuple(stats[k] for k in keys))
+
+    def saveJSON(self, path):
+        """
+        Writes the summary, histograms and samples in the buffer of every phase
+        to the file path as JSON
+
+        Parameter path: the file to write
+        Precondition: path is a string
+        """
+        import json
+        result = {}
+        for phase in self.getPhases():
+            counts, edges = self.histogram(phase)
+            result[phase] = {'stats': self.stats(phase),
+                             'histogram': {'counts': counts, 'edges_ms': edges},
+                             'samples_ms': (self.getSamples(phase) * 1000).tolist()}
+        with open(path, 'w') as file:
+            json.dump(result, file, indent=1)
+
+
+# the installed profiler, or None if profiling is off. Hot paths read this
+# directly rather than through getProfiler.
+current = None
+
+
+def getProfiler():
+    """
+    Returns the installed profiler, or None if profiling is off
+    """
+    return current
+
+
+def setProfiler(profiler):
+    """
+    Installs profiler, or turns profiling off if it is None
+
+    Parameter profiler: the profiler to install
+    Precondition: profiler is a Profiler object or None
+    """
+    global current
+    current = profiler
+
+
+if __name__ == '__main__':
+    # Wave reads the imported module, not this __main__ one
+    import profiler
+    from headless import *
+    prof = profiler.Profiler()
+    profiler.setProfiler(prof)
+    for seed in range(20):
+        wave = Wave(seed)
+        input = ScriptedInput(hunterPolicy, wave)
+        while (wave.getShip() != None and not wave.isBelowLine() and not wave.noAliensAlive()):
+            wave.update(input, TICK)
+            input.advance()
+    print(prof.report())
+    if (len(sys.argv) > 1):
+        prof.saveCSV(sys.argv[1] + '.csv')
+        prof.saveJSON(sys.argv[1] + '.json')
@@ -0,0 +1,273 @@
+"""
+Renderer module for Alien Invaders
+
+This module is the only place (besides app.py) that depends on game2d. It
+turns the plain state of a Wave into sprites. The Wave itself knows nothing
+about windows or textures; its sounds go to the mixer in audio.py.
+
+The alien sprites are kept in retained sprite lists, one SpriteList per
+texture. They are only repositioned when the formation marches, and a
+sprite leaves its list when its alien is killed, so a frame never walks the
+whole grid. This saves Python work per frame, not draw calls: game2d has no
+call that submits many sprites at once, so every live alien is still one
+draw call.
+
+Sprites come from the asset cache in assets.py, and go back to it when the
+renderer is released.
+"""
+from consts import *
+from game2d import *
+from assets import *
+import profiler
+import time
+
+
+class SpriteList(object):
+    """
+    A class to hold the alien sprites that share one texture, kept from
+    frame to frame.
+
+    Removing a sprite moves the last sprite of the list into its place, so
+    the list stays packed. It is drawn with one draw call per sprite.
+    INSTANCE ATTRIBUTES:
+        _sprites: the sprites in the list [list of GImage]
+        _cells:   the (row, col) of the alien each sprite shows, parallel
+                  to _sprites [list of (int, int)]
+        _index:   the position in _sprites of each cell [dict of (int, int) to int]
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty list
+        """
+        self._sprites = []
+        self._cells = []
+        self._index = {}
+
+    def getCount(self):
+        """
+        Returns the number of sprites in the list
+        """
+        return len(self._sprites)
+
+    def add(self, cell, sprite):
+        """
+        Adds sprite, which shows the alien at cell, to the list
+
+        Parameter cell: the row and column of the alien
+        Precondition: cell is a tuple (int, int) not already in the list
+
+        Parameter sprite: the sprite
+        Precondition: sprite is a GImage
+        """
+        self._index[cell] = len(self._sprites)
+        self._sprites.append(sprite)
+        self._cells.append(cell)
+
+    def remove(self, cell):
+        """
+        Removes the sprite of the alien at cell, if it is in the list
+
+        Parameter cell: the row and column of the alien
+        Precondition: cell is a tuple (int, int)
+        """
+        i = self._index.pop(cell, None)
+        if (i == None):
+            return
+        last = self._sprites.pop()
+        lastCell = self._cells.pop()
+        if (i < len(self._sprites)):
+            self._sprites[i] = last
+            self._cells[i] = lastCell
+            self._index[lastCell] = i
+
+    def place(self, aliens):
+        """
+        Moves every sprite to where its alien is in the formation aliens
+
+        Parameter aliens: the formation
+        Precondition: aliens is a Formation object
+        """
+        for i in range(len(self._sprites)):
+            row, col = self._cells[i]
+            self._sprites[i].x = aliens.getX(col)
+            self._sprites[i].y = aliens.getY(row)
+
+    def draw(self, view):
+        """
+        Draws every sprite in the list, one draw call each, and returns the
+        number of draw calls
+
+        Parameter view: the view to draw to
+        Precondition: view is a GView object
+        """
+        for sprite in self._sprites:
+            sprite.draw(view)
+        return len(self._sprites)
+
+
+class WaveRenderer(object):
+    """
+    A class to draw a Wave.
+    INSTANCE ATTRIBUTES:
+        _wave:    the wave being displayed [Wave]
+        _ship:    the sprite for the ship [GImage]
+        _lists:   the live alien sprites, one list per texture, in the order
+                  the textures first appear [list of SpriteList]
+        _rows:    the list holding each row of the formation [list of SpriteList]
+        _taken:   every image sprite taken from the asset cache, the ship first,
+                  dead aliens included [list of GImage]
+        _aliens:  the formation the alien sprites were built for [Formation]
+        _kills:   the number of formation kills already applied [int >= 0]
+        _moves:   the formation march count the sprites are placed for [int >= 0]
+        _bolts:   sprites reused for the bolts, in order [list of GRectangle]
+        _dline:   the defensive line being protected [GPath]
+        _calls:   the number of draw calls in the last frame [int >= 0]
+        _allCalls: the number of draw calls in every frame [int >= 0]
+        _frames:  the number of frames drawn [int >= 0]
+        _last:    the seconds spent in the last call to draw [float >= 0]
+        _total:   the seconds spent in every call to draw [float >= 0]
+    """
+
+    def __init__(self, wave):
+        """
+        Initializes the sprites for wave
+
+        Parameter wave: the wave to display
+        Precondition: wave is a Wave object
+        """
+        self._wave = wave
+        ship = wave.createShip()
+        self._ship = takeImage(ship.source, ship.x, ship.y, ship.width, ship.height)
+        self._taken = [self._ship]
+        self._build()
+        self._bolts = []
+        line = wave.getConfig().defenseLine
+        self._dline = GPath(points = [0,line,wave.getConfig().width,line],
+        linewidth = 2,linecolor =[0.5,0.5,0,0.5])
+        self._calls = 0
+        self._allCalls = 0
+        self._frames = 0
+        self._last = 0.0
+        self._total = 0.0
+
+    def _build(self):
+        """
+        Builds the alien sprites for the current formation of the wave,
+        giving the sprites of any earlier formation back to the asset cache
+        first
+        """
+        releaseImages(self._taken[1:])
+        del self._taken[1:]
+        aliens = self._wave.getAliens()
+        self._lists = []
+        self._rows = []
+        textures = {}
+        for r in range(aliens.getRows()):
+            source = aliens.getSource(r)
+            if (source not in textures):
+                textures[source] = SpriteList()
+                self._lists.append(textures[source])
+            sprites = textures[source]
+            self._rows.append(sprites)
+            for c in range(aliens.getCols()):
+                if (aliens.isAlive(r, c)):
+                    sprite = takeImage(source, aliens.getX(c), aliens.getY(r),
+                                       aliens.width, aliens.height)
+                    sprites.add((r, c), sprite)
+                    self._taken.append(sprite)
+        self._aliens = aliens
+        self._kills = len(aliens.getKills())
+        self._moves = aliens.getMoves()
+
+    def getStats(self):
+        """
+        Returns the drawing statistics as a dict: the number of 'frames'
+        drawn, the draw 'calls' in the last frame and 'callsPerFrame' on
+        average, and the milliseconds spent drawing the last frame
+        ('frameMs') and a frame on average ('avgFrameMs')
+        """
+        frames = max(self._frames, 1)
+        return {'frames': self._frames, 'calls': self._calls,
+                'callsPerFrame': self._allCalls / frames,
+                'frameMs': 1000 * self._last, 'avgFrameMs': 1000 * self._total / frames}
+
+    def release(self):
+        """
+        Gives the image sprites back to the asset cache for the next renderer.
+
+        The renderer must not be drawn again after it is released.
+        """
+        releaseImages(self._taken)
+        self._taken = []
+        self._lists = []
+
+    def sync(self):
+        """
+        Brings the alien sprites up to date with the formation: drops the
+        sprites of aliens killed since the last call, and repositions the
+        rest only if the formation has marched since then. If the wave has a
+        new formation, as after Wave.restore, the sprites are built again.
+        """
+        aliens = self._wave.getAliens()
+        if (aliens is not self._aliens):
+            self._build()
+            return
+        kills = aliens.getKills()
+        while (self._kills < len(kills)):
+            cell = kills[self._kills]
+            self._rows[cell[0]].remove(cell)
+            self._kills = self._kills + 1
+        if (self._moves != aliens.getMoves()):
+            self._moves = aliens.getMoves()
+            for sprites in self._lists:
+                sprites.place(aliens)
+
+    def draw(self, view):
+        """
+        Draws the ship, the living aliens, the defense line and the bolts of
+        the wave, and records the number of draw calls and the time taken.
+
+        The wave is simulated in fixed ticks, so the ship and the bolts are
+        drawn between their positions at the last two ticks, according to
+        how far the current frame is into the next tick. The aliens hop from
+        step to step and are drawn where they are.
+
+        Parameter view: the view to draw to
+        Precondition: view is a GView object
+        """
+        start = time.perf_counter()
+        calls = 0
+        self.sync()
+        alpha = self._wave.getAlpha()
+        ship = self._wave.getShip()
+        if (ship != None):
+            self._ship.x = ship.prevX + (ship.x - ship.prevX) * alpha
+            self._ship.y = ship.y
+            self._ship.draw(view)
+            calls = calls + 1
+        for sprites in self._lists:
+            calls = calls + sprites.draw(view)
+        self._dline.draw(view)
+        calls = calls + 1
+        ship = self._wave.getShipBolts()
+        alien = self._wave.getAlienBolts()
+        while (len(self._bolts) < ship.getCount() + alien.getCount()):
+            self._bolts.append(GRectangle(x = 0, y = 0, width = BOLT_WIDTH,
+            height = BOLT_HEIGHT, fillcolor = 'red'))
+        n = 0
+        for bolts in (ship, alien):
+            back = bolts.getVelocity() * (1 - alpha)
+            for i in range(bolts.getCount()):
+                sprite = self._bolts[n]
+                sprite.x = bolts.getX(i)
+                sprite.y = bolts.getY(i) - back
+                sprite.draw(view)
+                n = n + 1
+        self._calls = calls + n
+        self._allCalls = self._allCalls + self._calls
+        self._frames = self._frames + 1
+        self._last = time.perf_counter() - start
+        self._total = self._total + self._last
+        if (profiler.current != None):
+            profiler.current.add('WaveRenderer.draw', self._last)
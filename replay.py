@@ -0,0 +1,351 @@
+"""
+Replay module for Alien Invaders
+
+A replay is the seed and settings of every level of a game, plus the keys
+held on every tick, packed into one byte per tick. Since a Wave is
+deterministic given its seed and its input on each tick, and each level
+starts with the lives and score the level before ended with, that is enough
+to reproduce a whole game exactly. A Replay is attached to a Wave with
+setRecorder and samples the input at the start of every tick, and addLevel
+marks the tick where the next level starts; playReplay runs the recording
+back through Wave.tick as fast as possible, without a window.
+
+The file format is the 4 bytes REPLAY_MAGIC, a header (format version,
+number of levels, number of ticks), then for each level its seed, the tick
+it starts on and the settings of its GameConfig that differ from the
+defaults as JSON (a 4 byte length, then UTF-8 text), and then the
+zlib-compressed key bytes. A replay carries its own configs, so it plays
+back exactly whatever the defaults are. Version 1 and 2 files, which held a
+single level, can still be read.
+
+Run this module with a replay file to play it back and time it:
+
+    python replay.py last_replay.air
+"""
+from consts import *
+from config import *
+from wave import *
+import json
+import struct
+import sys
+import time
+import zlib
+
+
+# the keys recorded on each tick, in bit order
+REPLAY_KEYS = ('left', 'right', 'spacebar', 's', 'f', 'q')
+# the first bytes of every replay file
+REPLAY_MAGIC = b'AIRP'
+# the version of the replay file format
+REPLAY_VERSION = 3
+# the layout of the header that follows REPLAY_MAGIC: version, levels, ticks
+REPLAY_HEADER = struct.Struct('<BHI')
+# the layout of the start of each level: seed, first tick
+REPLAY_LEVEL = struct.Struct('<QI')
+# the layout of the length of the config that follows each level
+REPLAY_CONFIG_SIZE = struct.Struct('<I')
+# the layout of the header of version 2: version, seed, ticks
+REPLAY_HEADER_V2 = struct.Struct('<BQI')
+# the layout of the header of version 1: version, seed, rows, aliens per
+# row, alien speed, ticks
+REPLAY_HEADER_V1 = struct.Struct('<BQHHdI')
+
+
+def encodeKeys(input):
+    """
+    Returns the keys in REPLAY_KEYS held in input, as a bitmask [int in 0..63]
+
+    Parameter input: the input to sample
+    Precondition: input has the GInput method is_key_down
+    """
+    mask = 0
+    for i in range(len(REPLAY_KEYS)):
+        if (input.is_key_down(REPLAY_KEYS[i])):
+            mask = mask | (1 << i)
+    return mask
+
+
+class Replay(object):
+    """
+    A class to represent a recorded game.
+    INSTANCE ATTRIBUTES:
+        _levels: the seed, settings and first tick of each level, in order
+                 [list of (int, GameConfig, int)]
+        _keys:   the key bitmask of every tick, in order [bytearray]
+    """
+
+    def __init__(self, seed, keys=None, config=DEFAULT_CONFIG):
+        """
+        Initializes a Replay whose first level is the wave with the given
+        seed and settings
+
+        Parameter seed: the seed of the wave of the first level
+        Precondition: seed is an int in 0..2**64-1
+
+        Parameter keys: the key bitmask of every tick so far
+        Precondition: keys is a bytes-like object, or None for no ticks
+
+        Parameter config: the settings of the wave of the first level
+        Precondition: config is a GameConfig
+        """
+        self._levels = [(seed, config, 0)]
+        self._keys = bytearray(keys or b'')
+
+    def getSeed(self):
+        """
+        Returns the seed of the wave of the first level
+        """
+        return self._levels[0][0]
+
+    def getLevels(self):
+        """
+        Returns the number of levels recorded
+        """
+        return len(self._levels)
+
+    def getLevel(self, level):
+        """
+        Returns the seed, the settings and the first tick of level, as a
+        tuple (int, GameConfig, int)
+
+        Parameter level: the level, 0 for the first one
+        Precondition: level is an int in 0..getLevels()-1
+        """
+        return self._levels[level]
+
+    def addLevel(self, seed, config):
+        """
+        Starts recording the next level, the wave with the given seed and
+        settings, at the next tick. That wave must have been started with
+        carryOver from the wave recorded so far.
+
+        Parameter seed: the seed of the wave of the level
+        Precondition: seed is an int in 0..2**64-1
+
+        Parameter config: the settings of the wave of the level
+        Precondition: config is a GameConfig
+        """
+        self._levels.append((seed, config, len(self._keys)))
+
+    def getTicks(self):
+        """
+        Returns the number of ticks recorded
+        """
+        return len(self._keys)
+
+    def getKeys(self, tick):
+        """
+        Returns the key bitmask recorded for tick
+
+        Parameter tick: the tick
+        Precondition: tick is an int in 0..getTicks()-1
+        """
+        return self._keys[tick]
+
+    def getConfig(self):
+        """
+        Returns the settings of the wave of the first level [GameConfig]
+        """
+        return self._levels[0][1]
+
+    def record(self, input):
+        """
+        Appends the keys held in input as the next tick
+
+        Parameter input: the input to sample
+        Precondition: input has the GInput method is_key_down
+        """
+        self._keys.append(encodeKeys(input))
+
+    def rewind(self, ticks):
+        """
+        Drops every tick of the last level after its first ticks, as when the
+        wave is restored to an earlier snapshot
+
+        Parameter ticks: the number of ticks of the last level to keep
+        Precondition: ticks is an int >= 0 no more than the ticks recorded
+        for the last level
+        """
+        del self._keys[self._levels[-1][2] + ticks:]
+
+    def save(self, path):
+        """
+        Writes the replay to the file path
+
+        Parameter path: the file to write
+        Precondition: path is a string
+        """
+        parts = [REPLAY_MAGIC, REPLAY_HEADER.pack(REPLAY_VERSION, len(self._levels),
+                                                  len(self._keys))]
+        for seed, config, start in self._levels:
+            config = json.dumps(config.overrides(), sort_keys=True).encode('utf-8')
+            parts.append(REPLAY_LEVEL.pack(seed, start))
+            parts.append(REPLAY_CONFIG_SIZE.pack(len(config)))
+            parts.append(config)
+        parts.append(zlib.compress(bytes(self._keys), 9))
+        with open(path, 'wb') as file:
+            file.write(b''.join(parts))
+
+
+def _readConfig(data, start):
+    """
+    Returns the GameConfig stored in data at start, as a length and JSON
+    text, and the position after it, as a tuple (GameConfig, int)
+
+    Raises ValueError if the settings are not valid.
+
+    Parameter data: the contents of a replay file
+    Precondition: data is a bytes object
+
+    Parameter start: where the config starts
+    Precondition: start is an int >= 0
+    """
+    size = REPLAY_CONFIG_SIZE.unpack_from(data, start)[0]
+    start = start + REPLAY_CONFIG_SIZE.size
+    config = GameConfig(**json.loads(data[start:start + size].decode('utf-8')))
+    return config, start + size
+
+
+def loadReplay(path):
+    """
+    Returns the Replay stored in the file path
+
+    Raises ValueError if the file is not a replay of a version this module
+    can read, or if its settings are not valid.
+
+    Parameter path: the file to read
+    Precondition: path is a string
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if (data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC):
+        raise ValueError(path + ' is not an Alien Invaders replay')
+    start = len(REPLAY_MAGIC)
+    version = data[start]
+    levels = []
+    if (version == 1):
+        version, seed, rows, cols, speed, ticks = REPLAY_HEADER_V1.unpack_from(data, start)
+        levels.append((seed, GameConfig(rows=rows, cols=cols, speed=speed), 0))
+        start = start + REPLAY_HEADER_V1.size
+    elif (version == 2):
+        version, seed, ticks = REPLAY_HEADER_V2.unpack_from(data, start)
+        config, start = _readConfig(data, start + REPLAY_HEADER_V2.size)
+        levels.append((seed, config, 0))
+    elif (version == REPLAY_VERSION):
+        version, count, ticks = REPLAY_HEADER.unpack_from(data, start)
+        start = start + REPLAY_HEADER.size
+        for i in range(count):
+            seed, first = REPLAY_LEVEL.unpack_from(data, start)
+            config, start = _readConfig(data, start + REPLAY_LEVEL.size)
+            levels.append((seed, config, first))
+    else:
+        raise ValueError(path + ' has unsupported replay version ' + str(version))
+    keys = zlib.decompress(data[start:])
+    if (len(keys) != ticks):
+        raise ValueError(path + ' is truncated')
+    replay = Replay(levels[0][0], keys, levels[0][1])
+    replay._levels = levels
+    return replay
+
+
+class ReplayInput(object):
+    """
+    A class that replaces GInput with the keys recorded in a Replay.
+    INSTANCE ATTRIBUTES:
+        _replay: the replay being played [Replay]
+        _tick:   the tick whose keys are currently held [int >= 0]
+        _mask:   the key bitmask of the current tick [int in 0..63]
+    """
+
+    def __init__(self, replay):
+        """
+        Initializes the input at tick 0 of replay
+
+        Parameter replay: the replay to play
+        Precondition: replay is a Replay object
+        """
+        self._replay = replay
+        self._tick = 0
+        self._mask = 0
+        self._load()
+
+    @property
+    def key_count(self):
+        """
+        The number of keys currently held [int >= 0]
+        """
+        return bin(self._mask).count('1')
+
+    def is_key_down(self, key):
+        """
+        Returns: True if key is held in the current tick
+
+        Parameter key: the key to check
+        Precondition: key is a string
+        """
+        if (key not in REPLAY_KEYS):
+            return False
+        return (self._mask >> REPLAY_KEYS.index(key)) & 1 == 1
+
+    def advance(self):
+        """
+        Moves on to the next recorded tick
+        """
+        self._tick = self._tick + 1
+        self._load()
+
+    def _load(self):
+        """
+        Reads the key bitmask of the current tick
+        """
+        if (self._tick < self._replay.getTicks()):
+            self._mask = self._replay.getKeys(self._tick)
+        else:
+            self._mask = 0
+
+
+def playReplay(replay, stop=None):
+    """
+    Plays replay back through a new Wave for each level, with the seed and
+    settings of the level, as fast as possible, and returns the Wave as it is
+    after tick stop (or after the last tick).
+
+    Each level after the first starts with carryOver from the wave of the
+    level before. A wave only ticks while the ship is alive, so whenever the
+    ship is missing before a recorded tick, the player must have respawned
+    it with 'F', and it is respawned here too.
+
+    Parameter replay: the replay to play
+    Precondition: replay is a Replay object
+
+    Parameter stop: the number of ticks to play, or None for all of them
+    Precondition: stop is an int >= 0 or None
+    """
+    ticks = replay.getTicks()
+    if (stop != None):
+        ticks = min(ticks, stop)
+    wave = Wave(replay.getSeed(), replay.getConfig())
+    level = 1
+    input = ReplayInput(replay)
+    for t in range(ticks):
+        while (level < replay.getLevels() and replay.getLevel(level)[2] == t):
+            seed, config, start = replay.getLevel(level)
+            previous = wave
+            wave = Wave(seed, config)
+            wave.carryOver(previous)
+            level = level + 1
+        if (wave.getShip() == None):
+            wave.setShip(wave.createShip())
+        wave.tick(input)
+        input.advance()
+    return wave
+
+
+if __name__ == '__main__':
+    replay = loadReplay(sys.argv[1])
+    start = time.perf_counter()
+    wave = playReplay(replay)
+    elapsed = time.perf_counter() - start
+    print('seed', replay.getSeed(), 'levels', replay.getLevels(), 'ticks', replay.getTicks(),
+          'score', wave.getScore(), 'lives', wave.getLives())
+    print('played in %.3f s (%.0f ticks/s)' % (elapsed, replay.getTicks() / max(elapsed, 1e-9)))
@@ -0,0 +1,808 @@
+"""
+Spectator streaming for Alien Invaders
+
+A SpectatorServer streams a Wave to any number of viewers on the local
+machine over TCP, and a SpectatorClient turns the stream back into a
+SpectatorView, which has the getters of Wave that WaveRenderer reads, so a
+viewer draws it exactly like the game does.
+
+The stream is a keyframe followed by deltas. A keyframe holds the config,
+the alive bits and offset of the formation, the ship, the lives and score,
+and every bolt. A delta only holds what changed since the last message:
+the aliens killed, the new formation offset rather than the position of
+every alien, the ship, and the bolts that appeared and disappeared. Bolts
+fly in straight lines, so the viewer moves them itself. StreamEncoder keeps
+a mirror of the bolts the viewers have, updated with the same swap-remove as
+BoltPool, so that a despawn can be sent as the index of the bolt.
+
+Every message is encoded once, on the thread that publishes the wave, and a
+sender thread copies the same bytes to every viewer, so the cost to the game
+and the size of a message do not depend on the number of viewers. A viewer
+that joins, or that falls more than SPECTATE_BACKLOG bytes behind, is sent
+the next keyframe, which is only encoded when some viewer needs it.
+
+Run this module to benchmark a stream to local viewers:
+
+    python spectate.py --viewers=16 --ticks=5000
+"""
+from consts import *
+from config import *
+from models import *
+import argparse
+import collections
+import json
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+
+
+# the port of the spectator server
+SPECTATE_PORT = 7777
+# the bytes a viewer may fall behind before its queue is dropped for a keyframe
+SPECTATE_BACKLOG = 1 << 20
+# the seconds the sender thread waits for a message before checking its sockets
+SPECTATE_POLL = 0.005
+
+# the length of a message, which comes before it
+_FRAME = struct.Struct('<I')
+# the start of every message: its kind (b'K' or b'D') and the tick of the wave
+_HEAD = struct.Struct('<cI')
+# the formation in a keyframe: the offset from where it started and its marches
+_OFFSET = struct.Struct('<ddI')
+# the ship: whether there is one, and its x coordinate
+_SHIP = struct.Struct('<?d')
+# the lives and the score
+_STATUS = struct.Struct('<HI')
+# a count, a row or column, or the index of a bolt
+_SHORT = struct.Struct('<H')
+# a bolt that appeared
+_BOLT = struct.Struct('<dd')
+
+# the parts present in a delta
+_HAS_OFFSET = 1
+_HAS_SHIP   = 2
+_HAS_STATUS = 4
+_HAS_KILLS  = 8
+_HAS_SHIP_BOLTS  = 16
+_HAS_ALIEN_BOLTS = 32
+
+
+def _diffBolts(mirror, pool):
+    """
+    Brings mirror up to date with pool and returns (removed, spawned): the
+    indices removed from mirror, in the order removed, and the (x, y) of the
+    bolts added to it, in the order added
+
+    Parameter mirror: the bolts the viewers have, already moved to this tick
+    Precondition: mirror is a BoltPool
+
+    Parameter pool: the bolts of the wave
+    Precondition: pool is a BoltPool
+    """
+    left = collections.Counter((pool.getX(i), pool.getY(i)) for i in range(pool.getCount()))
+    removed = []
+    for i in range(mirror.getCount() - 1, -1, -1):
+        key = (mirror.getX(i), mirror.getY(i))
+        if (left[key] > 0):
+            left[key] -= 1
+        else:
+            removed.append(i)
+    for i in removed:
+        mirror.remove(i)
+    spawned = []
+    for i in range(pool.getCount()):
+        key = (pool.getX(i), pool.getY(i))
+        if (left[key] > 0):
+            left[key] -= 1
+            spawned.append(key)
+            mirror.add(key[0], key[1])
+    return removed, spawned
+
+
+class StreamEncoder(object):
+    """
+    A class to turn the ticks of a wave into keyframes and deltas.
+    INSTANCE ATTRIBUTES:
+        _wave:   the wave last encoded, or None [Wave or None]
+        _aliens: the formation of _wave last encoded [Formation or None]
+        _ticks:  the tick of the last message [int >= 0]
+        _kills:  the number of kills of _aliens already sent [int >= 0]
+        _moves:  the march count of _aliens last sent [int >= 0]
+        _shipX:  the x coordinate of the ship last sent, or None [float or None]
+        _status: the lives and score last sent [tuple of int]
+        _mirror: the ship bolts and alien bolts the viewers have [list of BoltPool]
+    """
+
+    def __init__(self):
+        """
+        Initializes an encoder that has not encoded anything
+        """
+        self._wave = None
+        self._aliens = None
+        self._ticks = 0
+        self._kills = 0
+        self._moves = 0
+        self._shipX = None
+        self._status = None
+        self._mirror = None
+
+    def encode(self, wave):
+        """
+        Returns the message that brings a viewer of the last message up to
+        date with wave [bytes]
+
+        This is a keyframe if wave cannot be described as a change to what was
+        last encoded: on the first call, for a different wave, for a restored
+        formation, or after the wave went back in time. Otherwise it is a delta.
+
+        Parameter wave: the wave
+        Precondition: wave is a Wave object
+        """
+        aliens = wave.getAliens()
+        if (wave is not self._wave or aliens is not self._aliens
+            or wave.getTicks() < self._ticks):
+            self._reset(wave)
+            return self.keyframe()
+        flags = 0
+        parts = []
+        config = wave.getConfig()
+        if (aliens.getMoves() != self._moves):
+            flags = flags | _HAS_OFFSET
+            parts.append(_OFFSET.pack(aliens.getX(0) - config.colx[0],
+                                      aliens.getY(0) - config.rowy[0], aliens.getMoves()))
+            self._moves = aliens.getMoves()
+        ship = wave.getShip()
+        x = None if ship == None else ship.x
+        if (x != self._shipX):
+            flags = flags | _HAS_SHIP
+            parts.append(_SHIP.pack(x != None, 0 if x == None else x))
+            self._shipX = x
+        status = (wave.getLives(), wave.getScore())
+        if (status != self._status):
+            flags = flags | _HAS_STATUS
+            parts.append(_STATUS.pack(*status))
+            self._status = status
+        kills = aliens.getKills()
+        if (self._kills < len(kills)):
+            flags = flags | _HAS_KILLS
+            parts.append(_SHORT.pack(len(kills) - self._kills))
+            for row, col in kills[self._kills:]:
+                parts.append(_SHORT.pack(row) + _SHORT.pack(col))
+            self._kills = len(kills)
+        for mirror, pool, flag in zip(self._mirror, (wave.getShipBolts(), wave.getAlienBolts()),
+                                      (_HAS_SHIP_BOLTS, _HAS_ALIEN_BOLTS)):
+            for t in range(wave.getTicks() - self._ticks):
+                mirror.move()
+            removed, spawned = _diffBolts(mirror, pool)
+            if (len(removed) > 0 or len(spawned) > 0):
+                flags = flags | flag
+                parts.append(_SHORT.pack(len(removed)) + _SHORT.pack(len(spawned)))
+                parts.extend(_SHORT.pack(i) for i in removed)
+                parts.extend(_BOLT.pack(x, y) for x, y in spawned)
+        self._ticks = wave.getTicks()
+        return _HEAD.pack(b'D', self._ticks) + bytes((flags,)) + b''.join(parts)
+
+    def keyframe(self):
+        """
+        Returns a keyframe of the state of the last message [bytes]
+
+        Precondition: encode has been called
+        """
+        wave = self._wave
+        config = wave.getConfig()
+        aliens = self._aliens
+        settings = json.dumps(config.overrides(), sort_keys=True).encode('utf-8')
+        parts = [_HEAD.pack(b'K', self._ticks), _SHORT.pack(len(settings)), settings,
+                 _OFFSET.pack(aliens.getX(0) - config.colx[0], aliens.getY(0) - config.rowy[0],
+                              aliens.getMoves()),
+                 _SHIP.pack(self._shipX != None, 0 if self._shipX == None else self._shipX),
+                 _STATUS.pack(*self._status), aliens.packAlive()]
+        for mirror in self._mirror:
+            parts.append(_SHORT.pack(mirror.getCount()))
+            parts.append(mirror.pack())
+        return b''.join(parts)
+
+    def _reset(self, wave):
+        """
+        Makes the state of wave the one last encoded, with the bolts of the
+        mirror in the order of the wave
+
+        Parameter wave: the wave
+        Precondition: wave is a Wave object
+        """
+        self._wave = wave
+        self._aliens = wave.getAliens()
+        self._ticks = wave.getTicks()
+        self._kills = len(self._aliens.getKills())
+        self._moves = self._aliens.getMoves()
+        ship = wave.getShip()
+        self._shipX = None if ship == None else ship.x
+        self._status = (wave.getLives(), wave.getScore())
+        self._mirror = [wave.getShipBolts().copy(), wave.getAlienBolts().copy()]
+
+
+class SpectatorView(object):
+    """
+    A class to hold the state of a streamed wave, with the getters of Wave
+    that WaveRenderer uses.
+
+    Nothing is known until the first keyframe has been applied.
+    INSTANCE ATTRIBUTES:
+        _config: the settings of the wave [GameConfig or None]
+        _aliens: the formation [Formation or None]
+        _ship:   the ship, or None if it is destroyed [Ship or None]
+        _shipBolts:  the bolts of the ship [BoltPool or None]
+        _alienBolts: the bolts of the aliens [BoltPool or None]
+        _lives:  the lives left [int >= 0]
+        _score:  the score [int >= 0]
+        _ticks:  the tick of the last message applied [int >= 0]
+    """
+
+    def __init__(self):
+        """
+        Initializes a view that has not received a keyframe
+        """
+        self._config = None
+        self._aliens = None
+        self._ship = None
+        self._shipBolts = None
+        self._alienBolts = None
+        self._lives = 0
+        self._score = 0
+        self._ticks = 0
+
+    def isReady(self):
+        """
+        Returns: True if a keyframe has been applied
+        """
+        return self._aliens != None
+
+    def getConfig(self):
+        """
+        Returns the settings of the wave [GameConfig]
+        """
+        return self._config
+
+    def getAliens(self):
+        """
+        Returns the formation [Formation]
+        """
+        return self._aliens
+
+    def getShip(self):
+        """
+        Returns the ship, or None if it is destroyed [Ship or None]
+        """
+        return self._ship
+
+    def createShip(self):
+        """
+        Returns a new ship where the wave starts its ship [Ship]
+        """
+        return Ship(self._config.shipX, self._config.shipY, SHIP_IMAGE)
+
+    def getShipBolts(self):
+        """
+        Returns the bolts of the ship [BoltPool]
+        """
+        return self._shipBolts
+
+    def getAlienBolts(self):
+        """
+        Returns the bolts of the aliens [BoltPool]
+        """
+        return self._alienBolts
+
+    def getLives(self):
+        """
+        Returns the lives left
+        """
+        return self._lives
+
+    def getScore(self):
+        """
+        Returns the score
+        """
+        return self._score
+
+    def getTicks(self):
+        """
+        Returns the tick of the last message applied
+        """
+        return self._ticks
+
+    def getAlpha(self):
+        """
+        Returns 1: a view is drawn as it was at its last tick, since the
+        time of the next one is not known
+        """
+        return 1
+
+    def apply(self, message):
+        """
+        Updates the view with a keyframe or delta from a StreamEncoder
+
+        Raises ValueError if message is a delta and no keyframe has been
+        applied yet.
+
+        Parameter message: the message
+        Precondition: message is a bytes object made by StreamEncoder
+        """
+        kind, ticks = _HEAD.unpack_from(message)
+        at = _HEAD.size
+        if (kind == b'K'):
+            self._keyframe(message, at)
+        elif (not self.isReady()):
+            raise ValueError('a delta arrived before the first keyframe')
+        else:
+            self._delta(message, at, ticks)
+        self._ticks = ticks
+
+    def _keyframe(self, message, at):
+        """
+        Replaces the state of the view with the keyframe message
+
+        Parameter message: the keyframe
+        Precondition: message is a bytes object
+
+        Parameter at: where the keyframe starts after its head
+        Precondition: at is an int
+        """
+        size = _SHORT.unpack_from(message, at)[0]
+        at = at + _SHORT.size
+        config = GameConfig(**json.loads(message[at:at + size].decode('utf-8')))
+        at = at + size
+        dx, dy, moves = _OFFSET.unpack_from(message, at)
+        at = at + _OFFSET.size
+        present, x = _SHIP.unpack_from(message, at)
+        at = at + _SHIP.size
+        self._lives, self._score = _STATUS.unpack_from(message, at)
+        at = at + _STATUS.size
+        bits = (config.rows * config.cols + 7) // 8
+        self._config = config
+        self._aliens = Formation(config.colx, config.rowy, config.sources)
+        self._aliens.restore(message[at:at + bits], dx, dy, moves)
+        at = at + bits
+        self._ship = None
+        if (present):
+            self._ship = self.createShip()
+            self._ship.x = x
+            self._ship.prevX = x
+        pools = []
+        for velocity in (config.boltSpeed, -config.boltSpeed):
+            count = _SHORT.unpack_from(message, at)[0]
+            at = at + _SHORT.size
+            pool = BoltPool(velocity)
+            pool.unpack(message[at:at + 16 * count])
+            at = at + 16 * count
+            pools.append(pool)
+        self._shipBolts, self._alienBolts = pools
+
+    def _delta(self, message, at, ticks):
+        """
+        Applies the delta message to the view
+
+        Parameter message: the delta
+        Precondition: message is a bytes object
+
+        Parameter at: where the delta starts after its head
+        Precondition: at is an int
+
+        Parameter ticks: the tick of the delta
+        Precondition: ticks is an int >= the tick of the view
+        """
+        flags = message[at]
+        at = at + 1
+        config = self._config
+        if (flags & _HAS_OFFSET):
+            dx, dy, moves = _OFFSET.unpack_from(message, at)
+            at = at + _OFFSET.size
+            self._aliens.march(dx - (self._aliens.getX(0) - config.colx[0]),
+                               dy - (self._aliens.getY(0) - config.rowy[0]))
+        if (self._ship != None):
+            self._ship.prevX = self._ship.x
+        if (flags & _HAS_SHIP):
+            present, x = _SHIP.unpack_from(message, at)
+            at = at + _SHIP.size
+            if (not present):
+                self._ship = None
+            elif (self._ship == None):
+                self._ship = self.createShip()
+                self._ship.x = x
+                self._ship.prevX = x
+            else:
+                self._ship.x = x
+        if (flags & _HAS_STATUS):
+            self._lives, self._score = _STATUS.unpack_from(message, at)
+            at = at + _STATUS.size
+        if (flags & _HAS_KILLS):
+            count = _SHORT.unpack_from(message, at)[0]
+            at = at + _SHORT.size
+            for i in range(count):
+                row = _SHORT.unpack_from(message, at)[0]
+                col = _SHORT.unpack_from(message, at + _SHORT.size)[0]
+                at = at + 2 * _SHORT.size
+                self._aliens.kill(row, col)
+        for pool, flag in ((self._shipBolts, _HAS_SHIP_BOLTS), (self._alienBolts, _HAS_ALIEN_BOLTS)):
+            for t in range(ticks - self._ticks):
+                pool.move()
+            if (flags & flag):
+                removed = _SHORT.unpack_from(message, at)[0]
+                spawned = _SHORT.unpack_from(message, at + _SHORT.size)[0]
+                at = at + 2 * _SHORT.size
+                for i in range(removed):
+                    pool.remove(_SHORT.unpack_from(message, at)[0])
+                    at = at + _SHORT.size
+                for i in range(spawned):
+                    pool.add(*_BOLT.unpack_from(message, at))
+                    at = at + _BOLT.size
+
+
+class _Viewer(object):
+    """
+    A class to hold the connection to one viewer, on the sender thread.
+    INSTANCE ATTRIBUTES:
+        sock:    the connection [socket.socket]
+        queue:   the messages not yet fully sent, framed [collections.deque of bytes]
+        sent:    the bytes of the first message in queue already sent [int >= 0]
+        backlog: the bytes in queue not yet sent [int >= 0]
+        needKey: True if the viewer must be sent a keyframe before any delta [boolean]
+    """
+
+    def __init__(self, sock):
+        """
+        Initializes a viewer on the connection sock, waiting for a keyframe
+
+        Parameter sock: the connection
+        Precondition: sock is a connected non-blocking socket
+        """
+        self.sock = sock
+        self.queue = collections.deque()
+        self.sent = 0
+        self.backlog = 0
+        self.needKey = True
+
+    def push(self, frame):
+        """
+        Queues frame to be sent
+
+        Parameter frame: the framed message
+        Precondition: frame is a bytes object
+        """
+        self.queue.append(frame)
+        self.backlog = self.backlog + len(frame)
+
+    def drop(self):
+        """
+        Drops every queued message except one being sent, and asks for a keyframe
+        """
+        while (len(self.queue) > (1 if self.sent > 0 else 0)):
+            self.backlog = self.backlog - len(self.queue.pop())
+        self.needKey = True
+
+    def flush(self):
+        """
+        Sends as much of the queue as the socket takes without blocking
+        """
+        while (len(self.queue) > 0):
+            frame = self.queue[0]
+            count = self.sock.send(memoryview(frame)[self.sent:])
+            self.sent = self.sent + count
+            self.backlog = self.backlog - count
+            if (self.sent < len(frame)):
+                return
+            self.queue.popleft()
+            self.sent = 0
+
+
+class SpectatorServer(object):
+    """
+    A class to stream waves to the viewers connected to a local port.
+    INSTANCE ATTRIBUTES:
+        _encoder:  encodes every message once [StreamEncoder]
+        _listen:   the listening socket [socket.socket]
+        _outbox:   the messages for the sender thread, as (delta, keyframe or None)
+                   [queue.Queue]
+        _wantKey:  set by the sender thread when a viewer needs a keyframe [threading.Event]
+        _stop:     set when the server is closed [threading.Event]
+        _viewers:  the connected viewers, used only by the sender thread [list of _Viewer]
+        _count:    the number of connected viewers [int >= 0]
+        _messages: the number of messages published [int >= 0]
+        _bytes:    the bytes of the messages published, each counted once [int >= 0]
+        _encodeTime: the seconds spent encoding [float >= 0]
+        _thread:   the sender thread [threading.Thread]
+    """
+
+    def __init__(self, port=SPECTATE_PORT, host='127.0.0.1'):
+        """
+        Initializes a server listening on host and port, and starts its thread
+
+        Parameter port: the port, or 0 for any free port
+        Precondition: port is an int in 0..65535
+
+        Parameter host: the address to listen on
+        Precondition: host is a string
+        """
+        self._encoder = StreamEncoder()
+        self._listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listen.bind((host, port))
+        self._listen.listen()
+        self._listen.setblocking(False)
+        self._outbox = queue.Queue()
+        self._wantKey = threading.Event()
+        self._stop = threading.Event()
+        self._viewers = []
+        self._count = 0
+        self._messages = 0
+        self._bytes = 0
+        self._encodeTime = 0.0
+        self._thread = threading.Thread(target=self._run, name='spectate', daemon=True)
+        self._thread.start()
+
+    def getPort(self):
+        """
+        Returns the port the server listens on
+        """
+        return self._listen.getsockname()[1]
+
+    def getStats(self):
+        """
+        Returns the number of 'viewers', of 'messages' published, the mean
+        'bytesPerMessage' and the mean 'encodeMs' of a message, as a dict
+        """
+        messages = max(self._messages, 1)
+        return {'viewers': self._count, 'messages': self._messages,
+                'bytesPerMessage': self._bytes / messages,
+                'encodeMs': 1000 * self._encodeTime / messages}
+
+    def publish(self, wave):
+        """
+        Encodes the state of wave and hands it to the sender thread. This never
+        blocks on a viewer.
+
+        Parameter wave: the wave
+        Precondition: wave is a Wave object
+        """
+        start = time.perf_counter()
+        message = self._encoder.encode(wave)
+        key = None
+        if (message[:1] == b'K'):
+            key = message
+        elif (self._wantKey.is_set()):
+            self._wantKey.clear()
+            key = self._encoder.keyframe()
+        self._encodeTime = self._encodeTime + time.perf_counter() - start
+        self._messages = self._messages + 1
+        self._bytes = self._bytes + len(message)
+        frame = _FRAME.pack(len(message)) + message
+        if (key is message):
+            key = frame
+        elif (key != None):
+            key = _FRAME.pack(len(key)) + key
+        self._outbox.put((frame, key))
+
+    def close(self):
+        """
+        Stops the sender thread and closes every connection
+        """
+        self._stop.set()
+        self._thread.join()
+        for viewer in self._viewers:
+            viewer.sock.close()
+        self._listen.close()
+
+    def _run(self):
+        """
+        Accepts viewers and sends them the published messages until closed
+        """
+        while (not self._stop.is_set()):
+            self._accept()
+            try:
+                self._send(*self._outbox.get(timeout=SPECTATE_POLL))
+                while (True):
+                    self._send(*self._outbox.get_nowait())
+            except queue.Empty:
+                pass
+            for viewer in list(self._viewers):
+                try:
+                    viewer.flush()
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    self._viewers.remove(viewer)
+                    viewer.sock.close()
+            self._count = len(self._viewers)
+
+    def _accept(self):
+        """
+        Accepts every viewer waiting to connect
+        """
+        while (True):
+            try:
+                sock, address = self._listen.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._viewers.append(_Viewer(sock))
+            self._wantKey.set()
+
+    def _send(self, delta, key):
+        """
+        Queues a message for every viewer: the keyframe for viewers that need
+        one, if there is one, and the delta for the others
+
+        Parameter delta: the framed message for viewers that are up to date
+        Precondition: delta is a bytes object
+
+        Parameter key: the framed keyframe of the same tick, or None
+        Precondition: key is a bytes object or None
+        """
+        for viewer in self._viewers:
+            if (key != None and (viewer.needKey or delta is key)):
+                viewer.push(key)
+                viewer.needKey = False
+            elif (not viewer.needKey):
+                viewer.push(delta)
+                if (viewer.backlog > SPECTATE_BACKLOG):
+                    viewer.drop()
+                    self._wantKey.set()
+
+
+class SpectatorClient(object):
+    """
+    A class to follow the stream of a SpectatorServer into a SpectatorView.
+    INSTANCE ATTRIBUTES:
+        _sock:     the connection to the server [socket.socket]
+        _buffer:   the bytes received and not yet applied [bytearray]
+        _view:     the state of the stream [SpectatorView]
+        _messages: the number of messages applied [int >= 0]
+        _bytes:    the number of bytes received [int >= 0]
+    """
+
+    def __init__(self, port=SPECTATE_PORT, host='127.0.0.1'):
+        """
+        Initializes a client connected to the server on host and port
+
+        Parameter port: the port of the server
+        Precondition: port is an int in 1..65535
+
+        Parameter host: the address of the server
+        Precondition: host is a string
+        """
+        self._sock = socket.create_connection((host, port))
+        self._sock.setblocking(False)
+        self._buffer = bytearray()
+        self._view = SpectatorView()
+        self._messages = 0
+        self._bytes = 0
+
+    def getView(self):
+        """
+        Returns the state of the stream [SpectatorView]
+        """
+        return self._view
+
+    def getStats(self):
+        """
+        Returns the number of 'messages' applied and 'bytes' received, as a dict
+        """
+        return {'messages': self._messages, 'bytes': self._bytes}
+
+    def poll(self):
+        """
+        Applies every complete message received so far without blocking, and
+        returns the number applied
+
+        Raises ConnectionError if the server has closed the stream.
+        """
+        while (True):
+            try:
+                data = self._sock.recv(1 << 16)
+            except BlockingIOError:
+                break
+            if (len(data) == 0):
+                raise ConnectionError('the spectator server closed the stream')
+            self._buffer.extend(data)
+            self._bytes = self._bytes + len(data)
+        count = 0
+        at = 0
+        while (len(self._buffer) - at >= _FRAME.size):
+            size = _FRAME.unpack_from(self._buffer, at)[0]
+            if (len(self._buffer) - at - _FRAME.size < size):
+                break
+            start = at + _FRAME.size
+            self._view.apply(bytes(self._buffer[start:start + size]))
+            at = start + size
+            count = count + 1
+        del self._buffer[:at]
+        self._messages = self._messages + count
+        return count
+
+    def close(self):
+        """
+        Closes the connection
+        """
+        self._sock.close()
+
+
+def _state(wave):
+    """
+    Returns what a viewer must agree on with wave: the tick, lives, score,
+    alive bits, the positions of the formation and ship, and the sorted bolts
+
+    Parameter wave: the wave or view
+    Precondition: wave is a Wave or a ready SpectatorView
+    """
+    aliens = wave.getAliens()
+    ship = wave.getShip()
+    bolts = []
+    for pool in (wave.getShipBolts(), wave.getAlienBolts()):
+        bolts.append(sorted((pool.getX(i), pool.getY(i)) for i in range(pool.getCount())))
+    return (wave.getTicks(), wave.getLives(), wave.getScore(), aliens.packAlive(),
+            aliens.getX(0), aliens.getY(0), None if ship == None else ship.x, bolts)
+
+
+def main(argv):
+    """
+    Streams headless waves played by the hunter policy to local viewers and
+    reports the cost of encoding and the bandwidth. Returns the exit status:
+    1 if a viewer ended up out of step with the wave, else 0
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    from headless import ScriptedInput, hunterPolicy
+    from wave import Wave
+    parser = argparse.ArgumentParser(prog='spectate.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--viewers', type=int, default=8)
+    parser.add_argument('--ticks', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args, rest = parser.parse_known_args(argv)
+    config = loadConfig(rest)
+
+    server = SpectatorServer(0)
+    clients = [SpectatorClient(server.getPort()) for i in range(args.viewers)]
+    while (server.getStats()['viewers'] < args.viewers):
+        time.sleep(SPECTATE_POLL)
+    seed = args.seed
+    wave = Wave(seed, config)
+    input = ScriptedInput(hunterPolicy, wave)
+    for t in range(args.ticks):
+        if (wave.isBelowLine() or wave.noAliensAlive() or wave.getLives() == 0):
+            seed = seed + 1
+            wave = Wave(seed, config)
+            input = ScriptedInput(hunterPolicy, wave)
+        elif (wave.getShip() == None):
+            wave.setShip(wave.createShip())
+        wave.tick(input)
+        input.advance()
+        server.publish(wave)
+        for client in clients:
+            client.poll()
+
+    stats = server.getStats()
+    deadline = time.perf_counter() + 5
+    while (time.perf_counter() < deadline and
+           any(client.getView().getTicks() != wave.getTicks() for client in clients)):
+        time.sleep(SPECTATE_POLL)
+        for client in clients:
+            client.poll()
+    behind = [i for i, client in enumerate(clients)
+              if not client.getView().isReady() or _state(client.getView()) != _state(wave)]
+    print('%d viewers, %d messages, %.1f bytes per message, %.4f ms to encode'
+          % (stats['viewers'], stats['messages'], stats['bytesPerMessage'], stats['encodeMs']))
+    print('received per viewer: %.0f bytes' % (sum(c.getStats()['bytes'] for c in clients) / len(clients)))
+    print('viewers in step with the wave: %d of %d' % (len(clients) - len(behind), len(clients)))
+    for client in clients:
+        client.close()
+    server.close()
+    return 1 if len(behind) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,194 @@
+"""
+Startup benchmark for Alien Invaders
+
+Measures, in fresh interpreters, how long each entry point takes to import
+and which of the heavy stacks in STARTUP_PROBES it loads. The simulation
+entry points must never load the graphics and audio stack of game2d: the
+run fails if one of them does. With --app it also launches the game and
+times the first frame, from starting the interpreter to the end of the
+first Invaders.draw (the "Press 'Q' to Play" message).
+
+Every time is the median of STARTUP_REPEATS runs, and the time to start an
+interpreter that imports nothing is reported for comparison.
+
+    python startup.py
+    python startup.py --app --repeats=9
+"""
+from consts import *
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+# the entry points that only simulate, and must not load STARTUP_GRAPHICS
+STARTUP_SIMULATION = ('headless', 'replay', 'vecenv', 'batch', 'bench', 'swarm', 'spectate',
+                      'inputs')
+# the entry point of the game itself
+STARTUP_APP = 'app'
+# the top-level modules of the graphics and audio stack
+STARTUP_GRAPHICS = ('game2d', 'kivy', 'pygame')
+# the heavy stacks reported as loaded by each entry point
+STARTUP_PROBES = ('numpy',) + STARTUP_GRAPHICS
+# the number of runs per measurement
+STARTUP_REPEATS = 5
+# the seconds a launched game has to draw its first frame
+STARTUP_TIMEOUT = 60
+
+# imports a module and prints the seconds it took and the top-level modules loaded
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import %s
+print(time.perf_counter() - start)
+print(' '.join(sorted(set(name.split('.')[0] for name in sys.modules))))
+"""
+
+# launches the game and exits as soon as the first frame is drawn
+_FRAME_SCRIPT = """
+import os
+from app import *
+class FirstFrame(Invaders):
+    def draw(self):
+        Invaders.draw(self)
+        os._exit(0)
+FirstFrame(width=GAME_WIDTH, height=GAME_HEIGHT).run()
+os._exit(1)
+"""
+
+
+def _median(values):
+    """
+    Returns the median of values
+
+    Parameter values: the values
+    Precondition: values is a non-empty list of numbers
+    """
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def _run(script):
+    """
+    Runs script in a fresh interpreter in the directory of this module, and
+    returns (wall seconds, CompletedProcess)
+
+    Parameter script: the Python source to run
+    Precondition: script is a string
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            timeout=STARTUP_TIMEOUT)
+    return time.perf_counter() - start, result
+
+
+def _error(result):
+    """
+    Returns the last line of the error output of result [str]
+
+    Parameter result: a process that failed
+    Precondition: result is a CompletedProcess
+    """
+    lines = result.stderr.strip().split('\n')
+    return lines[-1] if lines[-1] else 'exit status ' + str(result.returncode)
+
+
+def measureImport(module, repeats=STARTUP_REPEATS):
+    """
+    Imports module in repeats fresh interpreters and returns a dict with the
+    median 'seconds' of the import and the STARTUP_PROBES it 'loaded', or
+    with only an 'error' if it cannot be imported
+
+    Parameter module: the module to import
+    Precondition: module is a string naming a module of this package
+
+    Parameter repeats: the number of runs
+    Precondition: repeats is an int > 0
+    """
+    times = []
+    for i in range(repeats):
+        elapsed, result = _run(_IMPORT_SCRIPT % module)
+        if (result.returncode != 0):
+            return {'error': _error(result)}
+        lines = result.stdout.split('\n')
+        times.append(float(lines[0]))
+        loaded = set(lines[1].split())
+    return {'seconds': _median(times),
+            'loaded': [name for name in STARTUP_PROBES if name in loaded]}
+
+
+def measureInterpreter(repeats=STARTUP_REPEATS):
+    """
+    Returns the median seconds to start and exit an interpreter that imports
+    nothing
+
+    Parameter repeats: the number of runs
+    Precondition: repeats is an int > 0
+    """
+    return _median([_run('pass')[0] for i in range(repeats)])
+
+
+def measureFirstFrame(repeats=STARTUP_REPEATS):
+    """
+    Launches the game repeats times and returns a dict with the median
+    'seconds' from starting the interpreter to the end of the first frame,
+    or with only an 'error' if the game cannot start
+
+    Parameter repeats: the number of runs
+    Precondition: repeats is an int > 0
+    """
+    times = []
+    for i in range(repeats):
+        try:
+            elapsed, result = _run(_FRAME_SCRIPT)
+        except subprocess.TimeoutExpired:
+            return {'error': 'no frame within %d seconds' % STARTUP_TIMEOUT}
+        if (result.returncode != 0):
+            return {'error': _error(result)}
+        times.append(elapsed)
+    return {'seconds': _median(times)}
+
+
+def main(argv):
+    """
+    Runs the startup benchmark from the command line arguments argv and
+    prints its report. Returns the exit status: 1 if a simulation entry
+    point loads the graphics stack, else 0
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    parser = argparse.ArgumentParser(prog='startup.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--repeats', type=int, default=STARTUP_REPEATS)
+    parser.add_argument('--app', action='store_true', help='also time the first frame of the game')
+    args = parser.parse_args(argv)
+
+    status = 0
+    print('%-12s %10s  %s' % ('entry point', 'import ms', 'loads'))
+    print('%-12s %10.1f' % ('(python)', 1000 * measureInterpreter(args.repeats)))
+    for module in STARTUP_SIMULATION + (STARTUP_APP,):
+        result = measureImport(module, args.repeats)
+        if ('error' in result):
+            print('%-12s %10s  %s' % (module, '-', result['error']))
+            continue
+        graphics = [name for name in result['loaded'] if name in STARTUP_GRAPHICS]
+        note = ''
+        if (module != STARTUP_APP and len(graphics) > 0):
+            note = '  FAIL: loads the graphics stack'
+            status = 1
+        print('%-12s %10.1f  %s%s' % (module, 1000 * result['seconds'],
+                                      ' '.join(result['loaded']), note))
+
+    if (args.app):
+        result = measureFirstFrame(args.repeats)
+        if ('error' in result):
+            print('first frame: ' + result['error'])
+        else:
+            print('first frame: %.1f ms after launch' % (1000 * result['seconds']))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,119 @@
+"""
+Swarm stress mode for Alien Invaders
+
+The load test for the engine: a headless Wave in a world much larger than
+the window, with a formation of thousands of aliens, tight spacing, rapid
+spread fire from the ship and volleys of alien bolts. Every tick is timed
+against the budget of one frame at TICK_RATE frames per second, and the run
+reports how much of the budget a tick uses and how often it goes over.
+
+The swarm is a GameConfig; any setting can be changed on the command line.
+
+    python swarm.py
+    python swarm.py --rows=60 --cols=150 --seconds=30 --profile
+"""
+from consts import *
+from config import *
+from headless import *
+import argparse
+import numpy as np
+import profiler
+import sys
+import time
+
+
+# the settings of the default swarm
+SWARM_CONFIG = GameConfig(width=4000, height=3000, rows=40, cols=100, alienHSep=6, alienVSep=6,
+                          boltRate=1, volley=16, shipBoltLimit=60, spread=5)
+# the number of seconds of game time simulated by default
+SWARM_SECONDS = 60
+
+
+def runSwarm(config=SWARM_CONFIG, seconds=SWARM_SECONDS, seed=0, policy=sweepPolicy):
+    """
+    Plays a swarm for seconds of game time, starting over with the next seed
+    whenever a wave ends, and returns the report as a dict with:
+    'aliens' (in the formation), 'ticks', 'ticksPerSec', the 'budget' of a
+    tick and the 'p50', 'p95', 'p99' and 'max' tick in milliseconds,
+    'overBudget' (the number of ticks over it), 'budgetUsed' (the p99 tick as
+    a fraction of the budget), 'peakBolts' (the most bolts in play at once),
+    and 'waves' (the number of waves started)
+
+    Parameter config: the settings of the swarm
+    Precondition: config is a GameConfig
+
+    Parameter seconds: the game time to simulate
+    Precondition: seconds is an int or float > 0
+
+    Parameter seed: the seed of the first wave
+    Precondition: seed is an int >= 0
+
+    Parameter policy: the policy at the controls
+    Precondition: policy is a function policy(tick, wave) as in headless.py
+    """
+    ticks = int(seconds * TICK_RATE)
+    times = np.zeros(ticks)
+    peak = 0
+    waves = 0
+    wave = None
+    clock = time.perf_counter
+    for t in range(ticks):
+        if (wave == None or wave.isBelowLine() or wave.noAliensAlive() or wave.getLives() == 0):
+            wave = Wave(seed + waves, config)
+            input = ScriptedInput(policy, wave)
+            waves = waves + 1
+        elif (wave.getShip() == None):
+            wave.setShip(wave.createShip())
+        start = clock()
+        wave.tick(input)
+        times[t] = clock() - start
+        input.advance()
+        peak = max(peak, wave.getShipBolts().getCount() + wave.getAlienBolts().getCount())
+    aliens = wave.getAliens().getRows() * wave.getAliens().getCols()
+
+    ms = times * 1000
+    budget = TICK * 1000
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    return {'aliens': aliens, 'ticks': ticks, 'ticksPerSec': ticks / times.sum(),
+            'budget': budget, 'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            'max': float(ms.max()), 'overBudget': int((ms > budget).sum()),
+            'budgetUsed': float(p99) / budget, 'peakBolts': peak, 'waves': waves}
+
+
+def main(argv):
+    """
+    Runs a swarm from the command line arguments argv and prints its report.
+    Returns the exit status: 1 if the p99 tick is over the frame budget, else 0
+
+    Parameter argv: the command line arguments, without the program name
+    Precondition: argv is a list of str
+    """
+    parser = argparse.ArgumentParser(prog='swarm.py', description=__doc__.split('\n')[1])
+    parser.add_argument('--seconds', type=float, default=SWARM_SECONDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', action='store_true', help='also report the cost of each phase')
+    args, rest = parser.parse_known_args(argv)
+    config = loadConfig(rest, base=SWARM_CONFIG)
+
+    prof = None
+    if (args.profile):
+        prof = profiler.Profiler()
+        profiler.setProfiler(prof)
+    try:
+        report = runSwarm(config, args.seconds, args.seed)
+    finally:
+        profiler.setProfiler(None)
+
+    print('%(aliens)d aliens, %(ticks)d ticks in %(waves)d waves, '
+          'peak %(peakBolts)d bolts, %(ticksPerSec).0f ticks/s' % report)
+    print('tick (ms)   p50 %(p50).3f  p95 %(p95).3f  p99 %(p99).3f  max %(max).3f' % report)
+    print('budget      %.2f ms per frame at %d fps: p99 uses %.0f%%, %d ticks over'
+          % (report['budget'], TICK_RATE, 100 * report['budgetUsed'], report['overBudget']))
+    if (prof != None):
+        print()
+        print(prof.report())
+    return 1 if report['budgetUsed'] > 1 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
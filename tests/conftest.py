@@ -0,0 +1,14 @@
+"""
+Test configuration for Alien Invaders
+
+The modules of the game sit at the top of the repository and are imported
+by name, and wave.py shadows the standard library module of the same name,
+so the repository is put first on the path before any test imports them.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if (sys.path[:1] != [ROOT]):
+    sys.path.insert(0, ROOT)
+sys.modules.pop('wave', None)
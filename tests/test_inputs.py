@@ -0,0 +1,46 @@
+"""
+Tests of the input sampler in inputs.py
+
+A press shorter than a frame that runs no tick must still reach the next
+tick, and its latency is measured to the tick that reads it.
+"""
+from inputs import *
+from wave import Wave
+
+
+class Keyboard(object):
+    """
+    A keyboard with a set of held keys, standing in for GInput
+    """
+
+    def __init__(self):
+        self.keys = set()
+
+    def is_key_down(self, key):
+        return key in self.keys
+
+
+def test_short_tap_is_latched():
+    """
+    Checks that a tap held for one frame with no tick still fires a bolt,
+    within one tick of the press
+    """
+    now = [0.0]
+    sampler = InputSampler(clock=lambda: now[0])
+    keyboard = Keyboard()
+    wave = Wave(0)
+    dt = TICK / 4
+    for frame in range(8):
+        keyboard.keys = {'spacebar'} if frame == 1 else set()
+        snapshot = sampler.sample(keyboard)
+        ticks = wave.getTicks()
+        lag = wave.getAlpha() * TICK
+        wave.update(snapshot, dt)
+        if (wave.getTicks() > ticks):
+            sampler.simulated(snapshot, lag, dt)
+        now[0] += dt
+    assert wave.getShipBolts().getCount() == 1
+    stats = sampler.getStats()
+    assert stats['presses'] == 1
+    assert stats['late'] == 0
+    assert stats['maxMs'] <= TICK * 1000
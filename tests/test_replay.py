@@ -0,0 +1,52 @@
+"""
+Tests of the replay file in replay.py
+
+A replay of a game of several levels, saved and loaded again, must play
+back to the same final state, with the lives and score carried between
+levels.
+"""
+from config import GameConfig
+from headless import ScriptedInput, hunterPolicy
+from levels import levelConfig
+from replay import *
+
+
+def test_replay_round_trip(tmp_path):
+    """
+    Records three levels into one replay as the app does, and checks that
+    the saved file plays back to the final state of the game
+    """
+    base = GameConfig(rows=2, cols=4)
+    wave = None
+    results = []
+    for level in range(1, 4):
+        next = Wave(100 + level, levelConfig(base, level))
+        if (wave == None):
+            replay = Replay(next.getSeed(), config=next.getConfig())
+        else:
+            next.carryOver(wave)
+            replay = wave.getRecorder()
+            replay.addLevel(next.getSeed(), next.getConfig())
+        next.setRecorder(replay)
+        wave = next
+        input = ScriptedInput(hunterPolicy, wave)
+        while (not wave.noAliensAlive() and not wave.isBelowLine()):
+            if (wave.getShip() == None):
+                assert wave.getLives() > 0
+                wave.setShip(wave.createShip())
+            wave.tick(input)
+            input.advance()
+        results.append((wave.getScore(), wave.getLives()))
+
+    path = str(tmp_path / 'game.air')
+    replay.save(path)
+    loaded = loadReplay(path)
+    assert loaded.getLevels() == 3
+    for level in range(loaded.getLevels()):
+        assert loaded.getLevel(level) == replay.getLevel(level)
+    assert loaded.getTicks() == replay.getTicks()
+
+    back = playReplay(loaded)
+    assert results[0][0] < results[1][0] < results[2][0]
+    assert (back.getScore(), back.getLives()) == results[-1]
+    assert back.snapshot() == wave.snapshot()
@@ -0,0 +1,74 @@
+"""
+Tests that VecWave plays like Wave
+
+A VecWave game given random.Random(seed) must stay identical to Wave(seed)
+under headless.runWave with the same keys, tick for tick, until it ends.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from headless import ScriptedInput
+from vecenv import *
+from wave import Wave
+
+
+# the keys of each action bit, as in a replay
+ACTION_KEYS = ((ACTION_LEFT, 'left'), (ACTION_RIGHT, 'right'), (ACTION_FIRE, 'spacebar'))
+
+
+def boltPositions(pool):
+    """
+    Returns the sorted (x, y) of every bolt in pool [list of tuples]
+    """
+    return sorted((pool.getX(i), pool.getY(i)) for i in range(pool.getCount()))
+
+
+def waveOutcome(wave):
+    """
+    Returns the OUTCOME constant of wave after a tick, as headless.runWave
+    decides it
+    """
+    if (wave.isBelowLine()):
+        return OUTCOME_LINE
+    elif (wave.noAliensAlive()):
+        return OUTCOME_WIN
+    elif (wave.getShip() == None and wave.getLives() == 0):
+        return OUTCOME_DEAD
+    return OUTCOME_NONE
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_parity(seed):
+    """
+    Plays a Wave and a one-game VecWave with the same seed and random keys
+    and checks that their states agree after every tick
+    """
+    moves = random.Random(1000 + seed)
+    actions = [moves.randrange(8) for _ in range(20000)]
+    wave = Wave(seed)
+    input = ScriptedInput([[key for bit, key in ACTION_KEYS if action & bit]
+                           for action in actions], wave)
+    vec = VecWave(1, rngs=[random.Random(seed)])
+    vec.reset()
+
+    for action in actions:
+        wave.tick(input)
+        input.advance()
+        obs, rewards, dones, info = vec.step(np.array([action]))
+        if (dones[0]):
+            assert info['outcome'][0] == waveOutcome(wave)
+            assert info['score'][0] == wave.getScore()
+            return
+        assert obs['score'][0] == wave.getScore()
+        assert obs['lives'][0] == wave.getLives()
+        assert waveOutcome(wave) == OUTCOME_NONE
+        if (wave.getShip() == None):
+            wave.setShip(wave.createShip())
+        assert obs['shipX'][0] == pytest.approx(wave.getShip().x)
+        assert (obs['alive'][0] == wave.getAliens().getAlive()).all()
+        assert obs['boltOn'][0] == (wave.getShipBolts().getCount() == 1)
+        bolts = obs['alienBolts'][0][obs['alienBoltsOn'][0]]
+        assert sorted(map(tuple, bolts)) == pytest.approx(boltPositions(wave.getAlienBolts()))
+    pytest.fail('the game did not end')
@@ -0,0 +1,74 @@
+"""
+Tests of the simulation core in wave.py
+
+These check that a snapshot restores the exact state of a wave, and that
+fast bolts hit what they pass through on their last tick on the screen.
+"""
+import pytest
+
+from config import GameConfig
+from headless import ScriptedInput, hunterPolicy
+from wave import Wave
+
+
+def play(wave, input, ticks):
+    """
+    Plays ticks ticks of wave, respawning the ship as headless.runWave does
+    """
+    for _ in range(ticks):
+        if (wave.getShip() == None and wave.getLives() > 0):
+            wave.setShip(wave.createShip())
+        wave.tick(input)
+        input.advance()
+
+
+def test_snapshot_restore():
+    """
+    Checks that a wave restored from a snapshot plays on exactly like the
+    wave it was taken from
+    """
+    wave = Wave(7)
+    input = ScriptedInput(hunterPolicy, wave)
+    play(wave, input, 400)
+    state = wave.snapshot()
+
+    copy = Wave(99)
+    copy.restore(state)
+    assert copy.snapshot() == state
+
+    twin = ScriptedInput(hunterPolicy, copy)
+    for _ in range(input.getTick()):
+        twin.advance()
+    play(wave, input, 600)
+    play(copy, twin, 600)
+    assert copy.snapshot() == wave.snapshot()
+    assert copy.getScore() == wave.getScore()
+
+
+@pytest.mark.parametrize('speed', [60, 90, 120])
+def test_alien_bolt_hits_ship_at_bottom_edge(speed):
+    """
+    Checks that an alien bolt that crosses the ship and leaves the bottom
+    of the screen in one tick still destroys the ship
+    """
+    wave = Wave(0, GameConfig(boltSpeed=speed))
+    wave.getAlienBolts().add(wave.getShip().x, 90)
+    wave.tick(ScriptedInput())
+    assert wave.getShip() == None
+    assert wave.getLives() == wave.getConfig().shipLives - 1
+    assert wave.getAlienBolts().getCount() == 0
+
+
+@pytest.mark.parametrize('speed', [150, 300])
+def test_ship_bolt_hits_alien_at_top_edge(speed):
+    """
+    Checks that a ship bolt that crosses the top row and leaves the top of
+    the screen in one tick still kills an alien
+    """
+    wave = Wave(0, GameConfig(boltSpeed=speed, alienCeiling=0))
+    aliens = wave.getAliens()
+    wave.getShipBolts().add(aliens.getX(0), aliens.getY(0) - 40)
+    wave.tick(ScriptedInput())
+    assert wave.getScore() > 0
+    assert len(aliens.getKills()) == 1
+    assert wave.getShipBolts().getCount() == 0
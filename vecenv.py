@@ -0,0 +1,442 @@
+"""
+Vectorized environment module for Alien Invaders
+
+VecWave runs N independent games in lockstep for training agents. Each call
+to step advances every game by one tick of Wave.tick, with the whole batch
+stored as NumPy arrays (one leading axis of length N) and updated with array
+operations, so there are no per-game Python objects in the loop.
+
+The rules are the ones of Wave and headless.runWave: the snaking march, one
+ship bolt at a time, alien bolts fired from the lowest alien of a random live
+column every few steps, scoring by row, respawning while lives remain, and
+ending when an alien reaches the defense line, every alien is dead or the
+ship is out of lives. By default the random draws come from one NumPy
+generator for the whole batch. Pass rngs, one random.Random per game, to
+draw each game's numbers from its own generator instead. The draws are made
+in the order Wave makes them, so a game whose generator is
+random.Random(seed) plays tick for tick like Wave(seed) under
+headless.runWave with the same keys, until the game ends.
+
+An action is a bitmask of ACTION_LEFT, ACTION_RIGHT and ACTION_FIRE; these
+are the same bits as 'left', 'right' and 'spacebar' in a replay.
+"""
+from consts import *
+from config import *
+import numpy as np
+
+
+# action bit to move the ship left
+ACTION_LEFT  = 1
+# action bit to move the ship right
+ACTION_RIGHT = 2
+# action bit to fire a bolt
+ACTION_FIRE  = 4
+
+# outcome of a game that is still being played
+OUTCOME_NONE    = 0
+# outcome of a game where every alien was destroyed
+OUTCOME_WIN     = 1
+# outcome of a game where an alien reached the defense line
+OUTCOME_LINE    = 2
+# outcome of a game where the ship ran out of lives
+OUTCOME_DEAD    = 3
+# outcome of a game stopped after the tick limit
+OUTCOME_TIMEOUT = 4
+
+
+def rowScores(rows):
+    """
+    Returns the points for killing an alien in each row, as in
+    Wave.alienCollision [int array of shape (rows,)]
+
+    Parameter rows: the number of rows
+    Precondition: rows is an int > 0
+    """
+    scores = np.full(rows, 30, dtype=np.int64)
+    scores[2:4] = 20
+    if (rows > 4):
+        scores[4] = 10
+    return scores
+
+
+class VecWave(object):
+    """
+    A class to play N games of Alien Invaders in lockstep.
+
+    Alien positions are stored as a base position per column and per row
+    plus one formation offset per game, since the aliens of a game always
+    march together.
+    INSTANCE ATTRIBUTES:
+        n:          the number of games [int > 0]
+        maxTicks:   the tick limit of each game, or None [int > 0 or None]
+        _config:    the settings of every game [GameConfig]
+        _rng:       the generator for every random draw when _rngs is None
+                    [numpy.random.Generator]
+        _rngs:      the generator of each game, or None [list of random.Random or None]
+        _colx:      the x coordinate of each column at the start [float array (C,)]
+        _rowy:      the y coordinate of each row at the start [float array (R,)]
+        _scores:    the points per row [int array (R,)]
+        _alive:     the alive mask of each formation [bool array (N, R, C)]
+        _ox, _oy:   the formation offset of each game [float arrays (N,)]
+        _right:     True if the formation is moving right [bool array (N,)]
+        _verts:     True if the formation has stepped sideways since it last
+                    moved down [bool array (N,)]
+        _time:      ticks since the last alien step [int array (N,)]
+        _fire:      alien steps until the next alien bolt [int array (N,)]
+        _shipX:     the x coordinate of the ship [float array (N,)]
+        _shipAlive: True if the ship has not been destroyed [bool array (N,)]
+        _lives:     the lives left [int array (N,)]
+        _score:     the score [int array (N,)]
+        _ticks:     the ticks played [int array (N,)]
+        _boltOn:    True if the ship bolt is in flight [bool array (N,)]
+        _boltX, _boltY: the center of the ship bolt [float arrays (N,)]
+        _alienOn:   which alien bolt slots are in use [bool array (N, K)]
+        _alienX, _alienY: the centers of the alien bolts [float arrays (N, K)]
+    """
+
+    def __init__(self, n, seed=None, maxTicks=None, config=DEFAULT_CONFIG, rngs=None):
+        """
+        Initializes n games; call reset before the first step
+
+        Raises ValueError if config allows more than one ship bolt, or more
+        than one alien bolt per volley.
+
+        Parameter n: the number of games
+        Precondition: n is an int > 0
+
+        Parameter seed: the seed of the random number generator, or None
+        Precondition: seed is an int or None
+
+        Parameter maxTicks: the tick limit of each game, or None for no limit
+        Precondition: maxTicks is an int > 0 or None
+
+        Parameter config: the settings of every game
+        Precondition: config is a GameConfig
+
+        Parameter rngs: the generator of each game, replacing the one seeded
+        by seed, or None
+        Precondition: rngs is None or a list of n objects with the randint
+        method of random.Random
+        """
+        if (config.shipBoltLimit != 1 or config.spread != 1 or config.volley != 1):
+            raise ValueError('VecWave only supports one ship bolt and one alien bolt at a time')
+        self.n = n
+        self.maxTicks = maxTicks
+        self._config = config
+        self._rng = np.random.default_rng(seed)
+        self._rngs = None if rngs is None else list(rngs)
+        self._colx = np.array(config.colx)
+        self._rowy = np.array(config.rowy)
+        self._scores = rowScores(config.rows)
+        # an alien bolt lives at most this many ticks, and a formation fires
+        # at most once every two steps
+        life = config.height // config.boltSpeed + 2
+        slots = life // (2 * config.stepTicks) + 2
+        self._alive = np.zeros((n, config.rows, config.cols), dtype=bool)
+        self._ox = np.zeros(n)
+        self._oy = np.zeros(n)
+        self._right = np.zeros(n, dtype=bool)
+        self._verts = np.zeros(n, dtype=bool)
+        self._time = np.zeros(n, dtype=np.int64)
+        self._fire = np.zeros(n, dtype=np.int64)
+        self._shipX = np.zeros(n)
+        self._shipAlive = np.zeros(n, dtype=bool)
+        self._lives = np.zeros(n, dtype=np.int64)
+        self._score = np.zeros(n, dtype=np.int64)
+        self._ticks = np.zeros(n, dtype=np.int64)
+        self._boltOn = np.zeros(n, dtype=bool)
+        self._boltX = np.zeros(n)
+        self._boltY = np.zeros(n)
+        self._alienOn = np.zeros((n, slots), dtype=bool)
+        self._alienX = np.zeros((n, slots))
+        self._alienY = np.zeros((n, slots))
+
+    def reset(self, mask=None):
+        """
+        Starts new games and returns the observation of every game
+
+        Parameter mask: which games to restart, or None for all of them
+        Precondition: mask is a bool array of shape (n,) or None
+        """
+        c = self._config
+        if (mask is None):
+            mask = np.ones(self.n, dtype=bool)
+        self._alive[mask] = True
+        self._ox[mask] = 0
+        self._oy[mask] = 0
+        self._right[mask] = True
+        self._verts[mask] = False
+        self._time[mask] = 0
+        self._fire[mask] = self._randint(np.flatnonzero(mask), 1, c.boltRate)
+        self._shipX[mask] = c.width/2
+        self._shipAlive[mask] = True
+        self._lives[mask] = c.shipLives
+        self._score[mask] = 0
+        self._ticks[mask] = 0
+        self._boltOn[mask] = False
+        self._alienOn[mask] = False
+        return self.observe()
+
+    def observe(self):
+        """
+        Returns a copy of the state of every game, as a dict of arrays:
+        'alive' (N, R, C), 'alienX' (N, C), 'alienY' (N, R), 'shipX' (N,),
+        'shipAlive' (N,), 'bolt' (N, 2) with 'boltOn' (N,), 'alienBolts'
+        (N, K, 2) with 'alienBoltsOn' (N, K), 'lives' (N,) and 'score' (N,)
+        """
+        return {'alive': self._alive.copy(),
+                'alienX': self._colx + self._ox[:, None],
+                'alienY': self._rowy + self._oy[:, None],
+                'shipX': self._shipX.copy(),
+                'shipAlive': self._shipAlive.copy(),
+                'bolt': np.stack((self._boltX, self._boltY), axis=1),
+                'boltOn': self._boltOn.copy(),
+                'alienBolts': np.stack((self._alienX, self._alienY), axis=2),
+                'alienBoltsOn': self._alienOn.copy(),
+                'lives': self._lives.copy(),
+                'score': self._score.copy()}
+
+    def step(self, actions):
+        """
+        Plays one tick of every game and returns (obs, rewards, dones, info)
+
+        rewards is the score gained this tick, dones says which games ended,
+        and info is a dict with 'outcome' (one of the OUTCOME constants per
+        game) and 'score' (the final score of the games that ended). Games
+        that end are restarted at once, so obs shows their new game.
+
+        Parameter actions: the action of each game
+        Precondition: actions is an int array of shape (n,), each a bitmask
+        of ACTION_LEFT, ACTION_RIGHT and ACTION_FIRE
+        """
+        c = self._config
+        actions = np.asarray(actions)
+        before = self._score.copy()
+        self._ticks += 1
+        self._moveShip(actions)
+        self._moveAliens()
+        self._createShipBolt(actions)
+        self._moveBolts()
+        self._shipCollision()
+        self._alienCollision()
+        self._cullBolts()
+        rewards = self._score - before
+
+        outcome = np.zeros(self.n, dtype=np.int64)
+        empty = ~self._alive.any(axis=(1, 2))
+        rows = self._alive.any(axis=2)
+        low = c.rows - 1 - np.argmax(rows[:, ::-1], axis=1)
+        below = ~empty & (self._rowy[low] + self._oy - ALIEN_HEIGHT/2 <= c.defenseLine)
+        dead = ~self._shipAlive & (self._lives == 0)
+        outcome[dead] = OUTCOME_DEAD
+        outcome[empty] = OUTCOME_WIN
+        outcome[below] = OUTCOME_LINE
+        if (self.maxTicks != None):
+            outcome[(outcome == OUTCOME_NONE) & (self._ticks >= self.maxTicks)] = OUTCOME_TIMEOUT
+        respawn = ~self._shipAlive & (outcome == OUTCOME_NONE)
+        self._shipX[respawn] = c.width/2
+        self._shipAlive[respawn] = True
+
+        dones = outcome != OUTCOME_NONE
+        info = {'outcome': outcome, 'score': np.where(dones, self._score, 0)}
+        if (dones.any()):
+            self.reset(dones)
+        return self.observe(), rewards, dones, info
+
+    def _moveShip(self, actions):
+        """
+        Moves every live ship left and/or right, as in Wave.moveShip
+
+        Parameter actions: the action of each game
+        Precondition: actions is an int array of shape (n,)
+        """
+        c = self._config
+        da = (((actions & ACTION_RIGHT) != 0).astype(np.int64)
+              - ((actions & ACTION_LEFT) != 0)) * c.shipMovement
+        x = np.clip(self._shipX + da, SHIP_WIDTH/2, c.width - SHIP_WIDTH/2)
+        self._shipX = np.where(self._shipAlive, x, self._shipX)
+
+    def _moveAliens(self):
+        """
+        Steps the formations whose step time has come and fires their alien
+        bolts, as in Wave.moveAliens and Wave.createAlienBolt
+        """
+        c = self._config
+        self._time += 1
+        step = self._time >= c.stepTicks
+        if (not step.any()):
+            return
+        self._time[step] = 0
+        cols = self._alive.any(axis=1)
+        anyCol = cols.any(axis=1)
+        left = np.where(anyCol, self._colx[np.argmax(cols, axis=1)] + self._ox - ALIEN_WIDTH/2,
+                        c.width - ALIEN_WIDTH/2)
+        right = np.where(anyCol, self._colx[c.cols - 1 - np.argmax(cols[:, ::-1], axis=1)]
+                         + self._ox + ALIEN_WIDTH/2, ALIEN_WIDTH/2)
+        down = step & self._verts & ((right + c.alienHSep > c.width) | (left < c.alienHSep))
+        side = step & ~down
+        self._oy[down] -= c.alienVWalk
+        self._verts[down] = False
+        self._right[down] = ~self._right[down]
+        self._ox[side] += np.where(self._right[side], c.alienHWalk, -c.alienHWalk)
+        self._verts[side] = True
+
+        shoot = step & (self._fire == 0) & anyCol
+        self._fire[step & ~shoot] -= 1
+        games = np.flatnonzero(shoot)
+        if (len(games) == 0):
+            return
+        live = cols[games]
+        pick = self._randint(games, 0, live.sum(axis=1) - 1)
+        col = np.argmax(np.cumsum(live, axis=1) > pick[:, None], axis=1)
+        column = self._alive[games, :, col]
+        row = c.rows - 1 - np.argmax(column[:, ::-1], axis=1)
+        slot = np.argmin(self._alienOn[games], axis=1)
+        self._alienOn[games, slot] = True
+        self._alienX[games, slot] = self._colx[col] + self._ox[games]
+        self._alienY[games, slot] = self._rowy[row] + self._oy[games]
+        self._fire[games] = self._randint(games, 1, c.boltRate)
+
+    def _randint(self, games, low, high):
+        """
+        Returns a random int in low..high for each game in games, from the
+        generator of that game if there are any [int array (len(games),)]
+
+        Parameter games: the games to draw for, in increasing order
+        Precondition: games is an int array
+
+        Parameter low: the least value
+        Precondition: low is an int
+
+        Parameter high: the greatest value, for all games or for each one
+        Precondition: high is an int >= low, or an int array of the length
+        of games
+        """
+        if (self._rngs is None):
+            return self._rng.integers(low, np.asarray(high) + 1, len(games))
+        high = np.broadcast_to(high, len(games))
+        return np.array([self._rngs[g].randint(low, int(h)) for g, h in zip(games, high)],
+                        dtype=np.int64)
+
+    def _createShipBolt(self, actions):
+        """
+        Fires a ship bolt in every game whose player fires with no ship bolt
+        in flight, as in Wave.createShipBolt
+
+        Parameter actions: the action of each game
+        Precondition: actions is an int array of shape (n,)
+        """
+        fire = self._shipAlive & ~self._boltOn & ((actions & ACTION_FIRE) != 0)
+        self._boltOn |= fire
+        self._boltX = np.where(fire, self._shipX, self._boltX)
+        self._boltY = np.where(fire, SHIP_BOTTOM + SHIP_HEIGHT, self._boltY)
+
+    def _moveBolts(self):
+        """
+        Moves every bolt, as in Wave.moveBolt
+        """
+        self._boltY += self._config.boltSpeed
+        self._alienY -= self._config.boltSpeed
+
+    def _cullBolts(self):
+        """
+        Removes the bolts that left the screen, once the collisions of the
+        tick have been checked, as in Wave.cullBolts
+        """
+        c = self._config
+        self._boltOn &= (self._boltY >= 0) & (self._boltY < c.height)
+        self._alienOn &= (self._alienY >= 0) & (self._alienY < c.height)
+
+    def _shipCollision(self):
+        """
+        Destroys every ship hit by an alien bolt on its move in the tick, and
+        removes the bolt that hit first, as in Wave.shipCollision and
+        BoltPool.findHit
+        """
+        shipY = SHIP_BOTTOM + SHIP_HEIGHT/2
+        low = shipY - SHIP_HEIGHT/2 - BOLT_HEIGHT/2
+        high = shipY + SHIP_HEIGHT/2 + BOLT_HEIGHT/2
+        y1 = self._alienY
+        y0 = y1 + self._config.boltSpeed
+        start = (low < y0) & (y0 < high)
+        end = (low < y1) & (y1 < high)
+        hits = (self._alienOn & self._shipAlive[:, None]
+                & (np.abs(self._alienX - self._shipX[:, None]) < (SHIP_WIDTH + BOLT_WIDTH)/2)
+                & (y1 < high) & (low < y0) & (end | ~start))
+        hit = hits.any(axis=1)
+        if (not hit.any()):
+            return
+        games = np.flatnonzero(hit)
+        times = np.where(hits[games], np.where(start[games], 0.0, (high - y0[games])
+                                               / (y1[games] - y0[games])), np.inf)
+        first = times == times.min(axis=1)[:, None]
+        slot = hits.shape[1] - 1 - np.argmax(first[:, ::-1], axis=1)
+        self._alienOn[games, slot] = False
+        self._shipAlive[games] = False
+        self._lives[games] -= 1
+
+    def _alienCollision(self):
+        """
+        Kills the first live alien entered by each ship bolt on its move in
+        the tick, lowest row first and then leftmost, as in Wave.alienCollision
+        and Formation.hit
+        """
+        c = self._config
+        games = np.flatnonzero(self._boltOn)
+        if (len(games) == 0):
+            return
+        x = self._boltX[games] - self._ox[games]
+        y = self._boltY[games] - self._oy[games]
+        fromY = y - c.boltSpeed
+        low = fromY - BOLT_HEIGHT/2
+        high = y + BOLT_HEIGHT/2
+        cols = [self._cell(x + dx, self._colx, ALIEN_WIDTH) for dx in (-BOLT_WIDTH/2, BOLT_WIDTH/2)]
+        pitch = np.inf
+        if (c.rows > 1):
+            pitch = (self._rowy[0] - self._rowy[-1]) / (c.rows - 1)
+        first = np.maximum(np.floor((self._rowy[0] - ALIEN_HEIGHT/2 - high) / pitch), 0).astype(np.int64)
+        last = np.minimum(np.ceil((self._rowy[0] + ALIEN_HEIGHT/2 - low) / pitch),
+                          c.rows - 1).astype(np.int64)
+        best = np.full(len(games), c.rows * c.cols)
+        # the bolt moves up, so the rows it crosses are tried from the lowest
+        for k in range(int((last - first).max(initial=-1)) + 1):
+            row = last - k
+            ok = (row >= first) & (best == c.rows * c.cols)
+            row = np.where(ok, row, 0)
+            bottom = self._rowy[row] - ALIEN_HEIGHT/2
+            top = self._rowy[row] + ALIEN_HEIGHT/2
+            ok &= ((bottom < high) & (low < top)
+                   & (~((bottom < fromY + BOLT_HEIGHT/2) & (fromY - BOLT_HEIGHT/2 < top))
+                      | ((bottom < y + BOLT_HEIGHT/2) & (y - BOLT_HEIGHT/2 < top))))
+            for col in reversed(cols):
+                alive = ok & (col >= 0)
+                alive[alive] = self._alive[games[alive], row[alive], col[alive]]
+                best = np.where(alive, row * c.cols + col, best)
+        hit = best < c.rows * c.cols
+        games = games[hit]
+        row, col = np.divmod(best[hit], c.cols)
+        self._alive[games, row, col] = False
+        self._boltOn[games] = False
+        self._score[games] += self._scores[row]
+
+    def _cell(self, v, centers, size):
+        """
+        Returns the index of the row or column whose aliens contain each
+        coordinate in v, or -1, as in Formation.rowAt and Formation.columnAt
+
+        Parameter v: the coordinates, relative to the formation offset
+        Precondition: v is a float array
+
+        Parameter centers: the centers of the rows or columns at the start
+        Precondition: centers is an evenly spaced float array
+
+        Parameter size: the height of a row or width of a column
+        Precondition: size is an int or float > 0
+        """
+        if (len(centers) == 1):
+            index = np.zeros(len(v), dtype=np.int64)
+        else:
+            index = np.rint((v - centers[0]) / (centers[1] - centers[0])).astype(np.int64)
+        index = np.where((index >= 0) & (index < len(centers)), index, 0)
+        inside = np.abs(v - centers[index]) < size/2
+        return np.where(inside, index, -1)
@@ -1,40 +1,96 @@
 """
 Subcontroller module for Alien Invaders
+
+Wave is the simulation core of the game. It has no dependency on game2d: it
+only needs an input object with the GInput methods is_key_down and key_count,
+so it can be stepped headless (see headless.py) as well as from Invaders,
+which passes it the InputSnapshot of each frame (see inputs.py).
+
+The game advances in fixed ticks of TICK seconds, and all randomness comes
+from a generator seeded per wave, so the same seed and the same input on
+each tick always play out the same game, whatever the frame rate.
+
+Every setting of a wave (the size of the world and the formation, speeds,
+fire rules) comes from the GameConfig it was made with, so waves with
+different settings can run side by side.
+
+The whole state of a wave can be saved with snapshot and put back with
+restore, for retrying from a checkpoint, and clone makes a copy to play
+ahead on, for bots that search future states.
 """
-from game2d import *
 from consts import *
+from config import *
 from models import *
+from events import *
+import audio
+import profiler
 import random
+import struct
+
+
+# the version of the snapshot format
+SNAPSHOT_VERSION = 1
+# the layout of the fixed part of a snapshot: version, ticks, _time,
+# _alienFire, _lives, _score, formation marches, _lag, formation offset x
+# and y, _directionA, _verts, whether there is a ship, ship x and prevX, and
+# the number of ship and alien bolts
+SNAPSHOT_HEADER = struct.Struct('<BIIIIIIddd???ddII')
+# the layout of the state of the random number generator
+SNAPSHOT_RNG = struct.Struct('<625I')
 
 class Wave(object):
     """
     This class controls a single level or wave of Alien Invaders.
     INSTANCE ATTRIBUTES:
+        _config: the settings of the wave [GameConfig]
         _ship:   the player ship to control [Ship]
-        _aliens: the 2d list of aliens in the wave [rectangular 2d list of Alien or None]
-        _bolts:  the laser bolts currently on screen [list of Bolt, possibly empty]
-        _dline:  the defensive line being protected [GPath]
+        _aliens: the aliens in the wave [Formation]
+        _shipBolts:  the laser bolts fired by the ship currently on screen [BoltPool]
+        _alienBolts: the laser bolts fired by the aliens currently on screen [BoltPool]
         _lives:  the number of lives left  [int >= 0]
-        _time:   The amount of time since the last Alien "step" [number >= 0]
+        _time:   The number of ticks since the last Alien "step" [int >= 0]
         _directionA: the direction (left or right) that the aliens are traveling
                      True if right, False if left [boolean]
         _verts: how many vertical positions the aliens have shifted downwards
                      True if 1, False if 0 [boolean]
-        _alienFire: how many steps the alien is allowed to fire in [random int between 1 and BOLT_RATE]
+        _alienFire: how many steps the alien is allowed to fire in [random int between 1 and boltRate]
+        TIMING EXTENSION BELOW
+        _seed:  the seed of _rng [int]
+        _rng:   the random number generator used for all alien decisions, or None
+                until a clone first needs it [random.Random or None]
+        _rngState: the state of _rng as of its last draw, kept so that clones can
+                share it, or None if it is not known [tuple or None]
+        _lag:   the time passed to update that has not been simulated yet
+                [number, 0 <= _lag < TICK]
+        _ticks: the number of ticks simulated so far [int >= 0]
+        _recorder: records the input of every tick [Replay or None]
+        _events: receives the shots, kills and deaths of the wave [EventBus or None]
         SCORE EXTENSION BELOW
         _score: Score of the current player. 10 points for a kill in the first row,
                 20 for the next 2 rows, and then 30 for the next 2 [int >= 0]
-        pewSound: Sound when either ship or alien bolt is fired [wav file]
-        blastSound: Sound when ship is destroyed [wav file]
-        blast2Sound: Sound when ship is destroyed [wav file]
-        sound: if sound is wanted or not [boolean]
+        SOUND EXTENSION BELOW
+        Whether sound is on is kept by the audio module for the whole
+        process, not per wave
     """
 
     def setSound(self, a):
-        self.sound = a
+        audio.setEnabled(a)
 
     def getSound(self):
-        return self.sound
+        return audio.isEnabled()
+
+    def playSound(self, name):
+        """
+        Requests that the sound file name be played, if sound is on.
+
+        The wave never touches an audio device itself; the request is queued
+        for the mixer installed in the audio module, if any, and this returns
+        at once.
+
+        Parameter name: the sound to play
+        Precondition: name is a string corresponding to a wav file in file directory
+        """
+        audio.play(name)
 
     def getShip(self):
         """
@@ -56,30 +112,30 @@ class Wave(object):
 
     def getAliens(self):
         """
-        Returns _aliens of class Aliens, a 2d list stored in the _wave attribute of class Invaders
+        Returns _aliens of class Formation, stored in the _wave attribute of class Invaders
 
         Parameter self: a wave object
         Precondition: self is an object of class Wave
         """
         return self._aliens
 
-    def getdLine(self):
+    def getShipBolts(self):
         """
-        Returns _dline of class GPath, stored in the _wave attribute of class Invaders
+        Returns _shipBolts of class BoltPool, stored in the _wave attribute of class Invaders
 
         Parameter self: a wave object
         Precondition: self is an object of class Wave
         """
-        return self._dline
+        return self._shipBolts
 
-    def getBolts(self):
+    def getAlienBolts(self):
         """
-        Returns _bolts of class Bolt, stored in the _wave attribute of class Invaders
+        Returns _alienBolts of class BoltPool, stored in the _wave attribute of class Invaders
 
         Parameter self: a wave object
         Precondition: self is an object of class Wave
         """
-        return self._bolts
+        return self._alienBolts
 
     def getLives(self):
         """
@@ -98,105 +154,332 @@ class Wave(object):
         Precondition: self is an object of class Wave
         """
         return self._score
-    def __init__(self):
+
+    def carryOver(self, previous):
+        """
+        Starts this wave with the lives and score left at the end of the wave
+        previous, as the next level of the same game
+
+        Parameter previous: the wave of the level before
+        Precondition: previous is a Wave object
+        """
+        self._lives = previous.getLives()
+        self._score = previous.getScore()
+
+    def getConfig(self):
+        """
+        Returns the settings of this wave [GameConfig]
+        """
+        return self._config
+
+    def getSeed(self):
+        """
+        Returns the seed of the random number generator of this wave
+        """
+        return self._seed
+
+    def getTicks(self):
+        """
+        Returns the number of ticks simulated so far
+        """
+        return self._ticks
+
+    def setRecorder(self, recorder):
+        """
+        Sets the object that records the input at the start of every tick
+
+        Parameter recorder: the recorder, or None to stop recording
+        Precondition: recorder is None or has the methods record(input) and
+        rewind(ticks), like Replay
+        """
+        self._recorder = recorder
+
+    def setEventBus(self, bus):
+        """
+        Sets the bus that the shots, kills and deaths of the wave are emitted to
+
+        Parameter bus: the bus, or None to emit nothing
+        Precondition: bus is an EventBus or None
+        """
+        self._events = bus
+
+    def getEventBus(self):
+        """
+        Returns the bus that the events of the wave are emitted to, or None
+        """
+        return self._events
+
+    def getRecorder(self):
+        """
+        Returns the object that records the input of every tick, or None
+        """
+        return self._recorder
+
+    def getAlpha(self):
+        """
+        Returns how far the current moment is between the last tick and the
+        next one, as a fraction in 0..1. Used to interpolate when drawing.
+        """
+        return self._lag / TICK
+
+    def __init__(self, seed=None, config=DEFAULT_CONFIG):
         """
         Initializes attributes in class Wave when called from class Invaders
         SCORE EXTENSION
-        """
-        self._aliens = self.create2dAlien()
+
+        Parameter seed: the seed for the random number generator of the wave,
+        or None to pick one at random
+        Precondition: seed is an int or None
+
+        Parameter config: the settings of the wave
+        Precondition: config is a GameConfig
+        """
+        self._config = config
+        if (seed == None):
+            seed = random.randrange(2**32)
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._rngState = None
+        self._lag = 0
+        self._ticks = 0
+        self._recorder = None
+        self._events = None
+        self._aliens = self.createFormation()
         self._ship = self.createShip()
-        self._dline = GPath(points = [0,DEFENSE_LINE,GAME_WIDTH,DEFENSE_LINE],
-        linewidth = 2,linecolor =[0.5,0.5,0,0.5])
-        self._bolts = []
+        self._shipBolts = BoltPool(config.boltSpeed)
+        self._alienBolts = BoltPool(-1 * config.boltSpeed)
         self._time = 0
         self._directionA = True
         self._verts = False
-        self._alienFire = random.randint(1, BOLT_RATE)
-        self._lives = SHIP_LIVES
+        self._alienFire = self._rng.randint(1, config.boltRate)
+        self._lives = config.shipLives
         self._score = 0
-        self.pewSound = Sound('pew2.wav')
-        self.blastSound = Sound('blast1.wav')
-        self.blast2Sound = Sound('blast3.wav')
-        self.sound = True
+
+    def snapshot(self):
+        """
+        Returns the whole state of the wave packed into bytes, for restore.
+
+        The snapshot holds the alive bits and the offset of the formation
+        rather than the position of every alien, and the centers of the live
+        bolts. Most of its size is the state of the random number generator.
+        The config and the recorder are not part of it.
+        """
+        c = self._config
+        aliens = self._aliens
+        ship = self._ship
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_VERSION, self._ticks, self._time,
+            self._alienFire, self._lives, self._score, aliens.getMoves(), self._lag,
+            aliens.getX(0) - c.colx[0], aliens.getY(0) - c.rowy[0], self._directionA,
+            self._verts, ship != None, 0 if ship == None else ship.x,
+            0 if ship == None else ship.prevX, self._shipBolts.getCount(),
+            self._alienBolts.getCount())
+        rng = SNAPSHOT_RNG.pack(*self._getRngState()[1])
+        return b''.join((header, rng, aliens.packAlive(), self._shipBolts.pack(),
+                         self._alienBolts.pack()))
+
+    def restore(self, state):
+        """
+        Puts the wave back in the state saved by snapshot.
+
+        The formation is replaced by a new one, and the recorder, if any, is
+        rewound to the tick of the snapshot.
+
+        Raises ValueError if state is not a snapshot of a wave with the same
+        formation size.
+
+        Parameter state: the snapshot
+        Precondition: state is a bytes object returned by snapshot on a wave
+        with the same config
+        """
+        c = self._config
+        if (len(state) < SNAPSHOT_HEADER.size or state[0] != SNAPSHOT_VERSION):
+            raise ValueError('not a wave snapshot of version ' + str(SNAPSHOT_VERSION))
+        (version, ticks, time, alienFire, lives, score, moves, lag, dx, dy, direction,
+         verts, hasShip, shipX, prevX, shipBolts, alienBolts) = SNAPSHOT_HEADER.unpack_from(state)
+        start = SNAPSHOT_HEADER.size + SNAPSHOT_RNG.size
+        bits = start + (c.rows * c.cols + 7) // 8
+        ships = bits + 16 * shipBolts
+        if (len(state) != ships + 16 * alienBolts):
+            raise ValueError('the snapshot is of a wave with a different formation')
+
+        self._rng = None
+        self._rngState = (3, SNAPSHOT_RNG.unpack_from(state, SNAPSHOT_HEADER.size), None)
+        self._aliens = self.createFormation()
+        self._aliens.restore(state[start:bits], dx, dy, moves)
+        self._ship = None
+        if (hasShip):
+            self._ship = self.createShip()
+            self._ship.x = shipX
+            self._ship.prevX = prevX
+        self._shipBolts.unpack(state[bits:ships])
+        self._alienBolts.unpack(state[ships:])
+        self._ticks = ticks
+        self._time = time
+        self._alienFire = alienFire
+        self._lives = lives
+        self._score = score
+        self._lag = lag
+        self._directionA = direction
+        self._verts = verts
+        if (self._recorder != None):
+            self._recorder.rewind(ticks)
+
+    def clone(self):
+        """
+        Returns a copy of the wave that plays on independently of it, without
+        a recorder or an event bus.
+
+        The copy shares the formation until either wave changes it, and
+        builds its random number generator only when it first draws from it,
+        so cloning costs little more than copying the bolts.
+        """
+        other = object.__new__(Wave)
+        other.__dict__.update(self.__dict__)
+        other._recorder = None
+        other._events = None
+        other._rng = None
+        other._rngState = self._getRngState()
+        other._aliens = self._aliens.copy()
+        other._shipBolts = self._shipBolts.copy()
+        other._alienBolts = self._alienBolts.copy()
+        if (self._ship != None):
+            other._ship = self.createShip()
+            other._ship.x = self._ship.x
+            other._ship.prevX = self._ship.prevX
+        return other
+
+    def _getRng(self):
+        """
+        Returns the random number generator, building it from _rngState if
+        this wave has not drawn from it yet, for a draw that will make
+        _rngState out of date
+        """
+        if (self._rng == None):
+            self._rng = random.Random.__new__(random.Random)
+            self._rng.setstate(self._rngState)
+        self._rngState = None
+        return self._rng
+
+    def _getRngState(self):
+        """
+        Returns the state of the random number generator, remembering it
+        until the next draw [tuple]
+        """
+        if (self._rngState == None):
+            self._rngState = self._rng.getstate()
+        return self._rngState
 
     def createShip(self):
         """
         Creates a ship centered horizontally and just below the defense line
-        Returns: Ship object centered at position
-        (GAME_WIDTH/2, SHIP_BOTTOM + SHIP_HEIGHT/2)
+        Returns: Ship object centered at position (shipX, shipY) of the config
         """
-        xShip = GAME_WIDTH/2
-        yShip = SHIP_BOTTOM + SHIP_HEIGHT/2
-        return Ship(xShip, yShip, 'ship.png')
+        return Ship(self._config.shipX, self._config.shipY, SHIP_IMAGE)
 
-    def create2dAlien(self):
+    def createFormation(self):
         """
-        Creates and returns a 2d list of aliens, with different aliens every two
-        rows
-        Returns: A 2d list of Alien objects
+        Creates and returns the formation of aliens, with different aliens every
+        two rows, where the config places them
+        Returns: A Formation object
         """
-        r = []
-        xpos = ALIEN_H_SEP + ALIEN_WIDTH/2
-        ypos = GAME_HEIGHT - ALIEN_CEILING - ALIEN_HEIGHT/2
-        pos = len(ALIEN_IMAGES)-1
-        image = ALIEN_IMAGES[pos]
+        return Formation(self._config.colx, self._config.rowy, self._config.sources)
 
-        for a in range(0, ALIEN_ROWS):
-            ypos = GAME_HEIGHT - ALIEN_CEILING - ALIEN_HEIGHT/2 - (1+a) * (ALIEN_HEIGHT + ALIEN_V_SEP)
+    def update(self, input, dt):
+        """
+        Advances the wave by the ticks that fit in the time dt, plus any time
+        left over from earlier frames.
 
-            if ((ALIEN_ROWS - a)%2 == 0):
-                pos = pos - 1
+        At most MAX_TICKS_PER_FRAME ticks are run, and the rest of the time is
+        dropped. Ticking also stops as soon as the ship is destroyed or the
+        wave is over, so that Invaders sees the same state it would after a
+        single tick.
 
-                if (pos == -1):
-                    pos = len(ALIEN_IMAGES) - 1
-                image = ALIEN_IMAGES[pos]
+        Parameter input: The user input, used to control the ship and change state
+        Precondition: input is an instance of GInput; it is inherited from GameApp
 
-            for b in range(0, ALIENS_IN_ROW):
-                r.append(Alien(xpos, ypos, image))
-                xpos = xpos + ALIEN_WIDTH + ALIEN_H_SEP
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float) >= 0
+        """
+        prof = profiler.current
+        if (prof != None):
+            start = prof.clock()
+        self._lag = self._lag + dt
+        ticks = 0
+        while (self._lag >= TICK):
+            if (ticks == MAX_TICKS_PER_FRAME):
+                self._lag = 0
+                break
+            self.tick(input)
+            self._lag = self._lag - TICK
+            ticks = ticks + 1
+            if (self.getShip() == None or self.isBelowLine() or self.noAliensAlive()):
+                self._lag = 0
+                break
+        if (prof != None):
+            prof.lap('Wave.update', start)
+
+    def tick(self, input):
+        """
+        In charge of updating the positions, movements, and collisions of _ship,
+        _aliens, _shipBolts and _alienBolts over one tick of TICK seconds.
 
-            xpos = ALIEN_H_SEP + ALIEN_WIDTH/2
+        If a profiler is installed, each phase of the tick is timed separately.
 
-        a = []
-        b = 0
-        for x in range(0, len(r)):
-            a.append(r[b:b+ALIENS_IN_ROW])
-            b = b + ALIENS_IN_ROW
-        return a
-    def update(self, input, dt):
+        Parameter input: The user input, used to control the ship and change state
+        Precondition: input is an instance of GInput; it is inherited from GameApp
         """
-        In charge of updating the positions, movements, and collisions of _ship,
-        _aliens, and _bolts.
+        self._ticks = self._ticks + 1
+        if (self._recorder != None):
+            self._recorder.record(input)
+        prof = profiler.current
+        if (prof != None):
+            self._profiledTick(input, prof)
+            return
+        if (self.getShip() != None):
+            self.moveShip(input)
+        self.moveAliens()
+        if (self.getShip() != None):
+            self.createShipBolt(input)
+        self.moveBolt()
+        self.shipCollision()
+        self.alienCollision()
+        self.cullBolts()
+
+    def _profiledTick(self, input, prof):
+        """
+        Runs the phases of tick, timing each one with prof
 
         Parameter input: The user input, used to control the ship and change state
         Precondition: input is an instance of GInput; it is inherited from GameApp
 
-        Parameter dt: The time in seconds since last update
-        Precondition: dt is a number (int or float)
+        Parameter prof: the profiler to record the timings in
+        Precondition: prof is a Profiler object
         """
+        t = prof.clock()
         if (self.getShip() != None):
             self.moveShip(input)
-        self.moveAliens(dt)
+            t = prof.lap('moveShip', t)
+        self.moveAliens()
+        t = prof.lap('moveAliens', t)
         if (self.getShip() != None):
             self.createShipBolt(input)
+            t = prof.lap('createShipBolt', t)
         self.moveBolt()
+        t = prof.lap('moveBolt', t)
         self.shipCollision()
+        t = prof.lap('shipCollision', t)
         self.alienCollision()
+        t = prof.lap('alienCollision', t)
+        self.cullBolts()
+        prof.lap('cullBolts', t)
 
     def isBelowLine(self):
         """
         Method to determine if any alien is below or touching the defense line
         Returns: True if any alien has reached defense line, False otherwise
-        SOUND EXTENSION
         """
-        for x in self.getAliens():
-            for y in x:
-                if (y != None):
-                    if (y.y - ALIEN_HEIGHT/2 <= DEFENSE_LINE):
-                        return True
-                        if (self.sound):
-                            self.blast2Sound.play()
-        return False
+        bottom = self.getAliens().bottom()
+        return bottom != None and bottom <= self._config.defenseLine
 
     def noAliensAlive(self):
         """
@@ -205,204 +488,180 @@ class Wave(object):
         Returns: True if there are no aliens alive, False if there is at least one
         alien alive
         """
-        b = True
-        for x in self.getAliens():
-            for y in x:
-                if (y != None):
-                    b = False
-        return b
+        return self.getAliens().isEmpty()
 
     def shipCollision(self):
         """
-        Method to determine if ship has been struck by an alien bolt. If ship has
-        been hit, _ship is set to None, the corresponding bolt is deleted from
-        _bolts, and the number of lives remaining is decremented by one
+        Method to determine if ship has been struck by an alien bolt anywhere on
+        the move of the bolt in the tick. If ship has been hit, _ship is set to
+        None, the corresponding bolt is deleted from _alienBolts, and the number
+        of lives remaining is decremented by one
         SOUND EXTENSION
         """
-        for x in self.getBolts():
-            if (self._ship != None and self._ship.collides(x)):
-                self._ship = None
-                self.getBolts().remove(x)
-                self._lives = self._lives - 1
-                if (self.sound):
-                    self.blast2Sound.play()
+        if (self._ship == None):
+            return
+        i = self.getAlienBolts().findHit(self._ship.getHitbox())
+        if (i != None):
+            if (self._events != None):
+                self._events.emit(EVENT_DEATH, self._ticks, self._ship.x, self._lives - 1)
+            self._ship = None
+            self.getAlienBolts().remove(i)
+            self._lives = self._lives - 1
+            self.playSound(BLAST2_SOUND)
 
     def alienCollision(self):
         """
-        Method to determine if any alien in _aliens has been struck by a ship bolt
-        If alien is struck by ship bolt, alien is set to None and corresponding bolt
-        is removed from _bolts. Score is increased by corresponding row number
+        Method to determine if any alien in _aliens has been struck by a ship bolt.
+        Each ship bolt is looked up in the grid of the formation over its whole
+        move in the tick, so the cost depends on the number of bolts and on how
+        far they move, and not on the number of aliens. If alien
+        is struck by ship bolt, alien is killed in the formation and
+        corresponding bolt is removed from _shipBolts. Score is increased by
+        corresponding row number
         SOUND EXTENSION
         SCORE EXTENSION
         """
-        a = None
-        for x in self.getBolts():
-            if (x.getVelocity() > 0):
-                a = x
-        for x in range(0, ALIEN_ROWS):
-            for y in range(0, ALIENS_IN_ROW):
-                if (a != None and self.getAliens()[x][y] != None
-                and self.getAliens()[x][y].collides(a)):
-                    self.getAliens()[x][y] = None
-                    self.getBolts().remove(a)
-                    if (self.sound):
-                        self.blastSound.play()
-                    if (x == 4):
-                        self._score = self._score + 10
-                    elif (x == 2 or x== 3):
-                        self._score = self._score + 20
-                    else:
-                        self._score = self._score + 30
+        bolts = self.getShipBolts()
+        for i in range(bolts.getCount() - 1, -1, -1):
+            y = bolts.getY(i)
+            hit = self.getAliens().hit(bolts.getX(i), y, y - bolts.getVelocity())
+            if (hit != None):
+                x = hit[0]
+                self.getAliens().kill(hit[0], hit[1])
+                bolts.remove(i)
+                self.playSound(BLAST_SOUND)
+                score = self._score
+                if (x == 4):
+                    self._score = self._score + 10
+                elif (x == 2 or x== 3):
+                    self._score = self._score + 20
+                else:
+                    self._score = self._score + 30
+                if (self._events != None):
+                    self._events.emit(EVENT_KILL, self._ticks, hit[0], hit[1], self._score - score)
 
     def moveBolt(self):
         """
-        Method to move all bolts currently on the game screen. If bolt travels
-        off the screen, it is removed from _bolts
+        Method to move all bolts currently on the game screen. Bolts that
+        leave the screen stay in their pools until cullBolts, so that the
+        collisions are checked over the whole move first
         """
-        for a in self.getBolts():
-            a.y = a.y + a.getVelocity()
-            if (a.y > GAME_HEIGHT or a.y < 0):
-                self.getBolts().remove(a)
+        self.getShipBolts().move()
+        self.getAlienBolts().move()
 
-    def createShipBolt(self, input):
+    def cullBolts(self):
         """
-        Method to create a bolt traveling from the ship. There can only be one
-        ship bolt on the game screen at one time, and a ship bolt is fired by
-        pressing the 'spacebar' key
-        SOUND EXTENSION
+        Method to remove every bolt that has traveled off the screen from its
+        pool, once the collisions of the tick have been checked
         """
-        y = self.getShip().y + SHIP_HEIGHT/2
-        canFire = True
-        for x in self.getBolts():
-            if (x.y < GAME_HEIGHT and x.isPlayerBolt()):
-                canFire = False
-        if (input.is_key_down('spacebar') and canFire):
-            self.getBolts().append(Bolt(self.getShip().x, y, BOLT_SPEED))
-            if (self.sound):
-                self.pewSound.play()
+        height = self._config.height
+        self.getShipBolts().cull(0, height)
+        self.getAlienBolts().cull(0, height)
 
-    def moveAliens(self, dt):
+    def createShipBolt(self, input):
         """
-        Method moves aliens in a snaking fashion subject to parameter dt and
-        calls createAlienBolt(), to create an alien bolt.
-
-        Parameter dt: dt is the time in seconds since last update
-        Precondition: dt is a number (int or float)
+        Method to create bolts traveling from the ship. A shot is fired by
+        pressing the 'spacebar' key while fewer than shipBoltLimit ship bolts
+        are on the game screen, and releases spread bolts side by side
+        SOUND EXTENSION
         """
-        self._time = self._time + dt
-        if (self._time > ALIEN_SPEED):
+        c = self._config
+        y = self.getShip().y + self.getShip().height/2
+        if (input.is_key_down('spacebar') and self.getShipBolts().getCount() < c.shipBoltLimit):
+            left = self.getShip().x - (c.spread - 1) * c.spreadGap/2
+            for i in range(c.spread):
+                self.getShipBolts().add(left + i * c.spreadGap, y)
+            self.playSound(PEW_SOUND)
+            if (self._events != None):
+                self._events.emit(EVENT_SHOT, self._ticks, self.getShip().x, y, c.spread)
+
+    def moveAliens(self):
+        """
+        Method moves aliens in a snaking fashion, one step every stepTicks
+        ticks of the config, and calls createAlienBolt(), to create an
+        alien bolt.
+        """
+        c = self._config
+        self._time = self._time + 1
+        if (self._time >= c.stepTicks):
             self._time = 0
-            if ((self.rightmostAlien() + ALIEN_H_SEP > GAME_WIDTH
-            or self.leftmostAlien() < ALIEN_H_SEP) and self._verts):
-                for x in self.getAliens():
-                    for z in x:
-                        if (z != None):
-                            z.y = z.y - ALIEN_V_WALK
+            if ((self.rightmostAlien() + c.alienHSep > c.width
+            or self.leftmostAlien() < c.alienHSep) and self._verts):
+                self.getAliens().march(0, -c.alienVWalk)
                 self._verts = False
                 if (self._directionA == True):
                     self._directionA = False
                 else:
                     self._directionA = True
             elif (self._directionA == True):
-                for x in self.getAliens():
-                    for y in x:
-                        if (y != None):
-                            y.x = y.x + ALIEN_H_WALK
+                self.getAliens().march(c.alienHWalk, 0)
                 self._verts = True
             elif (self._directionA == False):
-                for x in self.getAliens():
-                    for y in x:
-                        if (y != None):
-                            y.x = y.x - ALIEN_H_WALK
+                self.getAliens().march(-c.alienHWalk, 0)
                 self._verts = True
             self.createAlienBolt()
 
     def createAlienBolt(self):
         """
         Method checks if it is time to fire a bolt from an alien, using the
-        attribute _alienFire
+        attribute _alienFire, and if so fires volley bolts
         """
         if (self._alienFire == 0):
-            self.getBolts().append(self.pickAlien())
-            self._alienFire = random.randint(1, BOLT_RATE)
+            for i in range(self._config.volley):
+                x, y = self.pickAlien()
+                self.getAlienBolts().add(x, y)
+                if (self._events != None):
+                    self._events.emit(EVENT_ALIEN_SHOT, self._ticks, x, y)
+            self._alienFire = self._getRng().randint(1, self._config.boltRate)
         else:
             self._alienFire = self._alienFire - 1
 
     def pickAlien(self):
         """
-        Method picks an alien to shoot a bolt out of. Checks where there are
-        possible aliens to shoot out of, and then randomly selects an alien
-        Returns a Bolt object traveling downwards towards the ship
-        """
-        b = False
-        a = []
-        for x in range(0, len(self.getAliens()[0])):
-            b = False
-            for y in range(0, ALIEN_ROWS):
-                if (self.getAliens()[y][x] != None):
-                    b = True
-            if (b):
-                a.append(x)
-
-        z = random.randint(0, len(a) - 1)
-        m = GAME_HEIGHT
-        n = 0
-        for y in range(0, ALIEN_ROWS):
-            if (self.getAliens()[y][a[z]] != None):
-                m = min(m, self.getAliens()[y][a[z]].y)
-                n = self.getAliens()[y][a[z]].x
-        return Bolt(n, m, -1 * BOLT_SPEED)
+        Method picks an alien to shoot a bolt out of. Randomly selects one of the
+        columns that still has live aliens, and fires from its lowest alien
+        Returns the (x, y) position to fire an alien bolt from
+        """
+        a = self.getAliens().liveColumns()
+        z = self._getRng().randint(0, len(a) - 1)
+        col = a[z]
+        row = self.getAliens().lowestInColumn(col)
+        return (self.getAliens().getX(col), self.getAliens().getY(row))
 
     def rightmostAlien(self):
         """
-        Method finds the rightmost alien in the 2d list _aliens
-        Returns x coordinate of the rightmost alien [int or float >= 0]
+        Method finds the rightmost alien in the formation _aliens
+        Returns x coordinate of the right edge of the rightmost alien [int or float >= 0]
         """
-        x = 0
-        for a in self.getAliens():
-            for b in a:
-                if (b != None):
-                    x = max(x, b.x)
-        return x + ALIEN_WIDTH/2
+        x = self.getAliens().right()
+        if (x == None):
+            return ALIEN_WIDTH/2
+        return x
 
     def leftmostAlien(self):
         """
-        Method finds the leftmost alien in the 2d list _aliens
-        Returns x coordinate of the leftmost alien [int or float >= 0]
+        Method finds the leftmost alien in the formation _aliens
+        Returns x coordinate of the left edge of the leftmost alien [int or float >= 0]
         """
-        x = GAME_WIDTH
-        for a in self.getAliens():
-            for b in a:
-                if (b != None):
-                    x = min(x, b.x)
-        return x - ALIEN_WIDTH/2
+        x = self.getAliens().left()
+        if (x == None):
+            return self._config.width - ALIEN_WIDTH/2
+        return x
 
     def moveShip(self, input):
         """
         Method moves _ship to the right or left given a player
         input of 'left' or 'right'
         """
+        c = self._config
+        self._ship.prevX = self._ship.x
         da = 0
         if (input.is_key_down('left')):
-            da = da - SHIP_MOVEMENT
+            da = da - c.shipMovement
         if (input.is_key_down('right')):
-            da = da + SHIP_MOVEMENT
+            da = da + c.shipMovement
         self._ship.x = self._ship.x + da
-        if (self._ship.x > GAME_WIDTH - SHIP_WIDTH/2):
-            self._ship.x = GAME_WIDTH - SHIP_WIDTH/2
+        if (self._ship.x > c.width - SHIP_WIDTH/2):
+            self._ship.x = c.width - SHIP_WIDTH/2
         if (self._ship.x < SHIP_WIDTH/2):
             self._ship.x = SHIP_WIDTH/2
-    def draw(self, view):
-        """
-        Method draws object in class Wave. If the object is None, the method
-        doesn't do anything
-        """
-        if (self.getShip() != None):
-            self.getShip().draw(view)
-        for a in self.getAliens():
-            for x in a:
-                if (x != None):
-                    x.draw(view)
-        self.getdLine().draw(view)
-        for a in self.getBolts():
-            a.draw(view)